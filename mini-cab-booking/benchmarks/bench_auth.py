@@ -0,0 +1,43 @@
+"""
+Token verification cost: full HMAC check vs a verified-token cache hit.
+
+Run from mini-cab-booking/:  python -m benchmarks.bench_auth
+"""
+
+from __future__ import annotations
+
+import time
+
+from cab_booking.auth import SignedTokenAuthService
+
+
+def per_call_ns(fn, tokens: list[str], rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter_ns()
+        for token in tokens:
+            fn(token)
+        best = min(best, (time.perf_counter_ns() - start) / len(tokens))
+    return best
+
+
+def main(riders: int = 10_000, rounds: int = 5) -> None:
+    auth = SignedTokenAuthService(b"bench-secret-0123456789abcdef")
+    tokens = [auth.issue(f"r{i}", ttl=3600) for i in range(riders)]
+
+    uncached = per_call_ns(auth.subject, tokens, rounds)
+    for token in tokens:  # warm the cache
+        assert auth.is_authenticated(token)
+    cached = per_call_ns(auth.is_authenticated, tokens, rounds)
+    forged = [t[:-2] + ("AA" if not t.endswith("AA") else "BB") for t in tokens]
+    rejected = per_call_ns(auth.is_authenticated, forged, 1)
+
+    stats = auth.stats()
+    print(f"HMAC verify       {uncached:8.0f} ns/token")
+    print(f"cache hit         {cached:8.0f} ns/token  ({uncached / cached:.0f}x faster)")
+    print(f"forged (miss)     {rejected:8.0f} ns/token")
+    print(f"hits={stats.hits:,} misses={stats.misses:,} size={stats.size:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+BatchMatcher vs greedy nearest-driver dispatch on one window of N requests
+and N free drivers scattered over a city: matched count, total and
+per-ride pickup distance, and time per phase (candidate search, auction,
+booking). Requests the batch leaves unmatched are carried into a second
+window; any still left have no free driver within max_pickup_km, a limit
+greedy dispatch does not apply.
+
+Run from mini-cab-booking/:  python -m benchmarks.bench_batch_matching
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import time
+
+from cab_booking.config import AppConfig
+from cab_booking.facade import CabBookingFacade
+from cab_booking.geo import KM_PER_DEG, distance_km
+from cab_booking.matching import UNMATCHED, BatchMatcher, auction
+from cab_booking.models import Driver, Location, RideRequest, Rider
+from cab_booking.payment import DefaultPaymentFactory
+from cab_booking.pricing import NormalPricing
+from cab_booking.services import BookingService, NearestDriverAllocator
+
+CENTER = Location(12.9716, 77.5946)
+RADIUS_KM = 12.0
+
+
+def point(rng: random.Random) -> Location:
+    # Denser towards the centre, like demand and supply in a real city.
+    r = RADIUS_KM * rng.random() ** 1.5
+    angle = rng.random() * 2 * math.pi
+    return Location(
+        CENTER.lat + r * math.sin(angle) / KM_PER_DEG,
+        CENTER.lng + r * math.cos(angle) / (KM_PER_DEG * math.cos(math.radians(CENTER.lat))),
+    )
+
+
+def setup(
+    n: int, seed: int
+) -> tuple[CabBookingFacade, NearestDriverAllocator, dict[str, Location], list[RideRequest]]:
+    rng = random.Random(seed)
+    allocator = NearestDriverAllocator()
+    fleet: dict[str, Location] = {}
+    for i in range(n):
+        fleet[f"d{i}"] = point(rng)
+        allocator.add_driver(Driver(f"d{i}", f"Driver {i}"), fleet[f"d{i}"])
+    facade = CabBookingFacade(
+        config=AppConfig(),
+        pricing_strategy=NormalPricing(),
+        payment_factory=DefaultPaymentFactory(),
+        booking_service=BookingService(allocator),
+    )
+    requests = [
+        RideRequest(
+            rider=Rider(f"r{i}", f"Rider {i}"),
+            pickup=point(rng),
+            drop=point(rng),
+            distance_km=5.0,
+            payment_type="UPI",
+            payment_details={"upi_id": f"r{i}@upi"},
+        )
+        for i in range(n)
+    ]
+    return facade, allocator, fleet, requests
+
+
+def greedy(n: int, seed: int) -> tuple[float, int, float]:
+    facade, _, fleet, requests = setup(n, seed)
+    start = time.perf_counter()
+    results = facade.book_rides(requests)
+    elapsed = time.perf_counter() - start
+    km = 0.0
+    matched = 0
+    for result in results:
+        if result.booking is not None:
+            matched += 1
+            km += distance_km(result.request.pickup, fleet[result.booking.driver.driver_id])
+    return km, matched, elapsed
+
+
+def batch(n: int, seed: int, window_s: float) -> None:
+    facade, allocator, fleet, requests = setup(n, seed)
+    matcher = BatchMatcher(facade, allocator, window_s=window_s)
+
+    t0 = time.perf_counter()
+    graph = []
+    ids: dict[str, int] = {}
+    for request in requests:
+        edges = []
+        for driver_id, km in allocator.candidates(request.pickup, 8, 5.0):
+            edges.append((ids.setdefault(driver_id, len(ids)), int(km * 1000)))
+        graph.append(edges)
+    t1 = time.perf_counter()
+    assigned = auction(graph, 5001)
+    t2 = time.perf_counter()
+    print(
+        f"  candidates {t1 - t0:6.3f}s ({sum(map(len, graph)):,} edges)  "
+        f"unbounded auction {t2 - t1:6.3f}s  "
+        f"({sum(j != UNMATCHED for j in assigned):,} matched)"
+    )
+
+    futures = [matcher.submit(request) for request in requests]
+    for window in (1, 2):
+        start = time.perf_counter()
+        results = matcher.flush()
+        elapsed = time.perf_counter() - start
+        booked = [result.booking for result in results if result.booking is not None]
+        km = sum(
+            distance_km(booking.request.pickup, fleet[booking.driver.driver_id])
+            for booking in booked
+        )
+        carried = sum(1 for future in futures if not future.done())
+        print(
+            f"  batch {window}: {_served(km, len(booked))}  carried {carried:5,}  "
+            f"flush {elapsed:6.3f}s "
+            f"({'within' if elapsed <= window_s else 'OVER'} the {window_s:g}s window)"
+        )
+        if not carried:
+            break
+
+
+def _served(km: float, matched: int) -> str:
+    return f"matched {matched:5,}  pickup {km:9,.1f} km ({km / max(matched, 1):.3f} km/ride)"
+
+
+def main() -> None:
+    for n in (500, 5_000):
+        print(f"--- {n:,} requests x {n:,} drivers")
+        km, matched, elapsed = greedy(n, seed=1)
+        print(f"  greedy:  {_served(km, matched)}  booking {elapsed:6.3f}s")
+        batch(n, seed=1, window_s=2.0)
+
+
+if __name__ == "__main__":
+    main()
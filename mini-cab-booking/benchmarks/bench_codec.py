@@ -0,0 +1,145 @@
+"""
+Binary codec vs pickle vs JSON for Bookings and Events: bytes per record and
+encode/decode throughput, record-at-a-time and in batches of 1,000.
+
+JSON stores booking_to_row() rows and [event_type, payload] pairs.
+Codec batches are decoded from a memoryview, as the journal does with views
+into its mmap-ed segments.
+
+Run from mini-cab-booking/:  python -m benchmarks.bench_codec
+"""
+
+from __future__ import annotations
+
+import json
+import pickle
+import random
+import time
+
+from cab_booking import (
+    AppConfig,
+    CabBookingFacade,
+    DefaultPaymentFactory,
+    DriverAllocator,
+    NormalPricing,
+    RideRequestBuilder,
+)
+from cab_booking import codec
+from cab_booking.models import Driver
+from cab_booking.observer import Event
+from cab_booking.repository import booking_from_row, booking_to_row
+from cab_booking.services import BookingService
+
+
+def make_bookings(n: int) -> list:
+    rng = random.Random(5)
+    facade = CabBookingFacade(
+        config=AppConfig(),
+        pricing_strategy=NormalPricing(),
+        payment_factory=DefaultPaymentFactory(),
+        booking_service=BookingService(
+            DriverAllocator([Driver(f"d{i}", f"Driver {i}") for i in range(500)])
+        ),
+    )
+    bookings = []
+    for _ in range(n):
+        request = (
+            RideRequestBuilder()
+            .rider(f"r{rng.randrange(n // 4)}", "Rider")
+            .pickup(12.9 + rng.random() / 10, 77.5 + rng.random() / 10)
+            .drop(12.9 + rng.random() / 10, 77.5 + rng.random() / 10)
+            .distance_km(round(rng.uniform(1, 25), 2))
+            .payment("UPI", upi_id="rider@upi")
+            .build()
+        )
+        booking = facade.book_ride(request)
+        facade.cancel_ride(booking)  # keep the fleet free
+        bookings.append(booking)
+    return bookings
+
+
+def make_events(bookings: list) -> list[Event]:
+    return [
+        Event(
+            event_type="BOOKING_CONFIRMED",
+            payload={
+                "booking_id": b.booking_id,
+                "driver_id": b.driver.driver_id,
+                "fare": str(b.fare),
+            },
+        )
+        for b in bookings
+    ]
+
+
+def json_booking(b) -> bytes:
+    return json.dumps(booking_to_row(b), separators=(",", ":")).encode()
+
+
+def json_event(e: Event) -> bytes:
+    return json.dumps([e.event_type, e.payload], separators=(",", ":"), default=str).encode()
+
+
+def unjson_event(data: bytes) -> Event:
+    event_type, payload = json.loads(data)
+    return Event(event_type=event_type, payload=payload)
+
+
+def per_record_us(fn, items: list, per_call: int, rounds: int = 3) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return best / (len(items) * per_call) * 1e6
+
+
+def report(label: str, records: list, formats) -> None:
+    print(f"{label}")
+    print(f"  {'format':<16}{'bytes/rec':>10}{'encode us':>11}{'decode us':>11}")
+    for name, encode, decode, per_call, items in formats(records):
+        blobs = [encode(item) for item in items]
+        size = sum(len(b) for b in blobs) / (len(items) * per_call)
+        enc = per_record_us(encode, items, per_call)
+        dec = per_record_us(decode, blobs, per_call)
+        print(f"  {name:<16}{size:>10.0f}{enc:>11.2f}{dec:>11.2f}")
+
+
+def booking_formats(bookings: list):
+    batches = [bookings[i : i + 1000] for i in range(0, len(bookings), 1000)]
+    return [
+        ("json", json_booking, lambda d: booking_from_row(json.loads(d)), 1, bookings),
+        ("pickle", pickle.dumps, pickle.loads, 1, bookings),
+        ("codec", codec.encode, codec.decode, 1, bookings),
+        ("pickle x1000", pickle.dumps, pickle.loads, 1000, batches),
+        ("codec x1000", codec.encode_many, _decode_view, 1000, batches),
+    ]
+
+
+def event_formats(events: list[Event]):
+    batches = [events[i : i + 1000] for i in range(0, len(events), 1000)]
+    return [
+        ("json", json_event, unjson_event, 1, events),
+        ("pickle", pickle.dumps, pickle.loads, 1, events),
+        ("codec", codec.encode, codec.decode, 1, events),
+        ("pickle x1000", pickle.dumps, pickle.loads, 1000, batches),
+        ("codec x1000", codec.encode_many, _decode_view, 1000, batches),
+    ]
+
+
+def _decode_view(blob: bytes) -> list:
+    return codec.decode_many(memoryview(blob))
+
+
+def main(n: int = 10_000) -> None:
+    bookings = make_bookings(n)
+    events = make_events(bookings)
+    assert codec.decode_many(codec.encode_many(bookings)) == bookings
+    assert codec.decode_many(codec.encode_many(events)) == events
+    report(f"Booking ({n:,} records)", bookings, booking_formats)
+    report(f"Event ({n:,} records)", events, event_formats)
+
+
+if __name__ == "__main__":
+    main()
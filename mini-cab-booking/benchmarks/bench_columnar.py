@@ -0,0 +1,99 @@
+"""
+Memory per booking: list of Booking dataclasses vs columnar BookingBatch.
+
+Run from mini-cab-booking/:  python -m benchmarks.bench_columnar
+"""
+
+from __future__ import annotations
+
+import gc
+import random
+import time
+import tracemalloc
+
+from cab_booking.columnar import BookingBatch
+from cab_booking.models import (
+    Booking,
+    BookingStatus,
+    Driver,
+    Location,
+    PaymentReceipt,
+    PaymentStatus,
+    RideRequest,
+    Rider,
+    new_id,
+)
+from cab_booking.money import Money
+
+
+def make_bookings(n: int, seed: int = 3) -> list[Booking]:
+    rng = random.Random(seed)
+    riders = [Rider(f"rider-{i}", f"Rider {i}") for i in range(n // 20 + 1)]
+    drivers = [Driver(f"driver-{i}", f"Driver {i}") for i in range(n // 100 + 1)]
+    out = []
+    for _ in range(n):
+        rider = rng.choice(riders)
+        km = round(rng.uniform(1, 30), 2)
+        fare = Money(int(km * 1000))
+        status = rng.choice((BookingStatus.CONFIRMED, BookingStatus.FAILED))
+        out.append(
+            Booking(
+                booking_id=new_id("bk"),
+                request=RideRequest(
+                    rider=rider,
+                    pickup=Location(12.9 + rng.random() / 10, 77.5 + rng.random() / 10),
+                    drop=Location(12.9 + rng.random() / 10, 77.5 + rng.random() / 10),
+                    distance_km=km,
+                    payment_type="UPI",
+                    payment_details={"upi_id": f"{rider.rider_id}@upi"},
+                ),
+                fare=fare,
+                status=status,
+                driver=rng.choice(drivers),
+                payment=PaymentReceipt(
+                    receipt_id=new_id("rcpt"),
+                    amount=fare,
+                    status=PaymentStatus.SUCCESS
+                    if status == BookingStatus.CONFIRMED
+                    else PaymentStatus.FAILED,
+                    method="UPI",
+                ),
+            )
+        )
+    return out
+
+
+def main(n: int = 200_000) -> None:
+    gc.collect()
+    tracemalloc.start()
+    bookings = make_bookings(n)
+    objects_bytes, _ = tracemalloc.get_traced_memory()
+    batch = BookingBatch.from_bookings(bookings)
+    sample, sample_slice = bookings[123], bookings[10:20]
+    del bookings
+    gc.collect()
+    # Everything still alive now is owned by the batch (ids, interned tables,
+    # details dicts), so this is the true columnar footprint.
+    columnar_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"dataclasses  {objects_bytes / n:7.1f} bytes/booking")
+    print(
+        f"BookingBatch {columnar_bytes / n:7.1f} bytes/booking  "
+        f"({objects_bytes / columnar_bytes:.1f}x smaller)"
+    )
+
+    start = time.perf_counter()
+    confirmed = batch.where_status(BookingStatus.CONFIRMED)
+    long_trips = confirmed.where("distance_km", lambda km: km > 20)
+    elapsed = time.perf_counter() - start
+    revenue = sum(long_trips.fares_minor)
+    print(
+        f"filter 2 predicates over {n:,} rows: {elapsed * 1000:.1f} ms "
+        f"-> {len(long_trips):,} rows, revenue {Money(revenue)}"
+    )
+    assert batch[123] == sample
+    assert batch[10:20].to_bookings() == sample_slice
+
+
+if __name__ == "__main__":
+    main()
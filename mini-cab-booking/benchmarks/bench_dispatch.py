@@ -0,0 +1,68 @@
+"""
+Driver dispatch under churn: allocate / release / offline / re-rate on a
+large fleet, for both dispatch orders.
+
+Run from mini-cab-booking/:  python -m benchmarks.bench_dispatch
+"""
+
+from __future__ import annotations
+
+import random
+import time
+
+from cab_booking import DispatchOrder, DriverAllocator, DriverStatus
+from cab_booking.models import Driver, Location, RideRequest, Rider
+
+REQUEST = RideRequest(
+    rider=Rider("r1", "Asha"),
+    pickup=Location(12.97, 77.59),
+    drop=Location(12.93, 77.62),
+    distance_km=7.4,
+    payment_type="UPI",
+    payment_details={"upi_id": "asha@upi"},
+)
+
+
+def churn(order: DispatchOrder, drivers: int, ops: int, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    fleet = [Driver(f"d{i}", f"Driver {i}") for i in range(drivers)]
+    ratings = {d.driver_id: round(rng.uniform(3.0, 5.0), 2) for d in fleet}
+    allocator = DriverAllocator(fleet, order=order, ratings=ratings)
+    busy: list[str] = []
+    offline: list[str] = []
+
+    start = time.perf_counter()
+    for _ in range(ops):
+        roll = rng.random()
+        if roll < 0.45 or not busy:
+            if allocator.available():
+                busy.append(allocator.allocate(REQUEST).driver_id)
+        elif roll < 0.9:
+            i = rng.randrange(len(busy))
+            busy[i], busy[-1] = busy[-1], busy[i]
+            allocator.release(busy.pop())
+        elif roll < 0.95:
+            driver_id = f"d{rng.randrange(drivers)}"
+            if offline and rng.random() < 0.5:
+                allocator.go_online(offline.pop())
+            elif allocator.status(driver_id) == DriverStatus.AVAILABLE:
+                allocator.go_offline(driver_id)
+                offline.append(driver_id)
+        else:
+            allocator.set_rating(f"d{rng.randrange(drivers)}", round(rng.uniform(3.0, 5.0), 2))
+    elapsed = time.perf_counter() - start
+
+    assert allocator.available() + len(busy) + len(offline) == drivers
+    print(
+        f"{order.value:<10} drivers={drivers:,} ops={ops:,} "
+        f"{elapsed * 1e9 / ops:6.0f} ns/op  busy={len(busy):,} offline={len(offline):,}"
+    )
+
+
+def main() -> None:
+    for order in DispatchOrder:
+        churn(order, drivers=100_000, ops=500_000)
+
+
+if __name__ == "__main__":
+    main()
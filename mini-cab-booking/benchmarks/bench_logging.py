@@ -0,0 +1,102 @@
+"""
+Request-thread cost of LoggedFacade: a synchronous file handler vs
+NonBlockingLogging (bounded queue + background listener), with and without
+sampling, plus how many records a too-small queue drops instead of blocking.
+On a single core the listener thread competes with the booking loop for the
+GIL, so the queue pays off mainly when handlers block on slow I/O; sampling
+and rate limiting cut the cost on any machine.
+
+Run from mini-cab-booking/:  python -m benchmarks.bench_logging
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import time
+
+from cab_booking import (
+    AppConfig,
+    CabBookingFacade,
+    DefaultPaymentFactory,
+    DriverAllocator,
+    InMemoryBookingRepository,
+    KeyValueFormatter,
+    LoggedFacade,
+    LogSampler,
+    NonBlockingLogging,
+    NormalPricing,
+    RideRequestBuilder,
+)
+from cab_booking.models import BookingStatus, Driver
+from cab_booking.services import BookingService
+
+
+def build(n: int) -> CabBookingFacade:
+    drivers = [Driver(f"d{i}", f"Driver {i}") for i in range(n)]
+    return CabBookingFacade(
+        config=AppConfig(),
+        pricing_strategy=NormalPricing(),
+        payment_factory=DefaultPaymentFactory(),
+        booking_service=BookingService(DriverAllocator(drivers), InMemoryBookingRepository()),
+    )
+
+
+def requests(n: int):
+    return [
+        RideRequestBuilder()
+        .rider(f"r{i}", "Rider")
+        .pickup(12.97, 77.59)
+        .drop(12.93, 77.62)
+        .distance_km(8.0)
+        .payment("UPI", upi_id="rider@upi")
+        .build()
+        for i in range(n)
+    ]
+
+
+def run(label: str, n: int, path: str, *, queued: bool, sampler=None, maxsize=100_000) -> None:
+    logger = logging.getLogger(f"bench.{label}")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    target = logging.FileHandler(path)
+    target.setFormatter(KeyValueFormatter())
+    facade = LoggedFacade(build(n), logger, structured=True, sampler=sampler)
+    batch = requests(n)
+
+    if queued:
+        logging_ = NonBlockingLogging(logger, [target], maxsize=maxsize).start()
+    else:
+        logger.addHandler(target)
+    start = time.perf_counter()
+    for request in batch:
+        assert facade.book_ride(request).status == BookingStatus.CONFIRMED
+    elapsed = time.perf_counter() - start
+    dropped = 0
+    if queued:
+        dropped = logging_.stats().dropped
+        logging_.stop()
+    else:
+        logger.removeHandler(target)
+    target.close()
+
+    extra = f"  dropped={dropped:,}" if queued else ""
+    if sampler is not None:
+        extra += f"  sampled_out={sampler.sampled_out:,} rate_limited={sampler.rate_limited:,}"
+    print(f"{label:<22} {elapsed / n * 1e6:7.1f} us/booking{extra}")
+
+
+def main(n: int = 20_000) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.log")
+        run("sync FileHandler", n, path, queued=False)
+        run("non-blocking", n, path, queued=True)
+        run("non-blocking 10% end", n, path, queued=True,
+            sampler=LogSampler({"book_ride_start": 0.0, "book_ride_end": 0.1}))
+        run("non-blocking 1k/s", n, path, queued=True, sampler=LogSampler(rate_limit=1_000))
+        run("queue of 64", n, path, queued=True, maxsize=64)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Cost of booking instrumentation: no metrics vs disabled vs enabled.
+
+Run from mini-cab-booking/:  python -m benchmarks.bench_metrics
+"""
+
+from __future__ import annotations
+
+import time
+
+from cab_booking import (
+    AppConfig,
+    BookingMetrics,
+    CabBookingFacade,
+    DefaultPaymentFactory,
+    DriverAllocator,
+    InstrumentedFacade,
+    NormalPricing,
+    RideRequestBuilder,
+)
+from cab_booking.models import Driver
+from cab_booking.services import BookingService
+
+
+def make(metrics: BookingMetrics | None, drivers: int):
+    # Rides are never completed here, so every booking needs a free driver.
+    fleet = [Driver(f"d{i}", f"Driver {i}") for i in range(drivers)]
+    core = CabBookingFacade(
+        config=AppConfig(),
+        pricing_strategy=NormalPricing(),
+        payment_factory=DefaultPaymentFactory(),
+        booking_service=BookingService(DriverAllocator(fleet)),
+        metrics=metrics,
+    )
+    return core if metrics is None else InstrumentedFacade(core, metrics)
+
+
+def per_booking_ns(facade, request, n: int) -> float:
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter_ns()
+        for _ in range(n):
+            facade.book_ride(request)
+        best = min(best, (time.perf_counter_ns() - start) / n)
+    return best
+
+
+def main(n: int = 20_000) -> None:
+    request = (
+        RideRequestBuilder()
+        .rider("r1", "Asha")
+        .pickup(12.97, 77.59)
+        .drop(12.93, 77.62)
+        .distance_km(7.4)
+        .payment("UPI", upi_id="asha@upi")
+        .build()
+    )
+    enabled = BookingMetrics()
+    variants = (
+        ("no metrics", make(None, 5 * n)),
+        ("disabled", make(BookingMetrics(enabled=False), 5 * n)),
+        ("enabled", make(enabled, 5 * n)),
+    )
+    baseline = None
+    for name, facade in variants:
+        ns = per_booking_ns(facade, request, n)
+        baseline = baseline or ns
+        print(f"{name:<11} {ns:8.0f} ns/booking  overhead={ns - baseline:+6.0f} ns")
+    p99 = enabled.total().quantile(0.99)
+    print(f"enabled p99 book_ride ~{p99 / 1000:.1f} us")
+    for stage in ("pricing", "allocate", "payment_pay"):
+        print(f"  {stage:<12} p50 ~{enabled.stage(stage).quantile(0.5)} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Decimal vs Money on the fare hot path: CPU per fare and memory per amount.
+
+Run from mini-cab-booking/:  python -m benchmarks.bench_money
+"""
+
+from __future__ import annotations
+
+import random
+import time
+import tracemalloc
+from decimal import Decimal, ROUND_HALF_UP
+
+from cab_booking.money import Money
+from cab_booking.pricing import NormalPricing
+
+
+def decimal_fare(distance_km: float, rate: Decimal = Decimal("10")) -> str:
+    # The pre-Money hot path: build, multiply, quantize, stringify.
+    fare = (Decimal(str(distance_km)) * rate).quantize(
+        Decimal("0.01"), rounding=ROUND_HALF_UP
+    )
+    return str(fare)
+
+
+def money_fare(distance_km: float, pricing: NormalPricing = NormalPricing()) -> str:
+    return str(pricing.calculate_fare(distance_km))
+
+
+def cpu(n: int, distances: list[float]) -> None:
+    for name, fn in (("Decimal", decimal_fare), ("Money", money_fare)):
+        start = time.perf_counter()
+        for d in distances:
+            fn(d)
+        elapsed = time.perf_counter() - start
+        print(f"cpu  {name:<8} {elapsed * 1e9 / n:7.1f} ns/fare (price + str)")
+
+
+def memory(n: int, distances: list[float]) -> None:
+    pricing = NormalPricing()
+    builders = (
+        ("Decimal", lambda: [pricing.calculate_fare(d).to_decimal() for d in distances]),
+        ("Money", lambda: [pricing.calculate_fare(d) for d in distances]),
+    )
+    for name, build in builders:
+        tracemalloc.start()
+        values = build()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"mem  {name:<8} {current / len(values):7.1f} bytes/amount (incl. list slot)")
+
+
+def main(n: int = 500_000, seed: int = 11) -> None:
+    rng = random.Random(seed)
+    distances = [rng.uniform(0.5, 40.0) for _ in range(n)]
+    assert all(decimal_fare(d) == money_fare(d) for d in distances[:50_000])
+    cpu(n, distances)
+    memory(n, distances)
+    # Sanity: Money round-trips through the Decimal edge exactly.
+    assert Money.from_decimal(Money(12345).to_decimal()) == Money(12345)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+PaymentFactory.create(): building a method per call vs CachingPaymentFactory
+reusing flyweights, for a rider population with Zipf-like repeat traffic.
+
+Run from mini-cab-booking/:  python -m benchmarks.bench_payment_factory
+"""
+
+from __future__ import annotations
+
+import random
+import time
+
+from cab_booking.payment import (
+    CachingPaymentFactory,
+    DefaultPaymentFactory,
+    PaymentFactory,
+)
+from cab_booking.wallet import WalletLedger
+
+KINDS = ("UPI", "CARD", "WALLET")
+
+
+def workload(
+    calls: int, riders: int, kinds: tuple[str, ...] = KINDS, seed: int = 1
+) -> list[tuple[str, dict]]:
+    rng = random.Random(seed)
+    profiles: list[tuple[str, dict]] = []
+    for i in range(riders):
+        kind = kinds[i % len(kinds)]
+        if kind == "UPI":
+            details = {"upi_id": f"rider{i}@upi"}
+        elif kind == "CARD":
+            details = {"card_last4": f"{i % 10_000:04d}"}
+        else:
+            details = {"wallet_id": f"w{i}"}
+        profiles.append((kind, details))
+    # A few riders book most rides, as in real traffic.
+    weights = [1 / (rank + 1) for rank in range(riders)]
+    return rng.choices(profiles, weights, k=calls)
+
+
+def run(factory: PaymentFactory, calls: list[tuple[str, dict]]) -> float:
+    create = factory.create
+    start = time.perf_counter()
+    for payment_type, details in calls:
+        create(payment_type, details)
+    return (time.perf_counter() - start) * 1e9 / len(calls)
+
+
+def main() -> None:
+    calls = 300_000
+    cases = [(KINDS, 1_000, 10_000), (KINDS, 100_000, 10_000), (KINDS, 100_000, 1_000)]
+    cases += [((kind,), 1_000, 10_000) for kind in KINDS]
+    wallets = WalletLedger()
+    for kinds, riders, maxsize in cases:
+        batch = workload(calls, riders, kinds)
+        plain = run(DefaultPaymentFactory(wallets), batch)
+        cached_factory = CachingPaymentFactory(DefaultPaymentFactory(wallets), maxsize=maxsize)
+        cached = run(cached_factory, batch)
+        stats = cached_factory.stats()
+        print(
+            f"{'/'.join(kinds):<15} riders={riders:>7,} maxsize={maxsize:>6,}  "
+            f"plain {plain:6.0f} ns/call  cached {cached:6.0f} ns/call  "
+            f"hit rate {stats.hit_rate:6.1%}  evictions {stats.evictions:,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Scalar calculate_fare() loop vs the calculate_fares() batch path.
+
+Run from mini-cab-booking/:  python -m benchmarks.bench_pricing
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from array import array
+
+from cab_booking.pricing import NormalPricing, PerKmPricing, SurgePricing
+
+
+def bench(strategy: PerKmPricing, distances: array) -> None:
+    start = time.perf_counter()
+    scalar = [strategy.calculate_fare(d).minor for d in distances]
+    scalar_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = strategy.calculate_fares(distances)
+    batch_s = time.perf_counter() - start
+
+    assert list(batch) == scalar, "batch fares differ from calculate_fare()"
+    n = len(distances)
+    print(
+        f"{type(strategy).__name__:<14} n={n:,} "
+        f"scalar={scalar_s * 1e9 / n:7.1f} ns/fare  "
+        f"batch={batch_s * 1e9 / n:6.1f} ns/fare  "
+        f"speedup={scalar_s / batch_s:5.1f}x"
+    )
+
+
+def main(n: int = 1_000_000, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    # Mix of realistic trip lengths and values sitting exactly on .5 paise ties.
+    distances = array("d", (round(rng.uniform(0.1, 60.0), rng.choice((1, 2, 3, 4))) for _ in range(n)))
+    distances.extend(k / 2000 for k in range(1, 2001))
+    for strategy in (NormalPricing(), SurgePricing()):
+        bench(strategy, distances)
+
+
+if __name__ == "__main__":
+    main()
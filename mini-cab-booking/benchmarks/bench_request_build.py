@@ -0,0 +1,79 @@
+"""
+RideRequest construction: fluent RideRequestBuilder vs
+RideRequest.from_mapping() vs the bulk RideRequest.from_records(), over the
+same decoded JSONL records (repeated riders, as in a real request log).
+
+Run from mini-cab-booking/:  python -m benchmarks.bench_request_build
+"""
+
+from __future__ import annotations
+
+import random
+import time
+
+from cab_booking.builder import RideRequestBuilder
+from cab_booking.models import RideRequest
+
+
+def make_rows(n: int, riders: int) -> list[dict]:
+    rng = random.Random(3)
+    return [
+        {
+            "rider_id": f"r{rng.randrange(riders)}",
+            "rider_name": "Rider",
+            "pickup_lat": 12.9 + rng.random() / 10,
+            "pickup_lng": 77.5 + rng.random() / 10,
+            "drop_lat": 12.9 + rng.random() / 10,
+            "drop_lng": 77.5 + rng.random() / 10,
+            "distance_km": round(rng.uniform(1, 25), 2),
+            "payment_type": "UPI",
+            "payment_details": {"upi_id": "rider@upi"},
+        }
+        for _ in range(n)
+    ]
+
+
+def with_builder(rows: list[dict]) -> list[RideRequest]:
+    return [
+        RideRequestBuilder()
+        .rider(row["rider_id"], row["rider_name"])
+        .pickup(row["pickup_lat"], row["pickup_lng"])
+        .drop(row["drop_lat"], row["drop_lng"])
+        .distance_km(row["distance_km"])
+        .payment(row["payment_type"], **row["payment_details"])
+        .build()
+        for row in rows
+    ]
+
+
+def with_from_mapping(rows: list[dict]) -> list[RideRequest]:
+    riders: dict = {}
+    return [RideRequest.from_mapping(row, riders) for row in rows]
+
+
+def best_ns(fn, rows: list[dict], rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter_ns()
+        fn(rows)
+        best = min(best, (time.perf_counter_ns() - start) / len(rows))
+    return best
+
+
+def main(n: int = 200_000, riders: int = 5_000, rounds: int = 5) -> None:
+    rows = make_rows(n, riders)
+    assert with_builder(rows[:100]) == RideRequest.from_records(rows[:100])
+    base = best_ns(with_builder, rows, rounds)
+    print(f"RideRequestBuilder        {base:7.0f} ns/request")
+    for label, fn in (
+        ("RideRequest.from_mapping", with_from_mapping),
+        ("RideRequest.from_records", RideRequest.from_records),
+    ):
+        ns = best_ns(fn, rows, rounds)
+        print(f"{label:<25} {ns:7.0f} ns/request  ({base / ns:.1f}x)")
+    requests = RideRequest.from_records(rows)
+    print(f"distinct Rider objects: {len({id(r.rider) for r in requests}):,} for {n:,} requests")
+
+
+if __name__ == "__main__":
+    main()
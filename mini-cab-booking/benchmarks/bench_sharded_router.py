@@ -0,0 +1,109 @@
+"""
+Throughput of ShardedBookingRouter as the number of worker processes grows.
+
+Requests are spread over a city-sized grid and routed by pickup cell; every
+shard runs its own CabBookingFacade with a nearest-driver allocator seeded
+with drivers across the whole grid. Rides go through the full lifecycle in
+waves (book, start, complete through the router), so each shard's drivers
+are freed again. Scaling is bounded by the number of CPU cores
+(os.cpu_count() is printed first).
+
+Run from mini-cab-booking/:  python -m benchmarks.bench_sharded_router
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import time
+
+from cab_booking import (
+    AppConfig,
+    CabBookingFacade,
+    DefaultPaymentFactory,
+    InMemoryBookingRepository,
+    NearestDriverAllocator,
+    NormalPricing,
+    RideRequestBuilder,
+)
+from cab_booking.facade import RideBookingFacade
+from cab_booking.models import Booking, BookingStatus, Driver, Location, RideRequest
+from cab_booking.services import BookingService
+from cab_booking.sharding import RideAction, ShardedBookingRouter
+
+LAT, LNG = 12.90, 77.50  # south-west corner of the grid
+SPAN = 0.2  # degrees, ~22 km
+
+
+def build_shard(shard: int) -> RideBookingFacade:
+    rng = random.Random(shard)
+    allocator = NearestDriverAllocator()
+    for i in range(2_000):
+        allocator.add_driver(
+            Driver(f"d{shard}_{i}", f"Driver {i}"),
+            Location(LAT + rng.random() * SPAN, LNG + rng.random() * SPAN),
+        )
+    return CabBookingFacade(
+        config=AppConfig(),
+        pricing_strategy=NormalPricing(),
+        payment_factory=DefaultPaymentFactory(),
+        booking_service=BookingService(allocator, InMemoryBookingRepository()),
+    )
+
+
+def make_requests(n: int) -> list[RideRequest]:
+    rng = random.Random(7)
+    requests = []
+    for i in range(n):
+        requests.append(
+            RideRequestBuilder()
+            .rider(f"r{i % 5_000}", "Rider")
+            .pickup(LAT + rng.random() * SPAN, LNG + rng.random() * SPAN)
+            .drop(LAT + rng.random() * SPAN, LNG + rng.random() * SPAN)
+            .distance_km(round(rng.uniform(1, 25), 2))
+            .payment("UPI", upi_id="rider@upi")
+            .build()
+        )
+    return requests
+
+
+def ride_wave(router: ShardedBookingRouter, requests: list[RideRequest]) -> list[Booking]:
+    futures = [router.submit(request) for request in requests]
+    router.flush()
+    bookings = [future.result() for future in futures]
+    for action in (RideAction.START, RideAction.COMPLETE):
+        futures = [router.submit_transition(booking, action) for booking in bookings]
+        router.flush()
+        bookings = [future.result() for future in futures]
+    return bookings
+
+
+def run(workers: int, requests: list[RideRequest]) -> float:
+    # A wave stays well below the 2,000 drivers of each shard.
+    wave = 500 * workers
+    with ShardedBookingRouter(build_shard, workers, batch_size=512) as router:
+        ride_wave(router, requests[:wave])  # warm up every worker
+        start = time.perf_counter()
+        bookings: list[Booking] = []
+        for i in range(0, len(requests), wave):
+            bookings += ride_wave(router, requests[i : i + wave])
+        elapsed = time.perf_counter() - start
+    assert all(b.status == BookingStatus.COMPLETED for b in bookings)
+    assert len({b.booking_id for b in bookings}) == len(bookings), "duplicate ids"
+    return len(requests) / elapsed
+
+
+def main(n: int = 100_000) -> None:
+    print(f"cpu_count={os.cpu_count()}")
+    requests = make_requests(n)
+    base = None
+    for workers in (1, 2, 4, 8, 16, 32):
+        if workers > 2 * (os.cpu_count() or 1):
+            break
+        rate = run(workers, requests)
+        base = base or rate
+        print(f"workers={workers:<2} {rate:10,.0f} rides/s  scaling={rate / base:4.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+CitySimulator: one simulated day per dispatch mode, then the raw EventQueue
+under a hold model (pop one event, schedule one) with a million-event run.
+
+Run from mini-cab-booking/:  python -m benchmarks.bench_simulation
+"""
+
+from __future__ import annotations
+
+import random
+import time
+
+from cab_booking.simulation import CitySimulator, EventQueue, SimulationConfig
+
+
+def event_queue_rate(events: int, pending: int) -> float:
+    rng = random.Random(1)
+    queue = EventQueue()
+    for _ in range(pending):
+        queue.push(rng.random() * 3600.0, 0)
+    push, pop = queue.push, queue.pop
+    expovariate = rng.expovariate
+    start = time.perf_counter()
+    for _ in range(events):
+        now = pop()[0]
+        push(now + expovariate(1 / 600.0), 0)
+    return events / (time.perf_counter() - start)
+
+
+def main() -> None:
+    for nearest in (True, False):
+        config = SimulationConfig(seed=1, nearest_dispatch=nearest)
+        print(f"--- nearest_dispatch={nearest}")
+        print(CitySimulator(config).run().summary())
+    for pending in (1_000, 100_000, 1_000_000):
+        rate = event_queue_rate(2_000_000, pending)
+        print(f"EventQueue hold model, {pending:>9,} pending: {rate:12,.0f} events/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Hammer CabBookingFacade.book_ride from N threads.
+
+Every worker books, starts and completes rides. The check is that the
+allocator never hands a busy driver to a second, overlapping ride and that
+no booking is lost, while another thread keeps swapping the pricing
+strategy. Throughput is reported per thread count. On a GIL build it stays
+roughly flat; on free-threaded CPython 4 threads must reach at least 2x the
+single-thread rate. The same invariants run under pytest in
+tests/test_concurrency.py.
+
+Run from mini-cab-booking/:  python -m benchmarks.stress_book_ride
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import Counter
+
+from cab_booking import (
+    AppConfig,
+    CabBookingFacade,
+    DefaultPaymentFactory,
+    DriverAllocator,
+    NormalPricing,
+    RideRequestBuilder,
+    SurgePricing,
+)
+from cab_booking.models import Driver
+from cab_booking.observer import Event, Observer
+from cab_booking.services import BookingService
+
+
+class DriverTally(Observer):
+    def __init__(self) -> None:
+        self.counts: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def on_event(self, event: Event) -> None:
+        with self._lock:
+            self.counts[event.payload["driver_id"]] += 1
+
+
+class RideOwners:
+    """
+    driver_id -> booking currently holding it, maintained by the workers.
+
+    A driver is claimed right after booking and unclaimed right before the
+    ride is completed, so a claim that finds an owner is a real overlap.
+    """
+
+    def __init__(self) -> None:
+        self._owners: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def claim(self, driver_id: str, booking_id: str) -> None:
+        with self._lock:
+            other = self._owners.setdefault(driver_id, booking_id)
+        assert other == booking_id, f"{driver_id} double-assigned: {other}, {booking_id}"
+
+    def unclaim(self, driver_id: str) -> None:
+        with self._lock:
+            del self._owners[driver_id]
+
+
+def run(threads: int, per_thread: int, drivers: int) -> float:
+    facade = CabBookingFacade(
+        config=AppConfig(),
+        pricing_strategy=NormalPricing(),
+        payment_factory=DefaultPaymentFactory(),
+        booking_service=BookingService(
+            DriverAllocator([Driver(f"d{i}", f"Driver {i}") for i in range(drivers)])
+        ),
+    )
+    tally = DriverTally()
+    owners = RideOwners()
+    facade.event_bus.subscribe("DRIVER_ASSIGNED", tally)
+    request = (
+        RideRequestBuilder()
+        .rider("r1", "Asha")
+        .pickup(12.97, 77.59)
+        .drop(12.93, 77.62)
+        .distance_km(7.4)
+        .payment("UPI", upi_id="asha@upi")
+        .build()
+    )
+
+    stop = threading.Event()
+
+    def swapper() -> None:
+        strategies = (NormalPricing(), SurgePricing())
+        i = 0
+        while not stop.is_set():
+            facade.set_pricing_strategy(strategies[i % 2])
+            i += 1
+            time.sleep(0.001)
+
+    def worker() -> None:
+        for _ in range(per_thread):
+            booking = facade.book_ride(request)
+            driver_id = booking.driver.driver_id
+            owners.claim(driver_id, booking.booking_id)
+            booking = facade.start_ride(booking)
+            owners.unclaim(driver_id)
+            facade.complete_ride(booking)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    swap = threading.Thread(target=swapper)
+    swap.start()
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    swap.join()
+
+    total = threads * per_thread
+    assert sum(tally.counts.values()) == total, "lost bookings"
+    assert len(tally.counts) == drivers, "idle drivers were never dispatched"
+    return total / elapsed
+
+
+def check_singleton(threads: int = 32) -> None:
+    AppConfig._instance = None
+    seen: list[AppConfig] = []
+    barrier = threading.Barrier(threads)
+
+    def make() -> None:
+        barrier.wait()
+        seen.append(AppConfig())
+
+    pool = [threading.Thread(target=make) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    assert len({id(c) for c in seen}) == 1, "AppConfig created more than once"
+
+
+def main(per_thread: int = 20_000, drivers: int = 50) -> None:
+    check_singleton()
+    free_threaded = not getattr(sys, "_is_gil_enabled", lambda: True)()
+    base = None
+    for threads in (1, 2, 4, 8):
+        rate = run(threads, per_thread, drivers)
+        base = base or rate
+        print(f"threads={threads:<2} {rate:10,.0f} bookings/s  scaling={rate / base:4.2f}x")
+        if free_threaded and threads == 4:
+            assert rate >= 2 * base, "booking does not scale without the GIL"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Hammer WalletLedger from N threads: debits (mostly against a few hot
+wallets, so they contend and get batched), credits, and holds that are
+captured or released.
+
+Every worker tallies what it successfully applied; afterwards each wallet's
+balance must equal its opening balance plus credits minus debits and
+captures, to the paisa, no balance may be negative, no hold may be left
+open, and a ledger recovered from the snapshot + log must match. Debit
+throughput is reported per thread count.
+
+Run from mini-cab-booking/:  python -m benchmarks.stress_wallet_ledger
+"""
+
+from __future__ import annotations
+
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from cab_booking.money import Money
+from cab_booking.wallet import WalletLedger
+
+OPENING = 5_000_00  # minor units per wallet
+HOT = 4
+
+
+def run(threads: int, per_thread: int, wallets: int, directory: str) -> float:
+    ledger = WalletLedger.open(directory, snapshot_every=50_000, fsync=False)
+    ids = [f"w{i}" for i in range(wallets)]
+    for wallet_id in ids:
+        ledger.open_wallet(wallet_id, Money(OPENING))
+    deltas: list[Counter[str]] = []
+    debits = [0] * threads
+    barrier = threading.Barrier(threads)
+
+    def worker(n: int) -> None:
+        rng = random.Random(n)
+        delta: Counter[str] = Counter()
+        deltas.append(delta)
+        barrier.wait()
+        for _ in range(per_thread):
+            # Half of all traffic goes to the few hot wallets.
+            wallet_id = ids[rng.randrange(HOT)] if rng.random() < 0.5 else rng.choice(ids)
+            amount = Money(rng.randint(1, 500_00))
+            roll = rng.random()
+            try:
+                if roll < 0.80:
+                    ledger.debit(wallet_id, amount)
+                    delta[wallet_id] -= amount.minor
+                    debits[n] += 1
+                elif roll < 0.95:
+                    ledger.credit(wallet_id, amount)
+                    delta[wallet_id] += amount.minor
+                else:
+                    hold = ledger.hold(wallet_id, amount)
+                    if rng.random() < 0.5:
+                        captured = Money(rng.randint(0, amount.minor))
+                        ledger.capture(hold, captured)
+                        delta[wallet_id] -= captured.minor
+                    else:
+                        ledger.release(hold)
+            except ValueError:
+                pass  # insufficient funds: nothing applied
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    expected: Counter[str] = Counter()
+    for delta in deltas:
+        expected.update(delta)
+    balances = {}
+    for wallet_id in ids:
+        balance = ledger.balance(wallet_id).minor
+        assert balance == OPENING + expected[wallet_id], f"{wallet_id} is off"
+        assert balance >= 0, f"{wallet_id} overdrawn"
+        assert ledger.available(wallet_id).minor == balance, f"{wallet_id} has open holds"
+        balances[wallet_id] = balance
+    ledger.close()
+
+    recovered = WalletLedger.open(directory, fsync=False)
+    assert all(recovered.balance(w).minor == b for w, b in balances.items()), "recovery"
+    recovered.close()
+    return sum(debits) / elapsed
+
+
+def main(per_thread: int = 50_000, wallets: int = 1_000) -> None:
+    base = None
+    for threads in (1, 2, 4, 8):
+        with tempfile.TemporaryDirectory() as directory:
+            rate = run(threads, per_thread, wallets, directory)
+        base = base or rate
+        print(f"threads={threads:<2} {rate:10,.0f} debits/s  scaling={rate / base:4.2f}x")
+
+
+if __name__ == "__main__":
+    main()
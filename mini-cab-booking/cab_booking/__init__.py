@@ -8,30 +8,90 @@ Patterns used:
 - Builder (RideRequestBuilder)
 - Observer (EventBus + observers)
 - Facade (CabBookingFacade)
-- Proxy/Decorator style wrappers (LoggedFacade / AuthenticatedFacade)
+- Proxy/Decorator style wrappers (LoggedFacade / AuthenticatedFacade /
+  InstrumentedFacade)
 """
 
+from .aio import AsyncCabBookingFacade
+from .auth import SignedTokenAuthService
 from .config import AppConfig
+from .dispatch import DispatchOrder
 from .builder import RideRequestBuilder
+from .columnar import BookingBatch
 from .facade import (
     AuthenticatedFacade,
     CabBookingFacade,
+    InstrumentedFacade,
     LoggedFacade,
 )
-from .observer import EventBus
-from .payment import DefaultPaymentFactory, PaymentMethodType
+from .journal import BookingJournal, recover
+from .logs import JsonFormatter, KeyValueFormatter, LogSampler, NonBlockingLogging
+from .matching import BatchMatcher
+from .metrics import BookingMetrics
+from .models import BookingResult, BookingStatus, DriverStatus
+from .money import Money
+from .observer import EventBus, OverflowPolicy, QueuedEventBus
+from .payment import (
+    CachingPaymentFactory,
+    DefaultPaymentFactory,
+    PaymentMethodType,
+)
+from .pipeline import run_pipeline
 from .pricing import NormalPricing, SurgePricing
+from .repository import (
+    BookingRepository,
+    InMemoryBookingRepository,
+    SqliteBookingRepository,
+)
+from .services import DriverAllocator, NearestDriverAllocator
+from .simulation import CitySimulator, SimulationConfig
+from .surge import DynamicSurgePricing
+from .sharding import RideAction, ShardedBookingRouter, ShardKey
+from .wallet import WalletLedger
 
 __all__ = [
     "AppConfig",
+    "AsyncCabBookingFacade",
     "AuthenticatedFacade",
+    "BatchMatcher",
+    "BookingBatch",
+    "BookingJournal",
+    "BookingMetrics",
+    "BookingRepository",
+    "BookingResult",
+    "BookingStatus",
     "CabBookingFacade",
+    "CachingPaymentFactory",
+    "CitySimulator",
     "DefaultPaymentFactory",
+    "DispatchOrder",
+    "DriverAllocator",
+    "DriverStatus",
+    "DynamicSurgePricing",
     "EventBus",
+    "InMemoryBookingRepository",
+    "InstrumentedFacade",
+    "JsonFormatter",
+    "KeyValueFormatter",
+    "LogSampler",
     "LoggedFacade",
+    "Money",
+    "NearestDriverAllocator",
+    "NonBlockingLogging",
     "NormalPricing",
+    "OverflowPolicy",
     "PaymentMethodType",
+    "QueuedEventBus",
+    "RideAction",
     "RideRequestBuilder",
+    "ShardKey",
+    "SignedTokenAuthService",
+    "ShardedBookingRouter",
+    "SimulationConfig",
+    "SqliteBookingRepository",
     "SurgePricing",
+    "WalletLedger",
+    "recover",
+    "run_pipeline",
 ]
 
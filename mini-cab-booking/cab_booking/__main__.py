@@ -0,0 +1,121 @@
+"""
+Replay a JSONL stream of ride requests through CabBookingFacade.
+
+    python -m cab_booking requests.jsonl -o bookings.jsonl
+    cat requests.jsonl | python -m cab_booking --parallel > bookings.jsonl
+
+One request per line, e.g.
+    {"rider_id": "r1", "rider_name": "Asha", "pickup_lat": 12.97,
+     "pickup_lng": 77.59, "drop_lat": 12.93, "drop_lng": 77.62,
+     "distance_km": 8.5, "payment_type": "UPI",
+     "payment_details": {"upi_id": "asha@upi"}}
+
+Each input line yields one output line: the booking, or {"line": n,
+"error": "..."}. Throughput and latency stats go to stderr.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from contextlib import ExitStack
+
+from .config import AppConfig
+from .facade import CabBookingFacade
+from .models import Driver
+from .payment import CachingPaymentFactory, DefaultPaymentFactory
+from .pipeline import run_pipeline
+from .pricing import NormalPricing, SurgePricing
+from .repository import BookingRepository, SqliteBookingRepository
+from .services import BookingService, DriverAllocator
+from .wallet import WalletLedger
+
+
+def build_facade(
+    drivers: int,
+    surge: bool = False,
+    repository: BookingRepository | None = None,
+    wallets: WalletLedger | None = None,
+) -> CabBookingFacade:
+    """
+    Wallet payments debit `wallets` (default: a fresh, empty ledger, so
+    they fail); client-supplied balances are never trusted.
+    """
+    fleet = [Driver(f"d{i}", f"Driver {i}") for i in range(drivers)]
+    payments = DefaultPaymentFactory(wallets if wallets is not None else WalletLedger())
+    return CabBookingFacade(
+        config=AppConfig(),
+        pricing_strategy=SurgePricing() if surge else NormalPricing(),
+        # Replays are full of repeat riders: reuse their payment methods.
+        payment_factory=CachingPaymentFactory(payments),
+        booking_service=BookingService(DriverAllocator(fleet), repository),
+    )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m cab_booking",
+        description="Stream JSONL ride requests through the booking facade.",
+    )
+    parser.add_argument("input", nargs="?", default="-", help="JSONL file (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="bookings JSONL (default: stdout)")
+    parser.add_argument("--stats-only", action="store_true", help="do not write bookings")
+    parser.add_argument("--drivers", type=int, default=1_000, help="fleet size")
+    parser.add_argument("--surge", action="store_true", help="use SurgePricing")
+    parser.add_argument(
+        "--hold-drivers",
+        action="store_true",
+        help="keep drivers assigned (default: finish each ride at once)",
+    )
+    parser.add_argument("--db", help="also store bookings in this SQLite file")
+    parser.add_argument("--wallets", help="wallet ledger directory for WALLET payments")
+    parser.add_argument("--chunk-size", type=int, default=512)
+    parser.add_argument(
+        "--parallel", action="store_true", help="parse/book/serialize on separate threads"
+    )
+    parser.add_argument("--queue-depth", type=int, default=4, help="chunks buffered per stage")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    with ExitStack() as stack:
+        source = (
+            sys.stdin
+            if args.input == "-"
+            else stack.enter_context(open(args.input, encoding="utf-8"))
+        )
+        out = None
+        if not args.stats_only:
+            out = (
+                sys.stdout
+                if args.output == "-"
+                else stack.enter_context(open(args.output, "w", encoding="utf-8"))
+            )
+        repository = None
+        if args.db:
+            repository = stack.enter_context(SqliteBookingRepository(args.db))
+        wallets = None
+        if args.wallets:
+            wallets = stack.enter_context(WalletLedger.open(args.wallets))
+        try:
+            stats = run_pipeline(
+                build_facade(args.drivers, args.surge, repository, wallets),
+                source,
+                out,
+                chunk_size=args.chunk_size,
+                parallel=args.parallel,
+                queue_depth=args.queue_depth,
+                finish_rides=not args.hold_drivers,
+            )
+        except BrokenPipeError:
+            # Reader went away (e.g. `| head`): silence the final stdout flush.
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return 1
+    print(stats.summary(), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+import asyncio
+import random
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, replace
+from typing import Any, Awaitable, Iterable, Mapping, TypeVar
+
+from .config import AppConfig
+from .models import (
+    Booking,
+    BookingResult,
+    BookingStatus,
+    PaymentReceipt,
+    PaymentStatus,
+    RideRequest,
+)
+from .money import Money
+from .observer import EventBus
+from .payment import PaymentFactory, PaymentMethod
+from .pricing import PricingStrategy
+from .repository import BookingRepository
+from .services import AuthService, BookingService
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True, slots=True)
+class StageTimeouts:
+    """
+    Per-stage timeouts in seconds (None = wait forever).
+
+    Only stages that actually await I/O can time out; pricing and driver
+    allocation are in-process and run to completion. The auth timeout lives on
+    AsyncAuthenticatedFacade, which owns that stage.
+    """
+
+    payment_setup: float | None = None
+    payment: float | None = None
+
+
+class AsyncPaymentMethod(ABC):
+    """
+    Async counterpart of PaymentMethod: paying awaits the gateway instead of
+    blocking the worker.
+    """
+
+    @abstractmethod
+    async def pay(self, amount: Money) -> PaymentReceipt:
+        raise NotImplementedError
+
+    @property
+    @abstractmethod
+    def method_name(self) -> str:
+        raise NotImplementedError
+
+
+class AsyncPaymentFactory(ABC):
+    """
+    Async Abstract Factory: produces AsyncPaymentMethod objects.
+    """
+
+    @abstractmethod
+    async def create(
+        self, payment_type: str, details: Mapping[str, Any]
+    ) -> AsyncPaymentMethod:
+        raise NotImplementedError
+
+
+class FakePaymentGateway:
+    """
+    Local stand-in for a remote payment gateway with injectable latency.
+
+    Each charge sleeps for `latency` (+ up to `jitter`) seconds and then
+    settles with the wrapped synchronous PaymentMethod, so throughput under
+    I/O wait can be measured without a network.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        seed: int | None = None,
+    ) -> None:
+        if latency < 0 or jitter < 0:
+            raise ValueError("latency and jitter must be >= 0")
+        self._latency = latency
+        self._jitter = jitter
+        self._rng = random.Random(seed)
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def charge(self, method: PaymentMethod, amount: Money) -> PaymentReceipt:
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            delay = self._latency
+            if self._jitter:
+                delay += self._rng.uniform(0.0, self._jitter)
+            await asyncio.sleep(delay)
+            return method.pay(amount)
+        finally:
+            self.in_flight -= 1
+
+
+@dataclass(frozen=True, slots=True)
+class GatewayPayment(AsyncPaymentMethod):
+    method: PaymentMethod
+    gateway: FakePaymentGateway
+
+    @property
+    def method_name(self) -> str:
+        return self.method.method_name
+
+    async def pay(self, amount: Money) -> PaymentReceipt:
+        return await self.gateway.charge(self.method, amount)
+
+
+class GatewayPaymentFactory(AsyncPaymentFactory):
+    """
+    Adapts a synchronous PaymentFactory so every payment goes through a gateway.
+    """
+
+    def __init__(self, factory: PaymentFactory, gateway: FakePaymentGateway) -> None:
+        self._factory = factory
+        self._gateway = gateway
+
+    async def create(
+        self, payment_type: str, details: Mapping[str, Any]
+    ) -> AsyncPaymentMethod:
+        return GatewayPayment(
+            method=self._factory.create(payment_type, details), gateway=self._gateway
+        )
+
+
+class AsyncAuthService(ABC):
+    @abstractmethod
+    async def is_authenticated(self, token: str | None) -> bool:
+        raise NotImplementedError
+
+
+class LocalAsyncAuthService(AsyncAuthService):
+    """
+    Async adapter over AuthService with optional simulated lookup latency.
+    """
+
+    def __init__(self, auth_service: AuthService, latency: float = 0.0) -> None:
+        self._auth = auth_service
+        self._latency = latency
+
+    async def is_authenticated(self, token: str | None) -> bool:
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        return self._auth.is_authenticated(token)
+
+
+class AsyncRideBookingFacade(ABC):
+    """
+    Async facade interface (mirrors RideBookingFacade).
+    """
+
+    @abstractmethod
+    async def book_ride(self, request: RideRequest) -> Booking:
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_pricing_strategy(self, strategy: PricingStrategy) -> None:
+        raise NotImplementedError
+
+    async def book_rides(self, requests: Iterable[RideRequest]) -> list[BookingResult]:
+        """
+        Book many rides concurrently; results keep the input order.
+        """
+        batch = list(requests)
+        outcomes = await asyncio.gather(
+            *(self.book_ride(request) for request in batch), return_exceptions=True
+        )
+        results: list[BookingResult] = []
+        for request, outcome in zip(batch, outcomes):
+            if isinstance(outcome, Exception):
+                results.append(BookingResult(request=request, error=outcome))
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                results.append(BookingResult(request=request, booking=outcome))
+        return results
+
+
+class AsyncCabBookingFacade(AsyncRideBookingFacade):
+    """
+    Asyncio-native Facade: same orchestration as CabBookingFacade, but payment
+    awaits the gateway so one event loop can keep many bookings in flight.
+
+    `max_concurrency` caps bookings in flight; callers beyond it wait.
+    """
+
+    def __init__(
+        self,
+        *,
+        config: AppConfig,
+        pricing_strategy: PricingStrategy,
+        payment_factory: AsyncPaymentFactory,
+        booking_service: BookingService,
+        event_bus: EventBus | None = None,
+        max_concurrency: int = 1000,
+        timeouts: StageTimeouts | None = None,
+    ) -> None:
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be > 0")
+        self._config = config
+        self._pricing_strategy = pricing_strategy
+        self._payment_factory = payment_factory
+        self._booking_service = booking_service
+        self._event_bus = event_bus or EventBus()
+        self._limit = asyncio.Semaphore(max_concurrency)
+        self._timeouts = timeouts or StageTimeouts()
+
+    def set_pricing_strategy(self, strategy: PricingStrategy) -> None:
+        self._pricing_strategy = strategy
+        self._event_bus.publish_lazy(
+            "PRICING_STRATEGY_CHANGED",
+            lambda: {"strategy": type(strategy).__name__},
+        )
+
+    async def book_ride(self, request: RideRequest) -> Booking:
+        async with self._limit:
+            return await self._book(request)
+
+    async def _book(self, request: RideRequest) -> Booking:
+        self._event_bus.publish_lazy(
+            "RIDE_REQUESTED",
+            lambda: {
+                "rider_id": request.rider.rider_id,
+                "lat": request.pickup.lat,
+                "lng": request.pickup.lng,
+            },
+        )
+        fare = self._pricing_strategy.quote(request)
+        self._event_bus.publish_lazy(
+            "FARE_CALCULATED",
+            lambda: {"distance_km": request.distance_km, "fare": str(fare)},
+        )
+
+        booking = self._booking_service.create_booking(request=request, fare=fare)
+        self._event_bus.publish_lazy(
+            "DRIVER_ASSIGNED",
+            lambda: {
+                "booking_id": booking.booking_id,
+                "driver_id": booking.driver.driver_id if booking.driver else None,
+            },
+        )
+
+        # Any error or cancellation below still fails the booking and frees
+        # the driver before propagating.
+        try:
+            payment_method = await _with_timeout(
+                self._payment_factory.create(
+                    request.payment_type, request.payment_details
+                ),
+                self._timeouts.payment_setup,
+            )
+        except BaseException:
+            self._fail(replace(booking, status=BookingStatus.FAILED), "payment_error")
+            raise
+        try:
+            receipt = await _with_timeout(
+                payment_method.pay(fare), self._timeouts.payment
+            )
+        except TimeoutError:
+            booking = replace(booking, status=BookingStatus.FAILED)
+            self._fail(booking, "payment_timeout")
+            return booking
+        except BaseException:
+            self._fail(replace(booking, status=BookingStatus.FAILED), "payment_error")
+            raise
+
+        self._event_bus.publish_lazy(
+            "PAYMENT_PROCESSED",
+            lambda: {
+                "booking_id": booking.booking_id,
+                "method": receipt.method,
+                "status": receipt.status.value,
+            },
+        )
+
+        if receipt.status == PaymentStatus.SUCCESS:
+            booking = replace(booking, payment=receipt, status=BookingStatus.CONFIRMED)
+            self._booking_service.update(booking)
+            self._event_bus.publish_lazy(
+                "BOOKING_CONFIRMED",
+                lambda: {
+                    "booking_id": booking.booking_id,
+                    "fare": f"{self._config.currency_symbol}{fare}",
+                    "app": self._config.app_name,
+                },
+            )
+            return booking
+
+        booking = replace(booking, payment=receipt, status=BookingStatus.FAILED)
+        self._fail(booking, "payment_failed")
+        return booking
+
+    def _fail(self, booking: Booking, reason: str) -> None:
+        self._booking_service.update(booking)
+        self._booking_service.release_driver(booking)
+        self._event_bus.publish_lazy(
+            "BOOKING_FAILED",
+            lambda: {"booking_id": booking.booking_id, "reason": reason},
+        )
+
+    @property
+    def event_bus(self) -> EventBus:
+        return self._event_bus
+
+    @property
+    def bookings(self) -> BookingRepository | None:
+        return self._booking_service.repository
+
+
+class AsyncAuthenticatedFacade(AsyncRideBookingFacade):
+    """
+    Proxy wrapper: adds (async) authentication without modifying core book_ride().
+    """
+
+    def __init__(
+        self,
+        inner: AsyncRideBookingFacade,
+        auth_service: AsyncAuthService,
+        timeout: float | None = None,
+    ) -> None:
+        self._inner = inner
+        self._auth = auth_service
+        self._timeout = timeout
+
+    def set_pricing_strategy(self, strategy: PricingStrategy) -> None:
+        self._inner.set_pricing_strategy(strategy)
+
+    async def book_ride(self, request: RideRequest) -> Booking:
+        allowed = await _with_timeout(
+            self._auth.is_authenticated(request.auth_token), self._timeout
+        )
+        if not allowed:
+            raise PermissionError("Access denied: invalid or missing auth token")
+        return await self._inner.book_ride(request)
+
+
+async def _with_timeout(awaitable: Awaitable[T], timeout: float | None) -> T:
+    if timeout is None:
+        return await awaitable
+    return await asyncio.wait_for(awaitable, timeout)
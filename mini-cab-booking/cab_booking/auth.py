@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import heapq
+import hmac
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from .services import AuthService
+
+_VERSION = "v1"
+_SEP = "\x1f"  # unit separator: cannot appear in a sane subject id
+
+
+@dataclass(frozen=True, slots=True)
+class AuthCacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+
+
+class SignedTokenAuthService(AuthService):
+    """
+    Stateless HMAC-SHA256 tokens ("v1.<payload>.<signature>", base64url)
+    carrying a subject and an expiry, with a cache of verified tokens.
+
+    - Hit path: one dict lookup and one clock read, no lock and no HMAC.
+    - A cached entry lives until the token expires or `cache_ttl` passes,
+      whichever is first; the cache holds at most `cache_size` tokens and
+      evicts the oldest verified first (insertion order, so hits never
+      reorder anything).
+    - revoke() drops a token from the cache and denies it until it expires.
+      Revocations are kept in a min-heap by expiry and pruned as they
+      expire, so the deny list only ever holds still-valid tokens.
+
+    Hit/miss counters are plain attributes: exact on a single thread,
+    approximate under heavy concurrency.
+    """
+
+    def __init__(
+        self,
+        secret: bytes,
+        *,
+        cache_size: int = 100_000,
+        cache_ttl: float = 60.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if len(secret) < 16:
+            raise ValueError("secret must be at least 16 bytes")
+        if cache_size <= 0 or cache_ttl <= 0:
+            raise ValueError("cache_size and cache_ttl must be > 0")
+        super().__init__()
+        self._secret = secret
+        self._cache_size = cache_size
+        self._cache_ttl = cache_ttl
+        self._clock = clock
+        self._cache: dict[str, float] = {}  # token -> deadline
+        self._revoked: dict[str, int] = {}  # token -> its expiry
+        self._revoked_by_expiry: list[tuple[int, str]] = []  # heap
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def issue(self, subject: str, ttl: float = 3600.0) -> str:
+        if _SEP in subject:
+            raise ValueError("subject must not contain a unit separator")
+        expires_at = int(self._clock() + ttl)
+        payload = _b64(f"{subject}{_SEP}{expires_at}".encode())
+        return f"{_VERSION}.{payload}.{self._sign(payload)}"
+
+    def is_authenticated(self, token: str | None) -> bool:
+        if token is None:
+            return False
+        deadline = self._cache.get(token)
+        if deadline is not None and self._clock() < deadline:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return self._verify_and_cache(token) is not None
+
+    def subject(self, token: str) -> str | None:
+        """
+        Verify a token (bypassing the cache) and return its subject.
+        """
+        verified = self._verify(token, self._clock())
+        return None if verified is None else verified[0]
+
+    def revoke(self, token: str) -> None:
+        now = self._clock()
+        verified = self._verify(token, now)
+        with self._lock:
+            self._cache.pop(token, None)
+            revoked, heap = self._revoked, self._revoked_by_expiry
+            # Expired tokens fail verification anyway: forget them.
+            while heap and heap[0][0] <= now:
+                del revoked[heapq.heappop(heap)[1]]
+            if verified is not None and token not in revoked:
+                revoked[token] = verified[1]
+                heapq.heappush(heap, (verified[1], token))
+
+    def stats(self) -> AuthCacheStats:
+        return AuthCacheStats(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            size=len(self._cache),
+        )
+
+    def _verify_and_cache(self, token: str) -> str | None:
+        now = self._clock()
+        verified = self._verify(token, now)
+        if verified is None:
+            return None
+        subject, expires_at = verified
+        with self._lock:
+            # Checked under the lock so a concurrent revoke() cannot be undone.
+            if token in self._revoked:
+                return None
+            cache = self._cache
+            cache.pop(token, None)
+            while len(cache) >= self._cache_size:
+                del cache[next(iter(cache))]
+                self.evictions += 1
+            cache[token] = min(expires_at, now + self._cache_ttl)
+        return subject
+
+    def _verify(self, token: str, now: float) -> tuple[str, int] | None:
+        # Real tokens are base64url; anything else is malformed, and
+        # compare_digest() would raise on non-ASCII str input.
+        if not token.isascii():
+            return None
+        parts = token.split(".")
+        if len(parts) != 3 or parts[0] != _VERSION:
+            return None
+        _, payload, signature = parts
+        if not hmac.compare_digest(self._sign(payload), signature):
+            return None
+        try:
+            subject, expires = _unb64(payload).decode().split(_SEP)
+            expires_at = int(expires)
+        except ValueError:
+            return None
+        if expires_at <= now:
+            return None
+        return subject, expires_at
+
+    def _sign(self, payload: str) -> str:
+        return _b64(hmac.new(self._secret, payload.encode(), hashlib.sha256).digest())
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
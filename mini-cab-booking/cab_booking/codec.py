@@ -0,0 +1,475 @@
+from __future__ import annotations
+
+import struct
+from enum import IntEnum
+from typing import Any, Iterable, Union
+
+from .models import (
+    Booking,
+    BookingStatus,
+    Driver,
+    Location,
+    PaymentReceipt,
+    PaymentStatus,
+    RideRequest,
+    Rider,
+)
+from .money import Money
+from .observer import Event
+
+VERSION = 1
+
+Record = Union[Booking, RideRequest, PaymentReceipt, Event]
+
+_BOOKING_STATUS = {status.value: status for status in BookingStatus}
+_PAYMENT_STATUS = {status.value: status for status in PaymentStatus}
+
+_DOUBLE = struct.Struct("<d")
+_COORDS = struct.Struct("<5d")  # pickup lat/lng, drop lat/lng, distance_km
+
+
+class RecordType(IntEnum):
+    RIDE_REQUEST = 1
+    BOOKING = 2
+    PAYMENT_RECEIPT = 3
+    EVENT = 4
+
+
+# String table layouts: NUL-joined blob, or length-prefixed strings (used
+# only when some string itself contains a NUL).
+_TABLE_JOINED, _TABLE_PREFIXED = 0, 1
+
+# Tags of the self-describing values in payment_details / Event.payload.
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _STR, _LIST, _DICT, _MONEY, _BYTES = range(10)
+
+
+def encode(record: Record, *, include_tokens: bool = True) -> bytes:
+    return encode_many((record,), include_tokens=include_tokens)
+
+
+def decode(data: bytes | bytearray | memoryview) -> Record:
+    records = decode_many(data)
+    if len(records) != 1:
+        raise ValueError(f"Expected 1 record, found {len(records)}")
+    return records[0]
+
+
+def encode_many(records: Iterable[Record], *, include_tokens: bool = True) -> bytes:
+    """
+    Encode a batch (any mix of record types) as one frame:
+
+        version u8 | record count | string table | records
+
+    Integers are LEB128 varints (signed ones zigzagged), floats are float64,
+    and every string is a varint index into the frame's string table, so
+    ids, names, currencies and statuses repeated across the batch are
+    stored (and decoded) once.
+
+    With include_tokens=False every RideRequest.auth_token is written as
+    None; use it for anything that is persisted.
+    """
+    writer = _Writer(include_tokens)
+    count = 0
+    for record in records:
+        writer.record(record)
+        count += 1
+    header = bytearray((VERSION,))
+    _put_varint(header, count)
+    strings = writer.strings
+    _put_varint(header, len(strings))
+    joined = "\0".join(strings)
+    if joined.count("\0") == len(strings) - 1 or not strings:
+        # One NUL-separated blob: decoded with one decode() + split().
+        raw = joined.encode()
+        header.append(_TABLE_JOINED)
+        _put_varint(header, len(raw))
+        header += raw
+    else:
+        header.append(_TABLE_PREFIXED)
+        for text in strings:
+            raw = text.encode()
+            _put_varint(header, len(raw))
+            header += raw
+    header += writer.out
+    return bytes(header)
+
+
+def decode_many(data: bytes | bytearray | memoryview) -> list[Record]:
+    """
+    Decode a frame written by encode_many().
+
+    Works directly on the buffer (e.g. a memoryview into an mmap-ed
+    journal): fixed-width fields are read with struct.unpack_from and only
+    the string table is materialised, once per distinct string.
+    """
+    view = memoryview(data)
+    if view.format != "B":
+        view = view.cast("B")
+    return _Reader(view).frame()
+
+
+def frame_count(data: bytes | bytearray | memoryview) -> int:
+    """
+    Number of records in a frame, read from its header without decoding them.
+    """
+    view = memoryview(data)
+    if view.format != "B":
+        view = view.cast("B")
+    if not len(view):
+        raise ValueError("Empty frame")
+    if view[0] != VERSION:
+        raise ValueError(f"Unsupported codec version {view[0]}")
+    reader = _Reader(view)
+    reader.pos = 1
+    try:
+        return reader.varint()
+    except IndexError as exc:
+        raise ValueError("Truncated or corrupt frame") from exc
+
+
+# --- encoding ---
+
+
+def _put_varint(out: bytearray, n: int) -> None:
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+class _Writer:
+    __slots__ = ("out", "index", "strings", "include_tokens")
+
+    def __init__(self, include_tokens: bool = True) -> None:
+        self.include_tokens = include_tokens
+        self.out = bytearray()
+        self.index: dict[str, int] = {}
+        self.strings: list[str] = []
+
+    def record(self, record: Record) -> None:
+        # Exact type checks: cheaper than isinstance chains and all four
+        # record types are final dataclasses.
+        kind = type(record)
+        if kind is Booking:
+            self.out.append(RecordType.BOOKING)
+            self.booking(record)
+        elif kind is Event:
+            self.out.append(RecordType.EVENT)
+            self.string(record.event_type)
+            self.value(record.payload)
+        elif kind is RideRequest:
+            self.out.append(RecordType.RIDE_REQUEST)
+            self.request(record)
+        elif kind is PaymentReceipt:
+            self.out.append(RecordType.PAYMENT_RECEIPT)
+            self.receipt(record)
+        else:
+            raise TypeError(f"Cannot encode {kind.__name__}")
+
+    def string(self, text: str) -> None:
+        index = self.index.get(text)
+        if index is None:
+            index = self.index[text] = len(self.strings)
+            self.strings.append(text)
+        _put_varint(self.out, index)
+
+    def optional_string(self, text: str | None) -> None:
+        # 0 = None, otherwise table index + 1.
+        if text is None:
+            self.out.append(0)
+            return
+        index = self.index.get(text)
+        if index is None:
+            index = self.index[text] = len(self.strings)
+            self.strings.append(text)
+        _put_varint(self.out, index + 1)
+
+    def signed(self, n: int) -> None:
+        _put_varint(self.out, n << 1 if n >= 0 else (-n << 1) - 1)
+
+    def request(self, request: RideRequest) -> None:
+        self.string(request.rider.rider_id)
+        self.string(request.rider.name)
+        pickup, drop = request.pickup, request.drop
+        self.out += _COORDS.pack(
+            pickup.lat, pickup.lng, drop.lat, drop.lng, request.distance_km
+        )
+        self.string(request.payment_type)
+        self.value(request.payment_details)
+        self.optional_string(request.auth_token if self.include_tokens else None)
+
+    def receipt(self, receipt: PaymentReceipt) -> None:
+        self.string(receipt.receipt_id)
+        self.signed(receipt.amount.minor)
+        self.string(receipt.amount.currency)
+        self.string(receipt.status.value)
+        self.string(receipt.method)
+
+    def booking(self, booking: Booking) -> None:
+        self.string(booking.booking_id)
+        self.request(booking.request)
+        self.signed(booking.fare.minor)
+        self.string(booking.fare.currency)
+        self.string(booking.status.value)
+        driver = booking.driver
+        if driver is None:
+            self.out.append(0)
+        else:
+            self.optional_string(driver.driver_id)
+            self.string(driver.name)
+        if booking.payment is None:
+            self.out.append(0)
+        else:
+            self.out.append(1)
+            self.receipt(booking.payment)
+        self.out += _DOUBLE.pack(booking.created_at)
+
+    def value(self, value: Any) -> None:
+        out = self.out
+        kind = type(value)
+        if kind is str:
+            out.append(_STR)
+            self.string(value)
+        elif value is None:
+            out.append(_NONE)
+        elif kind is bool:
+            out.append(_TRUE if value else _FALSE)
+        elif kind is int:
+            out.append(_INT)
+            self.signed(value)
+        elif kind is float:
+            out.append(_FLOAT)
+            out += _DOUBLE.pack(value)
+        elif kind is dict:
+            out.append(_DICT)
+            _put_varint(out, len(value))
+            for key, item in value.items():
+                self.string(str(key))
+                self.value(item)
+        elif kind is list or kind is tuple:
+            out.append(_LIST)
+            _put_varint(out, len(value))
+            for item in value:
+                self.value(item)
+        elif kind is Money:
+            out.append(_MONEY)
+            self.signed(value.minor)
+            self.string(value.currency)
+        elif kind is bytes:
+            out.append(_BYTES)
+            _put_varint(out, len(value))
+            out += value
+        else:
+            # Same fallback as the JSON journal's default=str.
+            out.append(_STR)
+            self.string(str(value))
+
+
+# --- decoding ---
+
+
+class _Reader:
+    __slots__ = ("buf", "pos", "table", "riders", "drivers")
+
+    def __init__(self, buf: memoryview) -> None:
+        self.buf = buf
+        self.pos = 0
+        self.table: list[str] = []
+        # Repeated riders/drivers in a frame decode to one shared object.
+        self.riders: dict[tuple[str, str], Rider] = {}
+        self.drivers: dict[tuple[str, str], Driver] = {}
+
+    def frame(self) -> list[Record]:
+        buf = self.buf
+        if not len(buf):
+            raise ValueError("Empty frame")
+        if buf[0] != VERSION:
+            raise ValueError(f"Unsupported codec version {buf[0]}")
+        self.pos = 1
+        try:
+            count = self.varint()
+            self.table = self.string_table()
+            records = [self.record() for _ in range(count)]
+        except (IndexError, KeyError, struct.error) as exc:
+            raise ValueError("Truncated or corrupt frame") from exc
+        if self.pos != len(buf):
+            raise ValueError(f"{len(buf) - self.pos} trailing bytes after {count} records")
+        return records
+
+    def varint(self) -> int:
+        buf = self.buf
+        pos = self.pos
+        byte = buf[pos]
+        pos += 1
+        if byte < 0x80:
+            self.pos = pos
+            return byte
+        n = byte & 0x7F
+        shift = 7
+        while True:
+            byte = buf[pos]
+            pos += 1
+            n |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                self.pos = pos
+                return n
+            shift += 7
+
+    def string_table(self) -> list[str]:
+        buf = self.buf
+        strings = self.varint()
+        layout = buf[self.pos]
+        self.pos += 1
+        if layout == _TABLE_JOINED:
+            length = self.varint()
+            start = self.pos
+            self.pos = start + length
+            if self.pos > len(buf):
+                raise IndexError("string table")
+            return str(buf[start : self.pos], "utf-8").split("\0") if strings else []
+        table: list[str] = []
+        for _ in range(strings):
+            length = self.varint()
+            start = self.pos
+            self.pos = start + length
+            if self.pos > len(buf):
+                raise IndexError("string table")
+            table.append(str(buf[start : self.pos], "utf-8"))
+        return table
+
+    # Hot readers inline the one-byte varint case (indexes < 128).
+
+    def signed(self) -> int:
+        pos = self.pos
+        n = self.buf[pos]
+        if n < 0x80:
+            self.pos = pos + 1
+        else:
+            n = self.varint()
+        return n >> 1 if not n & 1 else -((n + 1) >> 1)
+
+    def string(self) -> str:
+        pos = self.pos
+        index = self.buf[pos]
+        if index < 0x80:
+            self.pos = pos + 1
+            return self.table[index]
+        return self.table[self.varint()]
+
+    def optional_string(self) -> str | None:
+        pos = self.pos
+        index = self.buf[pos]
+        if index < 0x80:
+            self.pos = pos + 1
+        else:
+            index = self.varint()
+        return None if index == 0 else self.table[index - 1]
+
+    def record(self) -> Record:
+        kind = self.buf[self.pos]
+        self.pos += 1
+        if kind == RecordType.BOOKING:
+            return self.booking()
+        if kind == RecordType.EVENT:
+            event_type = self.string()
+            return Event(event_type=event_type, payload=self.value())
+        if kind == RecordType.RIDE_REQUEST:
+            return self.request()
+        if kind == RecordType.PAYMENT_RECEIPT:
+            return self.receipt()
+        raise ValueError(f"Unknown record type {kind}")
+
+    def request(self) -> RideRequest:
+        key = (self.string(), self.string())
+        rider = self.riders.get(key)
+        if rider is None:
+            rider = self.riders[key] = Rider(*key)
+        plat, plng, dlat, dlng, distance_km = _COORDS.unpack_from(self.buf, self.pos)
+        self.pos += _COORDS.size
+        payment_type = self.string()
+        details = self.value()
+        return RideRequest(
+            rider=rider,
+            pickup=Location(plat, plng),
+            drop=Location(dlat, dlng),
+            distance_km=distance_km,
+            payment_type=payment_type,
+            payment_details=details,
+            auth_token=self.optional_string(),
+        )
+
+    def receipt(self) -> PaymentReceipt:
+        receipt_id = self.string()
+        minor = self.signed()
+        currency = self.string()
+        status = _PAYMENT_STATUS[self.string()]
+        return PaymentReceipt(
+            receipt_id=receipt_id,
+            amount=Money(minor, currency),
+            status=status,
+            method=self.string(),
+        )
+
+    def booking(self) -> Booking:
+        booking_id = self.string()
+        request = self.request()
+        minor = self.signed()
+        currency = self.string()
+        status = _BOOKING_STATUS[self.string()]
+        driver_id = self.optional_string()
+        driver = None
+        if driver_id is not None:
+            key = (driver_id, self.string())
+            driver = self.drivers.get(key)
+            if driver is None:
+                driver = self.drivers[key] = Driver(*key)
+        has_payment = self.buf[self.pos]
+        self.pos += 1
+        payment = self.receipt() if has_payment else None
+        (created_at,) = _DOUBLE.unpack_from(self.buf, self.pos)
+        self.pos += _DOUBLE.size
+        return Booking(
+            booking_id=booking_id,
+            request=request,
+            fare=Money(minor, currency),
+            status=status,
+            driver=driver,
+            payment=payment,
+            created_at=created_at,
+        )
+
+    def value(self) -> Any:
+        buf = self.buf
+        tag = buf[self.pos]
+        self.pos += 1
+        if tag == _STR:
+            return self.string()
+        if tag == _NONE:
+            return None
+        if tag == _TRUE:
+            return True
+        if tag == _FALSE:
+            return False
+        if tag == _INT:
+            return self.signed()
+        if tag == _FLOAT:
+            (number,) = _DOUBLE.unpack_from(buf, self.pos)
+            self.pos += _DOUBLE.size
+            return number
+        if tag == _DICT:
+            result: dict[str, Any] = {}
+            for _ in range(self.varint()):
+                key = self.string()
+                result[key] = self.value()
+            return result
+        if tag == _LIST:
+            return [self.value() for _ in range(self.varint())]
+        if tag == _MONEY:
+            minor = self.signed()
+            return Money(minor, self.string())
+        if tag == _BYTES:
+            length = self.varint()
+            start = self.pos
+            self.pos = start + length
+            return bytes(buf[start : self.pos])
+        raise ValueError(f"Unknown value tag {tag}")
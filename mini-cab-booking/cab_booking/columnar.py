@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+from array import array
+from typing import Any, Callable, Hashable, Iterable, Iterator, Sequence, overload
+
+from .models import (
+    Booking,
+    BookingStatus,
+    Driver,
+    Location,
+    PaymentReceipt,
+    PaymentStatus,
+    RideRequest,
+    Rider,
+)
+from .money import Money
+
+_STATUSES = tuple(BookingStatus)
+_STATUS_CODE = {status: code for code, status in enumerate(_STATUSES)}
+_PAYMENT_STATUSES = tuple(PaymentStatus)
+_PAYMENT_STATUS_CODE = {status: code for code, status in enumerate(_PAYMENT_STATUSES)}
+
+_NONE = -1
+_HEX_ID_LEN = 16  # SnowflakeIdGenerator renders ids as 16 hex digits
+
+# Column name -> array typecode. Ids are split into a tag column and a uint64
+# column (see _encode_id).
+_COLUMNS: dict[str, str] = {
+    "booking_id_tag": "i",
+    "booking_id": "Q",
+    "rider": "i",
+    "rider_name": "i",
+    "pickup_lat": "d",
+    "pickup_lng": "d",
+    "drop_lat": "d",
+    "drop_lng": "d",
+    "distance_km": "d",
+    "payment_type": "i",
+    "payment_details": "i",
+    "auth_token": "i",
+    "fare_minor": "q",
+    "currency": "i",
+    "status": "b",
+    "driver": "i",
+    "driver_name": "i",
+    "receipt_id_tag": "i",
+    "receipt_id": "Q",
+    "receipt_amount_minor": "q",
+    "receipt_status": "b",
+    "receipt_method": "i",
+    "created_at": "d",
+}
+
+
+class StringTable:
+    """
+    Interning table: each distinct value is stored once and referenced by code.
+    """
+
+    __slots__ = ("values", "_codes")
+
+    def __init__(self) -> None:
+        self.values: list[Any] = []
+        self._codes: dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def intern(self, value: Any, key: Hashable | None = None) -> int:
+        if value is None:
+            return _NONE
+        key = value if key is None else key
+        code = self._codes.get(key)
+        if code is None:
+            code = self._codes[key] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def code(self, value: Any) -> int | None:
+        return self._codes.get(value)
+
+
+class _Tables:
+    __slots__ = (
+        "rider",
+        "name",
+        "payment_type",
+        "details",
+        "token",
+        "currency",
+        "driver",
+        "method",
+        "id_prefix",
+        "raw_id",
+    )
+
+    def __init__(self) -> None:
+        self.rider = StringTable()
+        self.name = StringTable()  # rider and driver names
+        self.payment_type = StringTable()
+        self.details = StringTable()
+        self.token = StringTable()
+        self.currency = StringTable()
+        self.driver = StringTable()
+        self.method = StringTable()
+        self.id_prefix = StringTable()
+        self.raw_id = StringTable()
+
+
+class BookingBatch:
+    """
+    Struct-of-arrays store for many bookings.
+
+    Numbers live in typed arrays (coordinates, distances, fares in paise,
+    status codes, timestamps); snowflake ids become a prefix code plus a
+    uint64 instead of a string per row; repeated strings (rider/driver ids
+    and names, payment types, currencies, tokens) and identical
+    payment_details dicts are interned in tables shared by every slice.
+
+    Filtering and slicing work on the columns and never build Booking
+    objects; indexing or iterating materializes them on demand. Materialized
+    bookings share interned payment_details dicts: treat them as read-only.
+    """
+
+    def __init__(self, _tables: _Tables | None = None, _columns: dict[str, Any] | None = None) -> None:
+        self._t = _tables or _Tables()
+        self._c: dict[str, Any] = _columns or {
+            name: array(code) for name, code in _COLUMNS.items()
+        }
+
+    @classmethod
+    def from_bookings(cls, bookings: Iterable[Booking]) -> "BookingBatch":
+        batch = cls()
+        batch.extend(bookings)
+        return batch
+
+    def append(self, booking: Booking) -> None:
+        t, c = self._t, self._c
+        request = booking.request
+        rider = request.rider
+        driver = booking.driver
+        receipt = booking.payment
+        _encode_id(t, c["booking_id_tag"], c["booking_id"], booking.booking_id)
+        c["rider"].append(t.rider.intern(rider.rider_id))
+        c["rider_name"].append(t.name.intern(rider.name))
+        c["pickup_lat"].append(request.pickup.lat)
+        c["pickup_lng"].append(request.pickup.lng)
+        c["drop_lat"].append(request.drop.lat)
+        c["drop_lng"].append(request.drop.lng)
+        c["distance_km"].append(request.distance_km)
+        c["payment_type"].append(t.payment_type.intern(request.payment_type))
+        c["payment_details"].append(
+            t.details.intern(request.payment_details, _details_key(request.payment_details))
+        )
+        c["auth_token"].append(t.token.intern(request.auth_token))
+        c["fare_minor"].append(booking.fare.minor)
+        c["currency"].append(t.currency.intern(booking.fare.currency))
+        c["status"].append(_STATUS_CODE[booking.status])
+        c["driver"].append(t.driver.intern(driver.driver_id) if driver else _NONE)
+        c["driver_name"].append(t.name.intern(driver.name) if driver else _NONE)
+        _encode_id(
+            t, c["receipt_id_tag"], c["receipt_id"], receipt.receipt_id if receipt else None
+        )
+        c["receipt_amount_minor"].append(receipt.amount.minor if receipt else 0)
+        c["receipt_status"].append(
+            _PAYMENT_STATUS_CODE[receipt.status] if receipt else _NONE
+        )
+        c["receipt_method"].append(t.method.intern(receipt.method) if receipt else _NONE)
+        c["created_at"].append(booking.created_at)
+
+    def extend(self, bookings: Iterable[Booking]) -> None:
+        for booking in bookings:
+            self.append(booking)
+
+    def __len__(self) -> int:
+        return len(self._c["booking_id_tag"])
+
+    @overload
+    def __getitem__(self, index: int) -> Booking: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "BookingBatch": ...
+
+    def __getitem__(self, index: int | slice) -> Booking | "BookingBatch":
+        if isinstance(index, slice):
+            return BookingBatch(self._t, {k: v[index] for k, v in self._c.items()})
+        return self._materialize(range(len(self))[index])
+
+    def __iter__(self) -> Iterator[Booking]:
+        for i in range(len(self)):
+            yield self._materialize(i)
+
+    def to_bookings(self) -> list[Booking]:
+        return list(self)
+
+    def column(self, name: str) -> Sequence[Any]:
+        """
+        Raw typed-array column; codes index into the shared tables.
+        """
+        return self._c[name]
+
+    @property
+    def fares_minor(self) -> array:
+        return self._c["fare_minor"]
+
+    @property
+    def distances(self) -> array:
+        return self._c["distance_km"]
+
+    def take(self, indices: Iterable[int]) -> "BookingBatch":
+        idx = list(indices)
+        columns: dict[str, Any] = {}
+        for name, code in _COLUMNS.items():
+            src = self._c[name]
+            columns[name] = array(code, [src[i] for i in idx])
+        return BookingBatch(self._t, columns)
+
+    def filter(self, mask: Iterable[bool]) -> "BookingBatch":
+        return self.take(i for i, keep in enumerate(mask) if keep)
+
+    def where(self, column: str, predicate: Callable[[Any], bool]) -> "BookingBatch":
+        return self.take(i for i, v in enumerate(self._c[column]) if predicate(v))
+
+    def where_status(self, status: BookingStatus) -> "BookingBatch":
+        return self._where_code("status", _STATUS_CODE[status])
+
+    def where_rider(self, rider_id: str) -> "BookingBatch":
+        return self._where_code("rider", self._t.rider.code(rider_id))
+
+    def where_driver(self, driver_id: str) -> "BookingBatch":
+        return self._where_code("driver", self._t.driver.code(driver_id))
+
+    def nbytes(self) -> int:
+        """
+        Approximate payload size of the columns (excluding shared tables).
+        """
+        return sum(col.itemsize * len(col) for col in self._c.values())
+
+    def _where_code(self, column: str, code: int | None) -> "BookingBatch":
+        if code is None:
+            return self.take(())
+        return self.take(i for i, v in enumerate(self._c[column]) if v == code)
+
+    def _materialize(self, i: int) -> Booking:
+        t, c = self._t, self._c
+        currency = t.currency.values[c["currency"][i]]
+        driver_code = c["driver"][i]
+        receipt_id = _decode_id(t, c["receipt_id_tag"][i], c["receipt_id"][i])
+        token_code = c["auth_token"][i]
+        request = RideRequest(
+            rider=Rider(
+                rider_id=t.rider.values[c["rider"][i]],
+                name=t.name.values[c["rider_name"][i]],
+            ),
+            pickup=Location(lat=c["pickup_lat"][i], lng=c["pickup_lng"][i]),
+            drop=Location(lat=c["drop_lat"][i], lng=c["drop_lng"][i]),
+            distance_km=c["distance_km"][i],
+            payment_type=t.payment_type.values[c["payment_type"][i]],
+            payment_details=t.details.values[c["payment_details"][i]],
+            auth_token=None if token_code == _NONE else t.token.values[token_code],
+        )
+        receipt = None
+        if receipt_id is not None:
+            receipt = PaymentReceipt(
+                receipt_id=receipt_id,
+                amount=Money(c["receipt_amount_minor"][i], currency),
+                status=_PAYMENT_STATUSES[c["receipt_status"][i]],
+                method=t.method.values[c["receipt_method"][i]],
+            )
+        return Booking(
+            booking_id=_decode_id(t, c["booking_id_tag"][i], c["booking_id"][i]),
+            request=request,
+            fare=Money(c["fare_minor"][i], currency),
+            status=_STATUSES[c["status"][i]],
+            driver=None
+            if driver_code == _NONE
+            else Driver(
+                driver_id=t.driver.values[driver_code],
+                name=t.name.values[c["driver_name"][i]],
+            ),
+            payment=receipt,
+            created_at=c["created_at"][i],
+        )
+
+
+def _encode_id(t: _Tables, tags: array, values: array, value: str | None) -> None:
+    # tag >= 0: prefix code, value holds the hex part; tag == -1: None;
+    # tag <= -2: whole id interned in raw_id (non-snowflake formats).
+    if value is None:
+        tags.append(_NONE)
+        values.append(0)
+        return
+    prefix, sep, tail = value.rpartition("_")
+    if sep and len(tail) == _HEX_ID_LEN:
+        try:
+            number = int(tail, 16)
+        except ValueError:
+            pass
+        else:
+            if f"{number:016x}" == tail:
+                tags.append(t.id_prefix.intern(prefix))
+                values.append(number)
+                return
+    tags.append(-2 - t.raw_id.intern(value))
+    values.append(0)
+
+
+def _decode_id(t: _Tables, tag: int, value: int) -> str | None:
+    if tag >= 0:
+        return f"{t.id_prefix.values[tag]}_{value:016x}"
+    if tag == _NONE:
+        return None
+    return t.raw_id.values[-2 - tag]
+
+
+def _details_key(details: dict[str, Any]) -> Hashable:
+    # The value's type is part of the key: 1, 1.0 and True compare equal.
+    try:
+        return frozenset((k, type(v), v) for k, v in details.items())
+    except TypeError:
+        # Unhashable values: keep this dict as its own table entry.
+        return ("id", id(details))
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import threading
+
 
 class AppConfig:
     """
@@ -9,16 +11,26 @@ class AppConfig:
     - Maintain a single, shared application configuration containing:
       - app name
       - currency symbol
+
+    Creation is double-checked under a lock so concurrent first calls still
+    produce exactly one, fully initialised instance.
     """
 
     _instance: "AppConfig | None" = None
+    _lock = threading.Lock()
 
     def __new__(cls, app_name: str = "MiniCab", currency_symbol: str = "₹"):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance.app_name = app_name
-            cls._instance.currency_symbol = currency_symbol
-        return cls._instance
+        instance = cls._instance
+        if instance is None:
+            with cls._lock:
+                instance = cls._instance
+                if instance is None:
+                    instance = super().__new__(cls)
+                    instance.app_name = app_name
+                    instance.currency_symbol = currency_symbol
+                    # Publish only after the attributes are set.
+                    cls._instance = instance
+        return instance
 
     def __repr__(self) -> str:
         return f"AppConfig(app_name={self.app_name!r}, currency_symbol={self.currency_symbol!r})"
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+from enum import Enum
+
+
+class DispatchOrder(str, Enum):
+    IDLE_TIME = "IDLE_TIME"  # longest-idle driver first (fair rotation)
+    RATING = "RATING"  # best-rated driver first, longest idle among equals
+
+
+class FreeDriverQueue:
+    """
+    Indexed priority queue of free driver ids.
+
+    push/pop/remove/set_rating are O(log n) amortised on a heapq binary heap:
+    - entries are (rank, idle_since, ticket, driver_id); a driver's live
+      ticket identifies its current entry, so remove() and re-ranking only
+      invalidate the old entry, which pop() skips when it surfaces
+    - the heap is rebuilt once stale entries outnumber live ones, so memory
+      stays O(live drivers) under any amount of churn
+    """
+
+    def __init__(self, order: DispatchOrder = DispatchOrder.IDLE_TIME) -> None:
+        self._order = order
+        self._heap: list[tuple[float, int, int, str]] = []
+        # driver_id -> (ticket, idle_since) of its live entry
+        self._live: dict[str, tuple[int, int]] = {}
+        self._ratings: dict[str, float] = {}
+        self._tickets = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def __contains__(self, driver_id: object) -> bool:
+        return driver_id in self._live
+
+    @property
+    def order(self) -> DispatchOrder:
+        return self._order
+
+    def push(self, driver_id: str) -> None:
+        """
+        Mark a driver free as of now (a re-push moves it to the back).
+        """
+        ticket = next(self._tickets)
+        self._enter(driver_id, ticket, ticket)
+
+    def pop(self) -> str | None:
+        heap, live = self._heap, self._live
+        while heap:
+            _, _, ticket, driver_id = heapq.heappop(heap)
+            entry = live.get(driver_id)
+            if entry is not None and entry[0] == ticket:
+                del live[driver_id]
+                return driver_id
+        return None
+
+    def remove(self, driver_id: str) -> bool:
+        if self._live.pop(driver_id, None) is None:
+            return False
+        self._maybe_compact()
+        return True
+
+    def set_rating(self, driver_id: str, rating: float) -> None:
+        self._ratings[driver_id] = rating
+        entry = self._live.get(driver_id)
+        if entry is not None and self._order == DispatchOrder.RATING:
+            # Re-rank but keep its idle time (its place among equals).
+            self._enter(driver_id, next(self._tickets), entry[1])
+
+    def _enter(self, driver_id: str, ticket: int, since: int) -> None:
+        rank = -self._ratings.get(driver_id, 0.0) if self._order == DispatchOrder.RATING else 0.0
+        self._live[driver_id] = (ticket, since)
+        heapq.heappush(self._heap, (rank, since, ticket, driver_id))
+        self._maybe_compact()
+
+    def _maybe_compact(self) -> None:
+        if len(self._heap) > 2 * len(self._live) + 64:
+            live = self._live
+            self._heap = [
+                e for e in self._heap if (entry := live.get(e[3])) and entry[0] == e[2]
+            ]
+            heapq.heapify(self._heap)
@@ -1,14 +1,21 @@
 from __future__ import annotations
 
 import logging
+import threading
 from abc import ABC, abstractmethod
 from dataclasses import replace
+from time import perf_counter_ns
+from typing import Any, Callable, Hashable, Iterable
 
 from .config import AppConfig
-from .models import Booking, BookingStatus, PaymentStatus, RideRequest
+from .models import Booking, BookingResult, BookingStatus, PaymentStatus, RideRequest
+from .journal import BookingJournal
+from .logs import LogSampler
+from .metrics import BookingMetrics
 from .observer import Event, EventBus
-from .payment import PaymentFactory
+from .payment import PaymentFactory, PaymentMethod
 from .pricing import PricingStrategy
+from .repository import BookingRepository
 from .services import AuthService, BookingService
 
 
@@ -25,12 +32,29 @@ class RideBookingFacade(ABC):
     def set_pricing_strategy(self, strategy: PricingStrategy) -> None:
         raise NotImplementedError
 
+    def book_rides(self, requests: Iterable[RideRequest]) -> list[BookingResult]:
+        """
+        Book many rides; one request failing does not affect the others.
+        """
+        results: list[BookingResult] = []
+        for request in requests:
+            try:
+                booking = self.book_ride(request)
+            except Exception as exc:
+                results.append(BookingResult(request=request, error=exc))
+            else:
+                results.append(BookingResult(request=request, booking=booking))
+        return results
+
 
 class CabBookingFacade(RideBookingFacade):
     """
     Facade pattern:
     - One entrypoint to orchestrate pricing + booking + payment + events
     - Keeps low coupling via abstractions (strategies + factories)
+
+    With a journal, book_ride(), book_rides() and the ride transitions
+    return only after their records are durable (BookingJournal.commit()).
     """
 
     def __init__(
@@ -41,119 +65,419 @@ class CabBookingFacade(RideBookingFacade):
         payment_factory: PaymentFactory,
         booking_service: BookingService,
         event_bus: EventBus | None = None,
+        journal: BookingJournal | None = None,
+        metrics: BookingMetrics | None = None,
     ) -> None:
         self._config = config
         self._pricing_strategy = pricing_strategy
         self._payment_factory = payment_factory
         self._booking_service = booking_service
         self._event_bus = event_bus or EventBus()
+        self._journal = journal
+        self._metrics = metrics
+        self._strategy_lock = threading.Lock()
 
     def set_pricing_strategy(self, strategy: PricingStrategy) -> None:
-        self._pricing_strategy = strategy
-        self._event_bus.publish(
-            Event(
-                event_type="PRICING_STRATEGY_CHANGED",
-                payload={"strategy": type(strategy).__name__},
-            )
-        )
+        # Swaps are serialised so PRICING_STRATEGY_CHANGED events arrive in
+        # swap order. Readers take one snapshot of the attribute per booking
+        # (or per batch); a reference load is atomic, with or without the GIL.
+        with self._strategy_lock:
+            self._pricing_strategy = strategy
+            if self._wants("PRICING_STRATEGY_CHANGED"):
+                self._emit(
+                    Event(
+                        event_type="PRICING_STRATEGY_CHANGED",
+                        payload={"strategy": type(strategy).__name__},
+                    )
+                )
 
     def book_ride(self, request: RideRequest) -> Booking:
         # NOTE: No authentication/logging here by design.
         # Those concerns are added by wrappers WITHOUT changing this method.
+        journal = self._journal
+        if journal is None:
+            return self._book(
+                request, self._pricing_strategy, None, self._event_bus.publish
+            )
+        try:
+            return self._book(request, self._pricing_strategy, None, self._emit)
+        finally:
+            journal.commit()
+
+    def book_rides(self, requests: Iterable[RideRequest]) -> list[BookingResult]:
+        """
+        Batch variant of book_ride().
+
+        The pricing strategy is read once per batch, identical payment details
+        share one PaymentMethod, and events are buffered and published together
+        at the end (per-request event order is preserved). With a journal, the
+        whole batch is made durable by a single group commit.
+        """
+        return self._book_batch((request, None) for request in requests)
+
+    def book_assigned(
+        self, assignments: Iterable[tuple[RideRequest, str]]
+    ) -> list[BookingResult]:
+        """
+        book_rides() for (request, driver_id) pairs whose driver was chosen
+        up front, e.g. by BatchMatcher; each driver is claimed through
+        BookingService instead of being picked by the allocator. A driver
+        that is no longer free fails that request with LookupError.
+        """
+        return self._book_batch(assignments)
+
+    def _book_batch(
+        self, items: Iterable[tuple[RideRequest, str | None]]
+    ) -> list[BookingResult]:
+        strategy = self._pricing_strategy
+        payment_methods: dict[Hashable, PaymentMethod] = {}
+        events: list[Event] = []
+        results: list[BookingResult] = []
+        for request, driver_id in items:
+            try:
+                booking = self._book(
+                    request, strategy, payment_methods, events.append, driver_id
+                )
+            except Exception as exc:
+                results.append(BookingResult(request=request, error=exc))
+            else:
+                results.append(BookingResult(request=request, booking=booking))
+        self._event_bus.publish_many(events)
+        if self._journal is not None:
+            self._journal.append_events(events)
+            self._journal.commit()
+        return results
+
+    def _wants(self, event_type: str) -> bool:
+        # Events are built only if observed or journaled; an unobserved
+        # event costs one dispatch-table lookup.
+        return self._journal is not None or self._event_bus.has_subscribers(event_type)
 
-        fare = self._pricing_strategy.calculate_fare(request.distance_km)
-        self._event_bus.publish(
-            Event(
-                event_type="FARE_CALCULATED",
-                payload={"distance_km": request.distance_km, "fare": str(fare)},
+    def _emit(self, event: Event) -> None:
+        self._event_bus.publish(event)
+        if self._journal is not None:
+            self._journal.append_event(event)
+
+    def _record(self, booking: Booking) -> None:
+        self._booking_service.update(booking)
+        if self._journal is not None:
+            self._journal.append_booking(booking)
+
+    def _book(
+        self,
+        request: RideRequest,
+        strategy: PricingStrategy,
+        payment_methods: dict[Hashable, PaymentMethod] | None,
+        emit: Callable[[Event], None],
+        driver_id: str | None = None,
+    ) -> Booking:
+        wants = self._wants
+        # Stage timing is off unless a metrics sink is attached and enabled;
+        # each probe then costs one local None check.
+        m = self._metrics
+        if m is not None and not m.enabled:
+            m = None
+        if m is not None:
+            emit = m.timed("publish", emit)
+        if wants("RIDE_REQUESTED"):
+            emit(
+                Event(
+                    event_type="RIDE_REQUESTED",
+                    payload={
+                        "rider_id": request.rider.rider_id,
+                        "lat": request.pickup.lat,
+                        "lng": request.pickup.lng,
+                    },
+                )
             )
-        )
 
-        booking = self._booking_service.create_booking(request=request, fare=fare)
-        self._event_bus.publish(
-            Event(
-                event_type="DRIVER_ASSIGNED",
-                payload={
-                    "booking_id": booking.booking_id,
-                    "driver_id": booking.driver.driver_id if booking.driver else None,
-                },
+        if m is not None:
+            t0 = perf_counter_ns()
+        fare = strategy.quote(request)
+        if m is not None:
+            t1 = perf_counter_ns()
+            m.observe("pricing", t1 - t0)
+        if wants("FARE_CALCULATED"):
+            emit(
+                Event(
+                    event_type="FARE_CALCULATED",
+                    payload={"distance_km": request.distance_km, "fare": str(fare)},
+                )
             )
-        )
 
-        payment_method = self._payment_factory.create(
-            request.payment_type, request.payment_details
+        if m is not None:
+            t0 = perf_counter_ns()
+        booking = self._booking_service.create_booking(
+            request=request, fare=fare, driver_id=driver_id
         )
-        receipt = payment_method.pay(fare)
+        if m is not None:
+            m.observe("allocate", perf_counter_ns() - t0)
+        if self._journal is not None:
+            self._journal.append_booking(booking)
+        if wants("DRIVER_ASSIGNED"):
+            emit(
+                Event(
+                    event_type="DRIVER_ASSIGNED",
+                    payload={
+                        "booking_id": booking.booking_id,
+                        "driver_id": booking.driver.driver_id if booking.driver else None,
+                    },
+                )
+            )
 
-        self._event_bus.publish(
-            Event(
-                event_type="PAYMENT_PROCESSED",
-                payload={
-                    "booking_id": booking.booking_id,
-                    "method": receipt.method,
-                    "status": receipt.status.value,
-                },
+        try:
+            if m is not None:
+                t0 = perf_counter_ns()
+            payment_method = self._payment_method(request, payment_methods)
+            if m is not None:
+                t1 = perf_counter_ns()
+                m.observe("payment_create", t1 - t0)
+            receipt = payment_method.pay(fare)
+            if m is not None:
+                m.observe("payment_pay", perf_counter_ns() - t1)
+        except Exception:
+            # Never leave the booking PAYMENT_PENDING with its driver held.
+            self._fail(replace(booking, status=BookingStatus.FAILED), "payment_error", emit)
+            raise
+
+        if wants("PAYMENT_PROCESSED"):
+            emit(
+                Event(
+                    event_type="PAYMENT_PROCESSED",
+                    payload={
+                        "booking_id": booking.booking_id,
+                        "method": receipt.method,
+                        "status": receipt.status.value,
+                    },
+                )
             )
-        )
 
         if receipt.status == PaymentStatus.SUCCESS:
             booking = replace(
                 booking, payment=receipt, status=BookingStatus.CONFIRMED
             )
-            self._event_bus.publish(
+            self._record(booking)
+            if wants("BOOKING_CONFIRMED"):
+                emit(
+                    Event(
+                        event_type="BOOKING_CONFIRMED",
+                        payload={
+                            "booking_id": booking.booking_id,
+                            "fare": f"{self._config.currency_symbol}{fare}",
+                            "app": self._config.app_name,
+                        },
+                    )
+                )
+            return booking
+
+        booking = replace(booking, payment=receipt, status=BookingStatus.FAILED)
+        self._fail(booking, "payment_failed", emit)
+        return booking
+
+    def _fail(self, booking: Booking, reason: str, emit: Callable[[Event], None]) -> None:
+        self._record(booking)
+        self._booking_service.release_driver(booking)
+        if self._wants("BOOKING_FAILED"):
+            emit(
+                Event(
+                    event_type="BOOKING_FAILED",
+                    payload={"booking_id": booking.booking_id, "reason": reason},
+                )
+            )
+
+    def start_ride(self, booking: Booking) -> Booking:
+        booking = self._booking_service.start_ride(booking)
+        self._after_transition(booking, "RIDE_STARTED")
+        return booking
+
+    def complete_ride(self, booking: Booking) -> Booking:
+        booking = self._booking_service.complete_ride(booking)
+        self._after_transition(booking, "RIDE_COMPLETED")
+        return booking
+
+    def cancel_ride(self, booking: Booking) -> Booking:
+        booking = self._booking_service.cancel_ride(booking)
+        self._after_transition(booking, "BOOKING_CANCELLED")
+        return booking
+
+    def _after_transition(self, booking: Booking, event_type: str) -> None:
+        if self._journal is not None:
+            self._journal.append_booking(booking)
+        if self._wants(event_type):
+            self._emit(
                 Event(
-                    event_type="BOOKING_CONFIRMED",
+                    event_type=event_type,
                     payload={
                         "booking_id": booking.booking_id,
-                        "fare": f"{self._config.currency_symbol}{fare}",
-                        "app": self._config.app_name,
+                        "driver_id": booking.driver.driver_id if booking.driver else None,
                     },
                 )
             )
-            return booking
+        if self._journal is not None:
+            self._journal.commit()
 
-        booking = replace(booking, payment=receipt, status=BookingStatus.FAILED)
-        self._event_bus.publish(
-            Event(
-                event_type="BOOKING_FAILED",
-                payload={"booking_id": booking.booking_id, "reason": "payment_failed"},
+    def _payment_method(
+        self,
+        request: RideRequest,
+        cache: dict[Hashable, PaymentMethod] | None,
+    ) -> PaymentMethod:
+        if cache is None:
+            return self._payment_factory.create(
+                request.payment_type, request.payment_details
             )
-        )
-        return booking
+        key = _payment_key(request.payment_type, request.payment_details)
+        if key is None:
+            return self._payment_factory.create(
+                request.payment_type, request.payment_details
+            )
+        method = cache.get(key)
+        if method is None:
+            method = cache[key] = self._payment_factory.create(
+                request.payment_type, request.payment_details
+            )
+        return method
 
     @property
     def event_bus(self) -> EventBus:
         return self._event_bus
 
+    @property
+    def bookings(self) -> BookingRepository | None:
+        return self._booking_service.repository
+
 
 class LoggedFacade(RideBookingFacade):
     """
     Proxy/Decorator-style wrapper: adds logging without modifying core book_ride().
+
+    - structured=True logs each line as an event name plus fields
+      (extra={"event": ..., "fields": {...}}) for KeyValueFormatter /
+      JsonFormatter instead of a formatted message.
+    - A LogSampler is consulted before a record is built, so sampled-out or
+      rate-limited lines cost almost nothing.
+    - Pair with NonBlockingLogging to keep handler I/O off the request thread.
     """
 
-    def __init__(self, inner: RideBookingFacade, logger: logging.Logger | None = None):
+    def __init__(
+        self,
+        inner: RideBookingFacade,
+        logger: logging.Logger | None = None,
+        *,
+        structured: bool = False,
+        sampler: LogSampler | None = None,
+    ):
         self._inner = inner
         self._logger = logger or logging.getLogger("mini_cab_booking")
+        self._structured = structured
+        self._sampler = sampler
 
     def set_pricing_strategy(self, strategy: PricingStrategy) -> None:
-        self._logger.info("pricing_strategy_change strategy=%s", type(strategy).__name__)
+        if self._should_log("pricing_strategy_change"):
+            self._info(
+                "pricing_strategy_change",
+                "pricing_strategy_change strategy=%s",
+                strategy=type(strategy).__name__,
+            )
         self._inner.set_pricing_strategy(strategy)
 
     def book_ride(self, request: RideRequest) -> Booking:
-        self._logger.info(
-            "book_ride start rider=%s distance_km=%s payment=%s",
-            request.rider.rider_id,
-            request.distance_km,
-            request.payment_type,
-        )
+        if self._should_log("book_ride_start"):
+            self._info(
+                "book_ride_start",
+                "book_ride start rider=%s distance_km=%s payment=%s",
+                rider=request.rider.rider_id,
+                distance_km=request.distance_km,
+                payment=request.payment_type,
+            )
         booking = self._inner.book_ride(request)
-        self._logger.info(
-            "book_ride end booking_id=%s status=%s",
-            booking.booking_id,
-            booking.status.value,
+        if self._should_log("book_ride_end"):
+            self._info(
+                "book_ride_end",
+                "book_ride end booking_id=%s status=%s",
+                booking_id=booking.booking_id,
+                status=booking.status.value,
+            )
+        return booking
+
+    def book_rides(self, requests: Iterable[RideRequest]) -> list[BookingResult]:
+        batch = list(requests)
+        if self._should_log("book_rides_start"):
+            self._info("book_rides_start", "book_rides start count=%d", count=len(batch))
+        results = self._inner.book_rides(batch)
+        if self._should_log("book_rides_end"):
+            confirmed = sum(
+                1
+                for r in results
+                if r.booking is not None and r.booking.status == BookingStatus.CONFIRMED
+            )
+            errors = sum(1 for r in results if r.error is not None)
+            self._info(
+                "book_rides_end",
+                "book_rides end count=%d confirmed=%d failed=%d errors=%d",
+                count=len(results),
+                confirmed=confirmed,
+                failed=len(results) - confirmed - errors,
+                errors=errors,
+            )
+        return results
+
+    def _should_log(self, event: str) -> bool:
+        if not self._logger.isEnabledFor(logging.INFO):
+            return False
+        return self._sampler is None or self._sampler.allow(event)
+
+    def _info(self, event: str, message: str, **fields: Any) -> None:
+        if self._structured:
+            self._logger.info(event, extra={"event": event, "fields": fields})
+        else:
+            self._logger.info(message, *fields.values())
+
+
+class InstrumentedFacade(RideBookingFacade):
+    """
+    Proxy/Decorator-style wrapper: records end-to-end latency and booking
+    outcomes by payment type. Per-stage timings come from the same
+    BookingMetrics passed to CabBookingFacade(metrics=...).
+    """
+
+    def __init__(self, inner: RideBookingFacade, metrics: BookingMetrics):
+        self._inner = inner
+        self._metrics = metrics
+
+    def set_pricing_strategy(self, strategy: PricingStrategy) -> None:
+        self._inner.set_pricing_strategy(strategy)
+
+    def book_ride(self, request: RideRequest) -> Booking:
+        metrics = self._metrics
+        if not metrics.enabled:
+            return self._inner.book_ride(request)
+        start = perf_counter_ns()
+        try:
+            booking = self._inner.book_ride(request)
+        except Exception:
+            metrics.observe_booking(
+                perf_counter_ns() - start, request.payment_type, "ERROR"
+            )
+            raise
+        metrics.observe_booking(
+            perf_counter_ns() - start, request.payment_type, booking.status.value
         )
         return booking
 
+    def book_rides(self, requests: Iterable[RideRequest]) -> list[BookingResult]:
+        metrics = self._metrics
+        if not metrics.enabled:
+            return self._inner.book_rides(requests)
+        batch = list(requests)
+        start = perf_counter_ns()
+        results = self._inner.book_rides(batch)
+        # Batches only know their total time; attribute it evenly.
+        per_booking = (perf_counter_ns() - start) // max(len(results), 1)
+        for result in results:
+            outcome = result.booking.status.value if result.booking else "ERROR"
+            metrics.observe_booking(per_booking, result.request.payment_type, outcome)
+        return results
+
 
 class AuthenticatedFacade(RideBookingFacade):
     """
@@ -172,3 +496,33 @@ class AuthenticatedFacade(RideBookingFacade):
             raise PermissionError("Access denied: invalid or missing auth token")
         return self._inner.book_ride(request)
 
+    def book_rides(self, requests: Iterable[RideRequest]) -> list[BookingResult]:
+        results: list[BookingResult | None] = []
+        allowed: list[RideRequest] = []
+        slots: list[int] = []
+        for request in requests:
+            if self._auth.is_authenticated(request.auth_token):
+                slots.append(len(results))
+                allowed.append(request)
+                results.append(None)
+            else:
+                results.append(
+                    BookingResult(
+                        request=request,
+                        error=PermissionError(
+                            "Access denied: invalid or missing auth token"
+                        ),
+                    )
+                )
+        for slot, result in zip(slots, self._inner.book_rides(allowed)):
+            results[slot] = result
+        return results  # type: ignore[return-value]
+
+
+def _payment_key(payment_type: str, details: dict[str, Any]) -> Hashable | None:
+    # The value's type is part of the key: 1, 1.0 and True compare equal.
+    try:
+        return (payment_type, frozenset((k, type(v), v) for k, v in details.items()))
+    except TypeError:
+        return None
+
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import heapq
+import math
+from typing import Generic, Hashable, TypeVar
+
+from .models import Location
+
+K = TypeVar("K", bound=Hashable)
+
+Cell = tuple[int, int]
+
+# ~1.1 km of latitude per cell; a good default bucket for city-scale dispatch.
+DEFAULT_CELL_DEG = 0.01
+
+# Kilometres per degree of latitude (and of longitude at the equator).
+KM_PER_DEG = 111.32
+
+
+def cell_of(lat: float, lng: float, cell_deg: float = DEFAULT_CELL_DEG) -> Cell:
+    return (math.floor(lat / cell_deg), math.floor(lng / cell_deg))
+
+
+def distance_km(a: Location, b: Location) -> float:
+    # Equirectangular: plenty for intra-city distances.
+    dy = (b.lat - a.lat) * KM_PER_DEG
+    dx = (b.lng - a.lng) * KM_PER_DEG * math.cos(math.radians((a.lat + b.lat) / 2))
+    return math.hypot(dx, dy)
+
+
+class GridIndex(Generic[K]):
+    """
+    Uniform grid (bucket) spatial index over lat/lng.
+
+    - insert/move/remove are O(1) and never rebuild the index
+    - nearest() scans rings of cells outward from the query cell and stops as
+      soon as no unscanned ring can hold anything closer than the best hit
+
+    Distances use an equirectangular projection around the query point, which
+    is exact enough for ranking candidates within a city.
+    """
+
+    def __init__(self, cell_deg: float = DEFAULT_CELL_DEG) -> None:
+        if cell_deg <= 0:
+            raise ValueError("cell_deg must be > 0")
+        self._cell_deg = cell_deg
+        self._cells: dict[Cell, dict[K, tuple[float, float]]] = {}
+        self._where: dict[K, Cell] = {}
+        # Bounds of every cell ever occupied; they only grow, which keeps
+        # removals O(1) while still bounding the ring search.
+        self._min_row = self._max_row = 0
+        self._min_col = self._max_col = 0
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._where
+
+    def insert(self, key: K, location: Location) -> None:
+        if key in self._where:
+            raise KeyError(f"already indexed: {key!r}")
+        self._put(key, location.lat, location.lng)
+
+    def move(self, key: K, location: Location) -> None:
+        cell = self._where[key]
+        new_cell = cell_of(location.lat, location.lng, self._cell_deg)
+        if new_cell == cell:
+            self._cells[cell][key] = (location.lat, location.lng)
+            return
+        self._discard(key, cell)
+        self._put(key, location.lat, location.lng)
+
+    def remove(self, key: K) -> None:
+        self._discard(key, self._where[key])
+
+    def location(self, key: K) -> Location:
+        lat, lng = self._cells[self._where[key]][key]
+        return Location(lat=lat, lng=lng)
+
+    def nearest(self, location: Location) -> K | None:
+        """
+        Return the key closest to `location`, or None if the index is empty.
+        """
+        if not self._where:
+            return None
+        lat, lng = location.lat, location.lng
+        row, col = cell_of(lat, lng, self._cell_deg)
+        kx = math.cos(math.radians(lat))
+        # Anything outside ring r is at least r cells away on one axis; the
+        # longitude axis shrinks by kx, so that is the conservative bound.
+        ring_bound = self._cell_deg * min(1.0, kx)
+        max_ring = max(
+            abs(row - self._min_row),
+            abs(row - self._max_row),
+            abs(col - self._min_col),
+            abs(col - self._max_col),
+        )
+
+        best_key: K | None = None
+        best_d2 = math.inf
+        cells = self._cells
+        for ring in range(max_ring + 1):
+            for cell in _ring_cells(row, col, ring):
+                bucket = cells.get(cell)
+                if not bucket:
+                    continue
+                for key, (p_lat, p_lng) in bucket.items():
+                    dy = p_lat - lat
+                    dx = (p_lng - lng) * kx
+                    d2 = dx * dx + dy * dy
+                    if d2 < best_d2:
+                        best_d2 = d2
+                        best_key = key
+            reach = ring * ring_bound
+            if best_key is not None and best_d2 <= reach * reach:
+                break
+        return best_key
+
+    def nearest_k(
+        self, location: Location, k: int, max_deg: float = math.inf
+    ) -> list[tuple[float, K]]:
+        """
+        Up to `k` (squared distance, key) pairs closest to `location`, nearest
+        first, ignoring keys farther than `max_deg` (in latitude degrees;
+        distances use the same projection as nearest()).
+        """
+        if k <= 0 or not self._where:
+            return []
+        lat, lng = location.lat, location.lng
+        cell_deg = self._cell_deg
+        row, col = cell_of(lat, lng, cell_deg)
+        kx = math.cos(math.radians(lat))
+        ring_bound = cell_deg * min(1.0, kx)
+        max_ring = max(
+            abs(row - self._min_row),
+            abs(row - self._max_row),
+            abs(col - self._min_col),
+            abs(col - self._max_col),
+        )
+        if max_deg != math.inf:
+            max_ring = min(max_ring, int(max_deg / ring_bound) + 1)
+        limit = max_deg * max_deg
+        # Distance from the query to the edges of its own cell: after ring r
+        # everything closer than r cells plus that margin has been seen.
+        fy = lat / cell_deg - row
+        fx = lng / cell_deg - col
+        margin_y = min(fy, 1.0 - fy) * cell_deg
+        margin_x = min(fx, 1.0 - fx) * cell_deg
+        # Max-heap of the k best so far as (-d2, tiebreak, key).
+        best: list[tuple[float, int, K]] = []
+        seen = 0
+        cells = self._cells
+        for ring in range(max_ring + 1):
+            for cell in _ring_cells(row, col, ring):
+                bucket = cells.get(cell)
+                if not bucket:
+                    continue
+                for key, (p_lat, p_lng) in bucket.items():
+                    dy = p_lat - lat
+                    dx = (p_lng - lng) * kx
+                    d2 = dx * dx + dy * dy
+                    if d2 > limit:
+                        continue
+                    seen += 1
+                    if len(best) < k:
+                        heapq.heappush(best, (-d2, seen, key))
+                    elif d2 < -best[0][0]:
+                        heapq.heapreplace(best, (-d2, seen, key))
+            reach = min(ring * cell_deg + margin_y, (ring * cell_deg + margin_x) * kx)
+            if len(best) == k and -best[0][0] <= reach * reach:
+                break
+        best.sort(reverse=True)
+        return [(-neg_d2, key) for neg_d2, _, key in best]
+
+    def _put(self, key: K, lat: float, lng: float) -> None:
+        cell = cell_of(lat, lng, self._cell_deg)
+        bucket = self._cells.get(cell)
+        if bucket is None:
+            bucket = self._cells[cell] = {}
+            self._grow_bounds(cell)
+        bucket[key] = (lat, lng)
+        self._where[key] = cell
+
+    def _discard(self, key: K, cell: Cell) -> None:
+        bucket = self._cells[cell]
+        del bucket[key]
+        if not bucket:
+            del self._cells[cell]
+        del self._where[key]
+
+    def _grow_bounds(self, cell: Cell) -> None:
+        row, col = cell
+        if len(self._cells) == 1 and len(self._where) == 0:
+            self._min_row = self._max_row = row
+            self._min_col = self._max_col = col
+            return
+        self._min_row = min(self._min_row, row)
+        self._max_row = max(self._max_row, row)
+        self._min_col = min(self._min_col, col)
+        self._max_col = max(self._max_col, col)
+
+
+def _ring_cells(row: int, col: int, ring: int):
+    if ring == 0:
+        yield (row, col)
+        return
+    top, bottom = row - ring, row + ring
+    for c in range(col - ring, col + ring + 1):
+        yield (top, c)
+        yield (bottom, c)
+    for r in range(top + 1, bottom):
+        yield (r, col - ring)
+        yield (r, col + ring)
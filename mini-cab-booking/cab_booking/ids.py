@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from uuid import uuid4
+
+# Snowflake layout (63 bits used): 41-bit ms since EPOCH_MS | 10-bit worker | 12-bit seq.
+EPOCH_MS = 1_704_067_200_000  # 2024-01-01T00:00:00Z
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER = (1 << WORKER_BITS) - 1
+_SEQ_MASK = (1 << SEQUENCE_BITS) - 1
+_TIME_SHIFT = WORKER_BITS + SEQUENCE_BITS
+
+
+class IdGenerator(ABC):
+    """
+    Strategy for minting entity ids such as "bk_..." and "rcpt_...".
+    """
+
+    @abstractmethod
+    def new(self, prefix: str) -> str:
+        raise NotImplementedError
+
+    def bulk(self, prefix: str, n: int) -> list[str]:
+        return [self.new(prefix) for _ in range(n)]
+
+
+class UuidIdGenerator(IdGenerator):
+    """
+    Random, unordered ids (the original scheme).
+    """
+
+    def new(self, prefix: str) -> str:
+        return f"{prefix}_{uuid4().hex[:10]}"
+
+
+class SnowflakeIdGenerator(IdGenerator):
+    """
+    Time-sortable 64-bit ids: millisecond timestamp, worker id, sequence.
+
+    - Rendered as fixed-width hex, so string order is creation order.
+    - Time comes from a monotonic clock anchored to wall time at start-up,
+      so wall-clock steps never produce duplicates or reordering.
+    - When a millisecond's 4096 sequence numbers run out, the generator moves
+      to the next millisecond logically instead of sleeping.
+    - Fork-aware: a forked child resets its lock and sequence. Without an
+      explicit `worker_id` the id is derived from the pid, in the child
+      too; pids equal modulo 1024 then share one, so processes that must
+      never collide should each pass their own (as ShardedBookingRouter
+      does). A generator with an explicit worker_id cannot tell parent and
+      child apart, so in a forked child it raises RuntimeError instead of
+      minting the parent's ids again; build a new one there.
+    """
+
+    def __init__(self, worker_id: int | None = None) -> None:
+        if worker_id is not None and not 0 <= worker_id <= MAX_WORKER:
+            raise ValueError(f"worker_id must be in [0, {MAX_WORKER}]")
+        self._derived = worker_id is None
+        self._inherited = False  # explicit worker_id copied by fork
+        self._worker_id = _pid_worker() if worker_id is None else worker_id
+        self._lock = threading.Lock()
+        self._offset_ms = time.time_ns() // 1_000_000 - time.monotonic_ns() // 1_000_000
+        self._last_ms = -1
+        self._seq = 0
+        _register_fork_reset(self)
+
+    @property
+    def worker_id(self) -> int:
+        return self._worker_id
+
+    def next_int(self) -> int:
+        with self._lock:
+            return self._reserve(1)
+
+    def new(self, prefix: str) -> str:
+        with self._lock:
+            value = self._reserve(1)
+        return f"{prefix}_{value:016x}"
+
+    def bulk(self, prefix: str, n: int) -> list[str]:
+        """
+        Reserve n consecutive ids with one lock acquisition.
+        """
+        if n <= 0:
+            return []
+        with self._lock:
+            first = self._reserve(n)
+        worker = self._worker_id << SEQUENCE_BITS
+        out: list[str] = []
+        ms, seq = first >> _TIME_SHIFT, first & _SEQ_MASK
+        for _ in range(n):
+            out.append(f"{prefix}_{(ms << _TIME_SHIFT) | worker | seq:016x}")
+            seq += 1
+            if seq > _SEQ_MASK:
+                ms, seq = ms + 1, 0
+        return out
+
+    def _reserve(self, n: int) -> int:
+        """
+        Claim n sequence slots; return the first id. Caller holds the lock.
+        """
+        if self._inherited:
+            raise RuntimeError(
+                f"worker_id {self._worker_id} was inherited across fork; "
+                "create a SnowflakeIdGenerator with its own worker_id in the child"
+            )
+        now = time.monotonic_ns() // 1_000_000 + self._offset_ms - EPOCH_MS
+        if now > self._last_ms:
+            self._last_ms, self._seq = now, 0
+        else:
+            self._seq += 1
+            if self._seq > _SEQ_MASK:
+                self._last_ms, self._seq = self._last_ms + 1, 0
+        first = (self._last_ms << _TIME_SHIFT) | (self._worker_id << SEQUENCE_BITS) | self._seq
+        # Advance past the remaining n-1 slots, spilling into later ms.
+        total = self._seq + n - 1
+        self._last_ms += total >> SEQUENCE_BITS
+        self._seq = total & _SEQ_MASK
+        return first
+
+    def _after_fork(self) -> None:
+        self._lock = threading.Lock()
+        if self._derived:
+            self._worker_id = _pid_worker()
+        else:
+            self._inherited = True
+        self._last_ms = -1
+        self._seq = 0
+
+
+def parse_snowflake(value: int) -> tuple[int, int, int]:
+    """
+    Split a snowflake into (unix_ms, worker_id, sequence).
+    """
+    return (
+        (value >> _TIME_SHIFT) + EPOCH_MS,
+        (value >> SEQUENCE_BITS) & MAX_WORKER,
+        value & _SEQ_MASK,
+    )
+
+
+def _pid_worker() -> int:
+    return os.getpid() & MAX_WORKER
+
+
+_fork_targets: "weakref.WeakSet[SnowflakeIdGenerator]" = weakref.WeakSet()
+
+
+def _reset_after_fork() -> None:
+    for generator in list(_fork_targets):
+        generator._after_fork()
+
+
+def _register_fork_reset(generator: SnowflakeIdGenerator) -> None:
+    _fork_targets.add(generator)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
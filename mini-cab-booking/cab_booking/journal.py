@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Callable, Iterable, Iterator
+
+from . import codec
+from .models import Booking
+from .observer import Event
+from .repository import BookingRepository
+from .services import BaseDriverAllocator
+
+# Frame header: payload length (uint32), record kind (uint8) and CRC-32 of the
+# payload (uint32), little-endian.
+_HEADER = struct.Struct("<IBI")
+# FRAME payload prefix: byte length of the bookings section (uint32); the
+# events section follows it. Either section may be empty (zero bytes).
+_SECTIONS = struct.Struct("<I")
+_SEGMENT_SUFFIX = ".journal"
+
+
+class RecordKind(IntEnum):
+    FRAME = 1  # every Booking and Event of one group commit
+
+
+class BookingJournal:
+    """
+    Append-only, length-prefixed binary journal of Events and Booking
+    transitions, split into size-bounded segment files.
+
+    Group commit: records are buffered and written with one write() + one
+    fsync per batch. A batch is written when `group_size` records are
+    buffered or when someone calls commit(), which returns only once
+    everything appended before it is durable; concurrent commit() calls
+    share one write, so N threads committing at once cost far fewer than N
+    fsyncs. Records not yet committed are lost in a crash.
+    Each batch is one journal frame holding two binary codec frames, its
+    bookings and then its events, so ids and statuses repeated in the batch
+    are stored once and replay can skip event bodies nobody consumes.
+    Appended records are encoded at commit time and must not be mutated
+    before then. Auth tokens are not persisted: replayed bookings have
+    auth_token=None. Every frame carries a CRC-32, so a torn or corrupt tail is
+    detected on replay.
+    A segment is rotated once it reaches `segment_bytes`. Reopening a
+    directory always starts a new segment, so a torn tail from a crash is
+    never appended to.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 64 * 1024 * 1024,
+        group_size: int = 1000,
+        fsync: bool = True,
+    ) -> None:
+        if segment_bytes <= 0 or group_size <= 0:
+            raise ValueError("segment_bytes and group_size must be > 0")
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._segment_bytes = segment_bytes
+        self._group_size = group_size
+        self._fsync = fsync
+        self._buffer: list[Booking | Event] = []
+        self._appended = 0  # records appended so far
+        self._durable = 0  # records written (and fsynced) so far
+        # _lock guards the buffer; _write_lock makes one thread at a time
+        # write, so appends never wait for an fsync.
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        existing = segment_paths(directory)
+        self._segment_no = _segment_no(existing[-1]) + 1 if existing else 0
+        self._file = self._open_segment()
+
+    def append_event(self, event: Event) -> None:
+        self._append(event)
+
+    def append_events(self, events: Iterable[Event]) -> None:
+        with self._lock:
+            before = len(self._buffer)
+            self._buffer.extend(events)
+            self._appended += len(self._buffer) - before
+            full = len(self._buffer) >= self._group_size
+        if full:
+            self.commit()
+
+    def append_booking(self, booking: Booking) -> None:
+        self._append(booking)
+
+    def commit(self) -> None:
+        """
+        Return once everything appended so far is durable.
+        """
+        with self._lock:
+            target = self._appended
+        if self._durable >= target:
+            return
+        with self._write_lock:
+            # Whoever held the lock may have written our records already.
+            if self._durable < target:
+                self._write_pending()
+
+    def close(self) -> None:
+        with self._write_lock:
+            if self._file.closed:
+                return
+            self._write_pending()
+            self._file.close()
+
+    def __enter__(self) -> "BookingJournal":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _append(self, record: Booking | Event) -> None:
+        with self._lock:
+            self._buffer.append(record)
+            self._appended += 1
+            full = len(self._buffer) >= self._group_size
+        if full:
+            self.commit()
+
+    def _write_pending(self) -> None:
+        # Caller holds _write_lock. Appends continue into a fresh buffer
+        # while this batch is encoded, written and fsynced.
+        with self._lock:
+            records, self._buffer = self._buffer, []
+            upto = self._appended
+        if not records:
+            return
+        try:
+            payload = _encode_frame(records)
+            self._file.write(
+                _HEADER.pack(len(payload), RecordKind.FRAME, zlib.crc32(payload)) + payload
+            )
+            self._file.flush()
+            if self._fsync:
+                os.fsync(self._file.fileno())
+        except BaseException:
+            with self._lock:
+                self._buffer[:0] = records
+            raise
+        self._durable = upto
+        if self._file.tell() >= self._segment_bytes:
+            self._file.close()
+            self._segment_no += 1
+            self._file = self._open_segment()
+
+    def _open_segment(self):
+        path = os.path.join(self._directory, f"{self._segment_no:08d}{_SEGMENT_SUFFIX}")
+        return open(path, "ab")
+
+
+def segment_paths(directory: str) -> list[str]:
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(n for n in os.listdir(directory) if n.endswith(_SEGMENT_SUFFIX))
+    return [os.path.join(directory, n) for n in names]
+
+
+def iter_records(directory: str) -> Iterator[tuple[int, memoryview]]:
+    """
+    Yield (kind, payload) for every record, in append order.
+
+    Segments are memory-mapped and payloads are zero-copy views into the
+    map; copy them (bytes(view)) if they must outlive the iteration step.
+    A truncated record or one failing its checksum (torn or corrupt write)
+    ends that segment and is logged.
+    """
+    header_size = _HEADER.size
+    unpack_from = _HEADER.unpack_from
+    crc32 = zlib.crc32
+    for path in segment_paths(directory):
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                continue
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # No explicit close: a caller may still hold the last payload view.
+        # The map is released as soon as the last view referencing it is.
+        view = memoryview(mapped)
+        pos = 0
+        while pos < size:
+            if pos + header_size > size:
+                _torn(path, pos, "truncated header")
+                break
+            length, kind, checksum = unpack_from(mapped, pos)
+            start = pos + header_size
+            end = start + length
+            if end > size:
+                _torn(path, pos, "truncated record")
+                break
+            payload = view[start:end]
+            if kind not in _KINDS or crc32(payload) != checksum:
+                del payload
+                _torn(path, pos, "checksum mismatch")
+                break
+            yield kind, payload
+            pos = end
+        del view, mapped
+
+
+def frame_sections(payload: memoryview | bytes) -> tuple[memoryview, memoryview]:
+    """
+    (bookings, events) codec frames of a FRAME payload, as views; an empty
+    view means the batch had no records of that type.
+    """
+    view = memoryview(payload)
+    (length,) = _SECTIONS.unpack_from(view)
+    start = _SECTIONS.size
+    if start + length > len(view):
+        raise ValueError("Bookings section overruns the frame")
+    return view[start : start + length], view[start + length :]
+
+
+@dataclass(frozen=True, slots=True)
+class RecoveryStats:
+    events: int
+    bookings: int
+
+
+def recover(
+    directory: str,
+    repository: BookingRepository | None = None,
+    allocator: BaseDriverAllocator | None = None,
+    on_event: Callable[[Event], None] | None = None,
+) -> RecoveryStats:
+    """
+    Replay a journal to rebuild repository and allocator state.
+
+    Within a frame, its bookings are applied before its events are
+    passed to `on_event`. Without `on_event`, event bodies are not decoded,
+    only counted.
+    """
+    events = bookings = 0
+
+    def apply_booking(booking: Booking) -> None:
+        if repository is not None:
+            repository.save(booking)
+        if allocator is not None:
+            allocator.restore(booking)
+
+    for _, payload in iter_records(directory):
+        booking_section, event_section = frame_sections(payload)
+        if booking_section:
+            for booking in codec.decode_many(booking_section):
+                bookings += 1
+                apply_booking(booking)  # type: ignore[arg-type]
+        if event_section:
+            if on_event is None:
+                events += codec.frame_count(event_section)
+            else:
+                for event in codec.decode_many(event_section):
+                    events += 1
+                    on_event(event)  # type: ignore[arg-type]
+    return RecoveryStats(events=events, bookings=bookings)
+
+
+_KINDS = frozenset(RecordKind)
+
+
+def _encode_frame(records: Iterable[Booking | Event]) -> bytes:
+    bookings: list[Booking] = []
+    events: list[Event] = []
+    for record in records:
+        (bookings if type(record) is Booking else events).append(record)
+    # Bearer tokens are never persisted.
+    booking_section = codec.encode_many(bookings, include_tokens=False) if bookings else b""
+    event_section = codec.encode_many(events, include_tokens=False) if events else b""
+    return _SECTIONS.pack(len(booking_section)) + booking_section + event_section
+
+
+def _torn(path: str, pos: int, reason: str) -> None:
+    logging.getLogger("mini_cab_booking").warning(
+        "journal %s: ignoring tail from byte %d (%s)", path, pos, reason
+    )
+
+
+def _segment_no(path: str) -> int:
+    return int(os.path.basename(path)[: -len(_SEGMENT_SUFFIX)])
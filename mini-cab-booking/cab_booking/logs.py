@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Iterable, Mapping
+
+# Attributes every LogRecord has; anything else came in through `extra`.
+_RESERVED = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks: when the bounded queue is full the record
+    is dropped and counted. The next record that fits is preceded by a
+    "log_records_dropped" summary, so gaps are visible in the output too.
+
+    Records are enqueued as-is and formatted by the listener thread, so the
+    calling thread pays only for the filter checks and one put_nowait().
+    """
+
+    def __init__(self, q: queue.Queue) -> None:
+        super().__init__(q)
+        self._lock = threading.Lock()
+        self.dropped = 0
+        self._unreported = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self._unreported and not self._report_drops(record):
+            self._drop()
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._drop()
+
+    def _drop(self) -> None:
+        with self._lock:
+            self.dropped += 1
+            self._unreported += 1
+
+    def _report_drops(self, record: logging.LogRecord) -> bool:
+        with self._lock:
+            count, self._unreported = self._unreported, 0
+        summary = logging.makeLogRecord(
+            {
+                "name": record.name,
+                "levelno": logging.WARNING,
+                "levelname": "WARNING",
+                "msg": "log_records_dropped",
+                "event": "log_records_dropped",
+                "fields": {"count": count},
+            }
+        )
+        try:
+            self.queue.put_nowait(summary)
+            return True
+        except queue.Full:
+            with self._lock:
+                self._unreported += count
+            return False
+
+
+class LogSampler:
+    """
+    Per-event sampling plus a global token-bucket rate limit.
+
+    allow(event) keeps a record with probability `rates.get(event, default)`
+    and then only if the bucket (`rate_limit` records/s, bursts up to
+    `burst`) has a token. Callers check it before building a record, so a
+    sampled-out event costs one dict lookup, one random() and a counter
+    increment under the lock.
+    """
+
+    def __init__(
+        self,
+        rates: Mapping[str, float] | None = None,
+        default: float = 1.0,
+        rate_limit: float | None = None,
+        burst: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if rate_limit is not None and rate_limit <= 0:
+            raise ValueError("rate_limit must be > 0")
+        self._rates = dict(rates or {})
+        self._default = default
+        self._rate_limit = rate_limit
+        self._burst = float(burst if burst is not None else max(1, int(rate_limit or 1)))
+        self._tokens = self._burst
+        self._last = clock()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.sampled_out = 0
+        self.rate_limited = 0
+
+    def allow(self, event: str) -> bool:
+        rate = self._rates.get(event, self._default)
+        if rate < 1.0 and random.random() >= rate:
+            with self._lock:
+                self.sampled_out += 1
+            return False
+        if self._rate_limit is None:
+            return True
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self._burst, self._tokens + (now - self._last) * self._rate_limit)
+            self._last = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            self.rate_limited += 1
+            return False
+
+
+class SamplingFilter(logging.Filter):
+    """
+    logging.Filter adapter over LogSampler for records not logged through
+    LoggedFacade; the event is `record.event` or else the raw message.
+    """
+
+    def __init__(self, sampler: LogSampler) -> None:
+        super().__init__()
+        self._sampler = sampler
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return self._sampler.allow(getattr(record, "event", None) or str(record.msg))
+
+
+class KeyValueFormatter(logging.Formatter):
+    """
+    `ts=... level=INFO logger=... event=... key=value ...` (logfmt-style).
+
+    Structured fields come from `extra={"event": ..., "fields": {...}}`;
+    other records are rendered with msg="...".
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        parts = [
+            f"ts={record.created:.6f}",
+            f"level={record.levelname}",
+            f"logger={record.name}",
+        ]
+        for key, value in _fields(record).items():
+            parts.append(f"{key}={_logfmt(value)}")
+        if record.exc_info:
+            parts.append(f"exc={_logfmt(self.formatException(record.exc_info))}")
+        return " ".join(parts)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record, with the same keys as KeyValueFormatter.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        body: dict[str, Any] = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        body.update(_fields(record))
+        if record.exc_info:
+            body["exc"] = self.formatException(record.exc_info)
+        return json.dumps(body, separators=(",", ":"), default=str)
+
+
+@dataclass(frozen=True, slots=True)
+class LoggingStats:
+    queue_depth: int
+    dropped: int
+
+
+class NonBlockingLogging:
+    """
+    Routes a logger through a bounded queue to a background QueueListener
+    that owns the real (file/stream) handlers.
+
+    The logger's existing handlers are replaced by one DroppingQueueHandler
+    and restored by stop(). `formatter` is applied to the target handlers,
+    so formatting also happens on the listener thread. Sampling is up to the
+    caller (LoggedFacade(sampler=...) or a SamplingFilter on the logger).
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        handlers: Iterable[logging.Handler],
+        *,
+        maxsize: int = 10_000,
+        formatter: logging.Formatter | None = None,
+    ) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be > 0")
+        self._logger = logger
+        self._handlers = list(handlers)
+        if formatter is not None:
+            for handler in self._handlers:
+                handler.setFormatter(formatter)
+        self._queue: queue.Queue = queue.Queue(maxsize)
+        self.handler = DroppingQueueHandler(self._queue)
+        self._listener = QueueListener(
+            self._queue, *self._handlers, respect_handler_level=True
+        )
+        self._saved: tuple[list[logging.Handler], bool] | None = None
+
+    def start(self) -> "NonBlockingLogging":
+        if self._saved is None:
+            self._saved = (list(self._logger.handlers), self._logger.propagate)
+            for handler in self._saved[0]:
+                self._logger.removeHandler(handler)
+            self._logger.addHandler(self.handler)
+            self._logger.propagate = False
+            self._listener.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Detach from the logger, then write out everything still queued.
+        """
+        if self._saved is None:
+            return
+        self._logger.removeHandler(self.handler)
+        handlers, propagate = self._saved
+        for handler in handlers:
+            self._logger.addHandler(handler)
+        self._logger.propagate = propagate
+        self._saved = None
+        self._listener.stop()
+
+    def stats(self) -> LoggingStats:
+        return LoggingStats(queue_depth=self._queue.qsize(), dropped=self.handler.dropped)
+
+    def __enter__(self) -> "NonBlockingLogging":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+
+def _fields(record: logging.LogRecord) -> dict[str, Any]:
+    fields: dict[str, Any] = {}
+    event = getattr(record, "event", None)
+    if event is not None:
+        fields["event"] = event
+        fields.update(getattr(record, "fields", None) or {})
+    else:
+        fields["msg"] = record.getMessage()
+    for key, value in vars(record).items():
+        if key not in _RESERVED and key not in ("event", "fields"):
+            fields[key] = value
+    return fields
+
+
+def _logfmt(value: Any) -> str:
+    text = "null" if value is None else str(value)
+    if text and not any(c in text for c in ' ="\n\\'):
+        return text
+    return json.dumps(text)
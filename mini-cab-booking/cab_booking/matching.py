@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Sequence
+
+from .facade import CabBookingFacade
+from .models import Booking, BookingResult, RideRequest
+from .services import NearestDriverAllocator
+
+# Candidate edges of one request: (driver index, integer cost).
+Candidates = Sequence[tuple[int, int]]
+
+UNMATCHED = -1
+
+
+def auction(
+    candidates: Sequence[Candidates],
+    unmatched_cost: int,
+    epsilon: float = 1.0,
+    scale: float = 5.0,
+    deadline: float | None = None,
+) -> list[int]:
+    """
+    Min-cost assignment of requests to drivers on a sparse candidate graph,
+    solved with Bertsekas' forward auction and epsilon-scaling.
+
+    Returns the driver index for each request, or UNMATCHED where leaving it
+    unserved (at `unmatched_cost`) is cheaper overall. The total cost is
+    within (requests + drivers) * epsilon of the optimum; with integer costs
+    and a smaller epsilon than 1 / (requests + drivers) it is optimal.
+
+    To let prices carry over between scaling phases the problem is made
+    square: request i may also take its private dummy object (at
+    `unmatched_cost`), and each driver j gets a slack bidder that takes
+    either j itself or the dummy of a request adjacent to j (at 0), i.e. a
+    driver left unassigned.
+
+    Every scaling phase ends with a complete assignment. Once `deadline` (a
+    time.monotonic() value) has passed, no further phase starts and the
+    last one's assignment is returned: within (requests + drivers) * eps of
+    the optimum for that phase's eps instead of `epsilon`.
+    """
+    if epsilon <= 0 or scale <= 1:
+        raise ValueError("epsilon must be > 0 and scale > 1")
+    n = len(candidates)
+    drivers = 1 + max((j for edges in candidates for j, _ in edges), default=-1)
+    # Objects: drivers 0..m-1, then the dummy of request i at m + i.
+    # Bidders: requests 0..n-1, then the slack of driver j at n + j.
+    # Edges hold benefits (negated costs), so a bid compares benefit - price.
+    edges: list[list[tuple[int, int]]] = []
+    slack: list[list[tuple[int, int]]] = [[(j, 0)] for j in range(drivers)]
+    bidders: list[int] = []
+    total = count = 0
+    for i, row in enumerate(candidates):
+        dummy = drivers + i
+        benefits = [(j, -cost) for j, cost in row]
+        benefits.append((dummy, -unmatched_cost))
+        edges.append(benefits)
+        if row:
+            bidders.append(i)
+            for j, cost in row:
+                slack[j].append((dummy, 0))
+                total += cost
+            count += len(row)
+    edges.extend(slack)
+    bidders.extend(n + j for j in range(drivers) if len(slack[j]) > 1)
+
+    prices = [0.0] * (drivers + n)
+    assigned = [-1] * (n + drivers)
+    owner = [-1] * (drivers + n)
+    stack = bidders[::-1]
+    pop, push = stack.pop, stack.append
+    # Starting near the typical gap between candidates avoids both long
+    # price wars (eps too small) and overshooting prices (eps too large).
+    eps = max(epsilon, total / max(1, count) / scale)
+    while True:
+        while stack:
+            i = pop()
+            best_j = -1
+            best = second = -math.inf
+            for j, benefit in edges[i]:
+                value = benefit - prices[j]
+                if value > second:
+                    if value > best:
+                        second = best
+                        best = value
+                        best_j = j
+                    else:
+                        second = value
+            # Bid up to where the runner-up would be as good, plus eps.
+            prices[best_j] += best - second + eps
+            assigned[i] = best_j
+            previous = owner[best_j]
+            owner[best_j] = i
+            if previous >= 0:
+                push(previous)
+        if eps <= epsilon or (deadline is not None and time.monotonic() >= deadline):
+            break
+        eps = max(epsilon, eps / scale)
+        # Next phase: only bidders that are not eps-happy any more bid again.
+        for i in bidders:
+            j = assigned[i]
+            mine = best = -math.inf
+            for k, benefit in edges[i]:
+                value = benefit - prices[k]
+                if k == j:
+                    mine = value
+                elif value > best:
+                    best = value
+            if mine < best - eps:
+                owner[j] = -1
+                push(i)
+        stack.reverse()
+    return [j if 0 <= j < drivers else UNMATCHED for j in assigned[:n]]
+
+
+@dataclass(frozen=True, slots=True)
+class MatchResult:
+    drivers: list[str | None]  # driver id per request, None if unmatched
+    matched: int  # requests given a driver
+    pickup_km: float  # total pickup distance of the matched requests
+    edges: int  # candidate pairs considered
+
+
+class BatchMatcher:
+    """
+    Window-based batch dispatch: requests are collected for `window_s`
+    seconds, then matched to free drivers all at once by minimising the
+    total pickup distance instead of greedily giving each request its
+    nearest driver in arrival order.
+
+    - The cost graph stays sparse: each request only considers its
+      `candidates` nearest free drivers within `max_pickup_km`, found with
+      the allocator's spatial index.
+    - The assignment is solved with auction(); costs are whole metres and
+      leaving a request unmatched costs more than any allowed pickup, so a
+      request goes unserved only if serving it would take its driver from a
+      request that has no other option.
+    - match() gets `match_budget_s` (default: half the window), candidate
+      search included; the auction stops refining once it is spent, so
+      matching plus booking keeps up with the window at the price of a
+      slightly costlier assignment.
+    - Matched pairs are booked through CabBookingFacade.book_assigned(),
+      i.e. BookingService claims exactly the chosen driver. Requests left
+      unmatched, or whose driver was taken in the meantime, are carried
+      into the next window, up to `max_windows` windows in total, and then
+      fail with LookupError.
+
+    submit() returns a Future per request. start() runs flush() every
+    `window_s` on a background thread; without it, call flush() yourself.
+    """
+
+    def __init__(
+        self,
+        facade: CabBookingFacade,
+        allocator: NearestDriverAllocator,
+        *,
+        window_s: float = 2.0,
+        candidates: int = 8,
+        max_pickup_km: float = 5.0,
+        max_windows: int = 3,
+        epsilon: float = 1.0,
+        match_budget_s: float | None = None,
+    ) -> None:
+        if window_s <= 0:
+            raise ValueError("window_s must be > 0")
+        if match_budget_s is not None and match_budget_s <= 0:
+            raise ValueError("match_budget_s must be > 0")
+        if candidates <= 0 or max_windows <= 0:
+            raise ValueError("candidates and max_windows must be > 0")
+        self._facade = facade
+        self._allocator = allocator
+        self._window_s = window_s
+        self._k = candidates
+        self._max_pickup_km = max_pickup_km
+        self._max_windows = max_windows
+        self._epsilon = epsilon
+        self._match_budget_s = window_s / 2 if match_budget_s is None else match_budget_s
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # (request, future, windows waited so far)
+        self._pending: list[tuple[RideRequest, Future, int]] = []
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+        self._logger = logging.getLogger("mini_cab_booking")
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def submit(self, request: RideRequest) -> "Future[Booking]":
+        future: Future[Booking] = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BatchMatcher is closed")
+            self._pending.append((request, future, 0))
+        return future
+
+    def match(self, requests: Sequence[RideRequest]) -> MatchResult:
+        """
+        Choose a driver for each request without claiming anyone, within
+        the match budget.
+        """
+        deadline = time.monotonic() + self._match_budget_s
+        ids: dict[str, int] = {}
+        names: list[str] = []
+        graph: list[list[tuple[int, int]]] = []
+        candidates = self._allocator.candidates
+        k, max_km = self._k, self._max_pickup_km
+        for request in requests:
+            edges = []
+            for driver_id, km in candidates(request.pickup, k, max_km):
+                j = ids.get(driver_id)
+                if j is None:
+                    j = ids[driver_id] = len(names)
+                    names.append(driver_id)
+                edges.append((j, int(km * 1000)))
+            graph.append(edges)
+        unmatched_cost = int(max_km * 1000) + 1 if max_km != float("inf") else 10**9
+        assigned = auction(graph, unmatched_cost, self._epsilon, deadline=deadline)
+        drivers: list[str | None] = []
+        metres = matched = 0
+        for edges, j in zip(graph, assigned):
+            if j == UNMATCHED:
+                drivers.append(None)
+                continue
+            drivers.append(names[j])
+            matched += 1
+            for jj, cost in edges:
+                if jj == j:
+                    metres += cost
+                    break
+        return MatchResult(
+            drivers=drivers,
+            matched=matched,
+            pickup_km=metres / 1000,
+            edges=sum(len(edges) for edges in graph),
+        )
+
+    def flush(self) -> list[BookingResult]:
+        """
+        Match and book everything collected so far; returns one result per
+        booking attempt (unmatched requests make none).
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return []
+            try:
+                drivers = self.match([request for request, _, _ in batch]).drivers
+                results = self._facade.book_assigned(
+                    (request, driver_id)
+                    for (request, _, _), driver_id in zip(batch, drivers)
+                    if driver_id is not None
+                )
+            except BaseException as exc:
+                for _, future, _ in batch:
+                    future.set_exception(exc)
+                raise
+            outcomes = iter(results)
+            carried: list[tuple[RideRequest, Future, int]] = []
+            for (request, future, waited), driver_id in zip(batch, drivers):
+                error: BaseException | None = LookupError("No drivers available")
+                if driver_id is not None:
+                    result = next(outcomes)
+                    if result.error is None:
+                        future.set_result(result.booking)
+                        continue
+                    error = result.error
+                if isinstance(error, LookupError) and waited + 1 < self._max_windows:
+                    carried.append((request, future, waited + 1))
+                else:
+                    future.set_exception(error)
+            if carried:
+                with self._lock:
+                    # Carried requests are older, so they go first.
+                    self._pending[:0] = carried
+            return results
+
+    def start(self) -> "BatchMatcher":
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="batch-matcher", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def close(self) -> None:
+        """
+        Stop the window thread, then settle what is still pending: one last
+        match, and LookupError for whatever that leaves unmatched.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+        with self._lock:
+            batch, self._pending = self._pending, []
+        for _, future, _ in batch:
+            future.set_exception(LookupError("No drivers available"))
+
+    def __enter__(self) -> "BatchMatcher":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._window_s):
+            try:
+                self.flush()
+            except Exception:
+                # The batch's futures already carry the error.
+                self._logger.exception("Batch matching failed")
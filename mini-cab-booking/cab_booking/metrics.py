@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from time import perf_counter_ns
+from typing import Callable, Iterable, TypeVar
+
+T = TypeVar("T")
+
+# Log-linear (HDR-style) buckets: 2**_SUB_BITS linear sub-buckets per power of
+# two, i.e. <= 1/16 (~6%) relative error, over the full int64 ns range.
+_SUB_BITS = 4
+_SUB = 1 << _SUB_BITS
+_BUCKETS = _SUB * (64 - _SUB_BITS + 1)
+
+STAGES = ("pricing", "allocate", "payment_create", "payment_pay", "publish")
+
+# Fixed `le` ladder of the Prometheus exposition: 1-2-5 steps from 1 us to
+# 10 s. Every scrape emits every bound (histogram_quantile() needs a stable
+# series set); an HDR bucket straddling a bound counts towards the next one.
+_EXPORT_BOUNDS_NS = tuple(m * 10**e for e in range(3, 10) for m in (1, 2, 5)) + (10**10,)
+
+
+def bucket_index(value_ns: int) -> int:
+    if value_ns < _SUB:
+        return max(value_ns, 0)
+    shift = value_ns.bit_length() - _SUB_BITS - 1
+    return _SUB * (shift + 1) + ((value_ns >> shift) - _SUB)
+
+
+def bucket_upper_ns(index: int) -> int:
+    """
+    Largest value (inclusive) that lands in bucket `index`.
+    """
+    if index < _SUB:
+        return index
+    shift = index // _SUB - 1
+    return (((index % _SUB) + _SUB + 1) << shift) - 1
+
+
+@dataclass(frozen=True, slots=True)
+class HistogramSnapshot:
+    counts: tuple[int, ...]
+    count: int
+    total_ns: int
+
+    def quantile(self, q: float) -> int:
+        """
+        Upper bound (ns) of the bucket holding the q-quantile (0 < q <= 1).
+        """
+        if self.count == 0:
+            return 0
+        rank = max(1, round(q * self.count))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return bucket_upper_ns(index)
+        return bucket_upper_ns(len(self.counts) - 1)
+
+
+class LatencyHistogram:
+    """
+    Per-thread HDR-style latency histogram.
+
+    record() only touches the calling thread's own shard, so the hot path
+    takes no lock; snapshot() merges all shards (counts may be a few records
+    behind for threads that are recording concurrently).
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._shards: list[list[int]] = []
+        self._shards_lock = threading.Lock()
+
+    def record(self, value_ns: int) -> None:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._new_shard()
+        shard[bucket_index(value_ns)] += 1
+        # Two trailing slots hold count and sum.
+        shard[_BUCKETS] += 1
+        shard[_BUCKETS + 1] += value_ns
+
+    def snapshot(self) -> HistogramSnapshot:
+        merged = [0] * (_BUCKETS + 2)
+        with self._shards_lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for i, n in enumerate(shard):
+                if n:
+                    merged[i] += n
+        return HistogramSnapshot(
+            counts=tuple(merged[:_BUCKETS]),
+            count=merged[_BUCKETS],
+            total_ns=merged[_BUCKETS + 1],
+        )
+
+    def _new_shard(self) -> list[int]:
+        shard = [0] * (_BUCKETS + 2)
+        self._local.shard = shard
+        with self._shards_lock:
+            self._shards.append(shard)
+        return shard
+
+
+class LabeledCounter:
+    """
+    Per-thread counter keyed by a label tuple (e.g. (payment_type, outcome)).
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._shards: list[dict[tuple[str, ...], int]] = []
+        self._shards_lock = threading.Lock()
+
+    def inc(self, labels: tuple[str, ...], n: int = 1) -> None:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+        shard[labels] = shard.get(labels, 0) + n
+
+    def snapshot(self) -> dict[tuple[str, ...], int]:
+        merged: dict[tuple[str, ...], int] = {}
+        with self._shards_lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for labels, n in list(shard.items()):
+                merged[labels] = merged.get(labels, 0) + n
+        return merged
+
+
+class BookingMetrics:
+    """
+    Per-stage latency histograms plus booking outcome counters.
+
+    Shared by CabBookingFacade (stage timings) and InstrumentedFacade
+    (end-to-end latency and outcomes). Setting `enabled = False` turns every
+    recording site into a single attribute check.
+    """
+
+    def __init__(self, enabled: bool = True, namespace: str = "cab_booking") -> None:
+        self.enabled = enabled
+        self._namespace = namespace
+        self._stages = {stage: LatencyHistogram() for stage in STAGES}
+        self._total = LatencyHistogram()
+        self._outcomes = LabeledCounter()
+
+    def observe(self, stage: str, elapsed_ns: int) -> None:
+        self._stages[stage].record(elapsed_ns)
+
+    def observe_booking(self, elapsed_ns: int, payment_type: str, outcome: str) -> None:
+        self._total.record(elapsed_ns)
+        self._outcomes.inc((payment_type, outcome))
+
+    def timed(self, stage: str, fn: Callable[[T], None]) -> Callable[[T], None]:
+        """
+        Wrap a one-argument callable (e.g. an event emitter) so each call is
+        recorded under `stage`.
+        """
+        record = self._stages[stage].record
+
+        def wrapper(arg: T) -> None:
+            start = perf_counter_ns()
+            fn(arg)
+            record(perf_counter_ns() - start)
+
+        return wrapper
+
+    def stage(self, stage: str) -> HistogramSnapshot:
+        return self._stages[stage].snapshot()
+
+    def total(self) -> HistogramSnapshot:
+        return self._total.snapshot()
+
+    def outcomes(self) -> dict[tuple[str, ...], int]:
+        return self._outcomes.snapshot()
+
+    def to_prometheus(self) -> str:
+        """
+        Render a snapshot in the Prometheus text exposition format.
+        """
+        ns = self._namespace
+        lines: list[str] = [
+            f"# HELP {ns}_stage_latency_seconds Latency of one booking stage.",
+            f"# TYPE {ns}_stage_latency_seconds histogram",
+        ]
+        for stage in STAGES:
+            lines.extend(
+                _histogram_lines(
+                    f"{ns}_stage_latency_seconds", f'stage="{stage}"', self.stage(stage)
+                )
+            )
+        lines += [
+            f"# HELP {ns}_booking_latency_seconds End-to-end book_ride latency.",
+            f"# TYPE {ns}_booking_latency_seconds histogram",
+        ]
+        lines.extend(_histogram_lines(f"{ns}_booking_latency_seconds", "", self.total()))
+        lines += [
+            f"# HELP {ns}_bookings_total Bookings by payment type and outcome.",
+            f"# TYPE {ns}_bookings_total counter",
+        ]
+        for (payment_type, outcome), n in sorted(self.outcomes().items()):
+            lines.append(
+                f'{ns}_bookings_total{{payment_type="{_escape(payment_type)}",'
+                f'outcome="{_escape(outcome)}"}} {n}'
+            )
+        return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(name: str, labels: str, snap: HistogramSnapshot) -> Iterable[str]:
+    sep = "," if labels else ""
+    counts = snap.counts
+    cumulative = index = 0
+    for bound in _EXPORT_BOUNDS_NS:
+        while index < len(counts) and bucket_upper_ns(index) <= bound:
+            cumulative += counts[index]
+            index += 1
+        yield f'{name}_bucket{{{labels}{sep}le="{bound / 1e9:.9g}"}} {cumulative}'
+    yield f'{name}_bucket{{{labels}{sep}le="+Inf"}} {snap.count}'
+    label_block = f"{{{labels}}}" if labels else ""
+    yield f"{name}_sum{label_block} {snap.total_ns / 1e9:.9g}"
+    yield f"{name}_count{label_block} {snap.count}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
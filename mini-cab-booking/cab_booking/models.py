@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from decimal import Decimal
+import time
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any
-from uuid import uuid4
+from typing import Any, Iterable, Mapping
+
+from .ids import IdGenerator, SnowflakeIdGenerator
+from .money import Money
 
 
 @dataclass(frozen=True, slots=True)
@@ -25,12 +27,22 @@ class Driver:
     name: str
 
 
+class DriverStatus(str, Enum):
+    AVAILABLE = "AVAILABLE"
+    EN_ROUTE = "EN_ROUTE"  # assigned, heading to the pickup
+    ON_TRIP = "ON_TRIP"
+    OFFLINE = "OFFLINE"
+
+
 class BookingStatus(str, Enum):
     CREATED = "CREATED"
     DRIVER_ASSIGNED = "DRIVER_ASSIGNED"
     PAYMENT_PENDING = "PAYMENT_PENDING"
     CONFIRMED = "CONFIRMED"
     FAILED = "FAILED"
+    IN_PROGRESS = "IN_PROGRESS"
+    COMPLETED = "COMPLETED"
+    CANCELLED = "CANCELLED"
 
 
 class PaymentStatus(str, Enum):
@@ -38,6 +50,13 @@ class PaymentStatus(str, Enum):
     FAILED = "FAILED"
 
 
+# Keys a record needs for from_mapping(); rider_name, payment_details and
+# auth_token are optional.
+_RECORD_KEYS = frozenset(
+    ("rider_id", "pickup_lat", "pickup_lng", "drop_lat", "drop_lng", "distance_km", "payment_type")
+)
+
+
 @dataclass(frozen=True, slots=True)
 class RideRequest:
     rider: Rider
@@ -48,11 +67,106 @@ class RideRequest:
     payment_details: dict[str, Any]
     auth_token: str | None = None
 
+    @classmethod
+    def from_mapping(
+        cls,
+        row: Mapping[str, Any],
+        riders: dict[tuple[str, str], Rider] | None = None,
+    ) -> "RideRequest":
+        """
+        Build from a flat record (rider_id, rider_name, pickup_lat/lng,
+        drop_lat/lng, distance_km, payment_type, payment_details, auth_token)
+        without a RideRequestBuilder; missing fields raise the same ValueError
+        as build().
+
+        payment_details is adopted, not copied: the caller hands the dict
+        over. `riders` is a cache that makes repeated riders share one Rider.
+        """
+        if not row.keys() >= _RECORD_KEYS:
+            _raise_missing(row)
+        key = (row["rider_id"], row.get("rider_name", ""))
+        rider = riders.get(key) if riders is not None else None
+        if rider is None:
+            rider = Rider(rider_id=key[0], name=key[1])
+            if riders is not None:
+                riders[key] = rider
+        details = row.get("payment_details")
+        return cls(
+            rider,
+            Location(row["pickup_lat"], row["pickup_lng"]),
+            Location(row["drop_lat"], row["drop_lng"]),
+            float(row["distance_km"]),
+            str(row["payment_type"]),
+            {} if details is None else details,
+            row.get("auth_token"),
+        )
+
+    @classmethod
+    def from_records(
+        cls,
+        rows: Iterable[Mapping[str, Any]],
+        riders: dict[tuple[str, str], Rider] | None = None,
+    ) -> list["RideRequest"]:
+        """
+        Bulk from_mapping(): the whole batch is validated up front (one key-set
+        check per row) and repeated riders share one Rider. The first invalid
+        row raises build()'s ValueError, with a note naming its index.
+        """
+        rows = rows if isinstance(rows, list) else list(rows)
+        required = _RECORD_KEYS
+        for index, row in enumerate(rows):
+            if not row.keys() >= required:
+                try:
+                    _raise_missing(row)
+                except ValueError as exc:
+                    exc.add_note(f"record {index}")
+                    raise
+        if riders is None:
+            riders = {}
+        new = cls
+        out: list[RideRequest] = []
+        append = out.append
+        for row in rows:
+            get = row.get
+            key = (row["rider_id"], get("rider_name", ""))
+            rider = riders.get(key)
+            if rider is None:
+                rider = riders[key] = Rider(key[0], key[1])
+            details = get("payment_details")
+            append(
+                new(
+                    rider,
+                    Location(row["pickup_lat"], row["pickup_lng"]),
+                    Location(row["drop_lat"], row["drop_lng"]),
+                    float(row["distance_km"]),
+                    str(row["payment_type"]),
+                    {} if details is None else details,
+                    get("auth_token"),
+                )
+            )
+        return out
+
+
+def _raise_missing(row: Mapping[str, Any]) -> None:
+    # Field names and message match RideRequestBuilder.build().
+    missing: list[str] = []
+    if "rider_id" not in row:
+        missing.append("rider")
+    if "pickup_lat" not in row or "pickup_lng" not in row:
+        missing.append("pickup")
+    if "drop_lat" not in row or "drop_lng" not in row:
+        missing.append("drop")
+    if "distance_km" not in row:
+        missing.append("distance_km")
+    if "payment_type" not in row:
+        missing += ("payment_type", "payment_details")
+    raise ValueError(f"RideRequestBuilder missing fields: {', '.join(missing)}")
+
 
 @dataclass(frozen=True, slots=True)
 class PaymentReceipt:
     receipt_id: str
-    amount: Decimal
+    amount: Money
     status: PaymentStatus
     method: str
 
@@ -61,12 +175,43 @@ class PaymentReceipt:
 class Booking:
     booking_id: str
     request: RideRequest
-    fare: Decimal
+    fare: Money
     status: BookingStatus
     driver: Driver | None = None
     payment: PaymentReceipt | None = None
+    created_at: float = field(default_factory=time.time)
+
+
+@dataclass(frozen=True, slots=True)
+class BookingResult:
+    """
+    Per-request outcome of a batch booking: either a Booking or the error raised.
+    """
+
+    request: RideRequest
+    booking: Booking | None = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+_id_generator: IdGenerator = SnowflakeIdGenerator()
+
+
+def set_id_generator(generator: IdGenerator) -> None:
+    """
+    Swap the process-wide id scheme (e.g. UuidIdGenerator for the old ids).
+    """
+    global _id_generator
+    _id_generator = generator
 
 
 def new_id(prefix: str) -> str:
-    return f"{prefix}_{uuid4().hex[:10]}"
+    return _id_generator.new(prefix)
+
+
+def new_ids(prefix: str, n: int) -> list[str]:
+    return _id_generator.bulk(prefix, n)
 
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from decimal import Decimal, ROUND_HALF_UP
+
+DEFAULT_CURRENCY = "INR"
+MINOR_PER_MAJOR = 100
+
+_CENT = Decimal("0.01")
+
+
+class Money:
+    """
+    Fixed-point amount: integer minor units (paise) plus an ISO currency code.
+
+    Arithmetic stays in ints; Decimal is only used when converting at the
+    edges (from_decimal / parse / to_decimal).
+
+    A hand-written __slots__ class rather than a frozen dataclass: it is built
+    for every fare and receipt, and frozen construction costs ~2.5x more.
+    Treat instances as immutable.
+    """
+
+    __slots__ = ("minor", "currency")
+
+    def __init__(self, minor: int, currency: str = DEFAULT_CURRENCY) -> None:
+        self.minor = minor
+        self.currency = currency
+
+    @classmethod
+    def from_decimal(cls, amount: Decimal, currency: str = DEFAULT_CURRENCY) -> "Money":
+        minor = (amount * MINOR_PER_MAJOR).to_integral_value(rounding=ROUND_HALF_UP)
+        return cls(int(minor), currency)
+
+    @classmethod
+    def parse(cls, text: object, currency: str = DEFAULT_CURRENCY) -> "Money":
+        """
+        Parse a decimal amount such as "120.5" (rounded half-up to paise).
+        """
+        return cls.from_decimal(Decimal(str(text)), currency)
+
+    def to_decimal(self) -> Decimal:
+        return (Decimal(self.minor) / MINOR_PER_MAJOR).quantize(_CENT)
+
+    def __repr__(self) -> str:
+        return f"Money({self}, {self.currency!r})"
+
+    def __str__(self) -> str:
+        minor = self.minor
+        if minor < 0:
+            return "-%d.%02d" % divmod(-minor, MINOR_PER_MAJOR)
+        return "%d.%02d" % divmod(minor, MINOR_PER_MAJOR)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.minor == other.minor and self.currency == other.currency
+
+    def __hash__(self) -> int:
+        return hash((self.minor, self.currency))
+
+    def __lt__(self, other: "Money") -> bool:
+        self._check(other)
+        return self.minor < other.minor
+
+    def __le__(self, other: "Money") -> bool:
+        self._check(other)
+        return self.minor <= other.minor
+
+    def __gt__(self, other: "Money") -> bool:
+        self._check(other)
+        return self.minor > other.minor
+
+    def __ge__(self, other: "Money") -> bool:
+        self._check(other)
+        return self.minor >= other.minor
+
+    def __add__(self, other: "Money") -> "Money":
+        self._check(other)
+        return Money(self.minor + other.minor, self.currency)
+
+    def __sub__(self, other: "Money") -> "Money":
+        self._check(other)
+        return Money(self.minor - other.minor, self.currency)
+
+    def __neg__(self) -> "Money":
+        return Money(-self.minor, self.currency)
+
+    def __mul__(self, factor: int) -> "Money":
+        if not isinstance(factor, int):
+            return NotImplemented
+        return Money(self.minor * factor, self.currency)
+
+    __rmul__ = __mul__
+
+    def __bool__(self) -> bool:
+        return self.minor != 0
+
+    def _check(self, other: object) -> None:
+        if not isinstance(other, Money):
+            raise TypeError(f"Expected Money, got {type(other).__name__}")
+        if self.currency != other.currency:
+            raise ValueError(f"Currency mismatch: {self.currency} vs {other.currency}")
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+import logging
+import queue
+import threading
+import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Any, DefaultDict
+from enum import Enum
+from typing import Any, Callable, Iterable
 
 
 @dataclass(frozen=True, slots=True)
@@ -20,18 +25,274 @@ class Observer(ABC):
 class EventBus:
     """
     Observer pattern: decouple booking/payment flow from notifications/logging.
+
+    Subscriptions are compiled into a dispatch table (event type -> observer
+    tuple). Patterns ending in "*" ("BOOKING_*", or "*" for every event) are
+    matched when a table entry is built - on subscribe for types already
+    seen, on first publish for new ones - never per publish. The table is
+    replaced under a lock on subscribe (copy-on-write), so publish() reads
+    it from any thread without locking or copying.
     """
 
     def __init__(self) -> None:
-        self._subscribers: DefaultDict[str, list[Observer]] = DefaultDict(list)
+        self._subscriptions: tuple[tuple[str, Observer], ...] = ()
+        self._dispatch: dict[str, tuple[Observer, ...]] = {}
+        self._subscribe_lock = threading.Lock()
 
     def subscribe(self, event_type: str, observer: Observer) -> None:
-        self._subscribers[event_type].append(observer)
+        """
+        Subscribe to one event type, or to a prefix pattern such as "BOOKING_*".
+        """
+        if "*" in event_type[:-1]:
+            raise ValueError("Wildcard '*' is only supported at the end of a pattern")
+        with self._subscribe_lock:
+            self._subscriptions += ((event_type, observer),)
+            dispatch = {t: _match(self._subscriptions, t) for t in self._dispatch}
+            if not event_type.endswith("*"):
+                dispatch[event_type] = _match(self._subscriptions, event_type)
+            self._dispatch = dispatch
+
+    def has_subscribers(self, event_type: str) -> bool:
+        """
+        Cheap check publishers use to skip building unobserved events.
+        """
+        return bool(self._observers(event_type))
 
     def publish(self, event: Event) -> None:
-        for observer in list(self._subscribers.get(event.event_type, [])):
+        for observer in self._observers(event.event_type):
             observer.on_event(event)
 
+    def publish_lazy(
+        self, event_type: str, build_payload: Callable[[], dict[str, Any]]
+    ) -> None:
+        """
+        Publish an event whose payload is only built if someone subscribes.
+        """
+        if self.has_subscribers(event_type):
+            self.publish(Event(event_type=event_type, payload=build_payload()))
+
+    def publish_many(self, events: Iterable[Event]) -> None:
+        """
+        Deliver events in order.
+        """
+        observers_of = self._observers
+        for event in events:
+            for observer in observers_of(event.event_type):
+                observer.on_event(event)
+
+    def _observers(self, event_type: str) -> tuple[Observer, ...]:
+        observers = self._dispatch.get(event_type)
+        if observers is None:
+            observers = self._resolve(event_type)
+        return observers
+
+    def _resolve(self, event_type: str) -> tuple[Observer, ...]:
+        # First sighting of a type: match it once and publish a new table
+        # with it (copy-on-write, like subscribe), never mutating the one
+        # readers may hold.
+        with self._subscribe_lock:
+            observers = self._dispatch.get(event_type)
+            if observers is None:
+                observers = _match(self._subscriptions, event_type)
+                dispatch = dict(self._dispatch)
+                dispatch[event_type] = observers
+                self._dispatch = dispatch
+            return observers
+
+
+def _match(
+    subscriptions: tuple[tuple[str, Observer], ...], event_type: str
+) -> tuple[Observer, ...]:
+    return tuple(
+        observer
+        for pattern, observer in subscriptions
+        if pattern == event_type
+        or (pattern.endswith("*") and event_type.startswith(pattern[:-1]))
+    )
+
+
+class OverflowPolicy(str, Enum):
+    BLOCK = "BLOCK"  # publisher waits for room (backpressure)
+    DROP = "DROP"  # event is discarded and counted
+
+
+@dataclass(frozen=True, slots=True)
+class EventBusMetrics:
+    queue_depth: int
+    delivered: int
+    dropped: int
+    observer_errors: int
+    last_lag_s: float
+    max_lag_s: float
+
+
+_STOP = object()
+
+
+class QueuedEventBus(EventBus):
+    """
+    EventBus whose publish() only enqueues; worker threads deliver events.
+
+    Each event type is pinned to one worker queue, so events of the same type
+    are delivered in publish order. Queues are bounded; when full the bus
+    either blocks the publisher or drops the event, per `overflow`. Events
+    with no subscribers at publish time are not enqueued at all. close()
+    waits for publishes already in progress, so every event is either
+    delivered or rejected with RuntimeError.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        maxsize: int = 10_000,
+        overflow: OverflowPolicy = OverflowPolicy.BLOCK,
+    ) -> None:
+        if workers <= 0:
+            raise ValueError("workers must be > 0")
+        if maxsize <= 0:
+            raise ValueError("maxsize must be > 0")
+        super().__init__()
+        self._overflow = overflow
+        self._queues: list[queue.Queue] = [queue.Queue(maxsize) for _ in range(workers)]
+        # Per-worker counters: each slot is only written by its own worker.
+        self._delivered = [0] * workers
+        self._errors = [0] * workers
+        self._dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._last_lag = 0.0
+        self._max_lag = 0.0
+        self._closed = False
+        # Guards _closed and counts publishes in progress, which close()
+        # waits out before queueing the stop markers.
+        self._state = threading.Condition(threading.Lock())
+        self._publishing = 0
+        self._logger = logging.getLogger("mini_cab_booking")
+        self._threads = [
+            threading.Thread(
+                target=self._run, args=(i,), name=f"event-bus-{i}", daemon=True
+            )
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def publish(self, event: Event) -> None:
+        self._begin_publish()
+        try:
+            self._enqueue(event)
+        finally:
+            self._end_publish()
+
+    def publish_many(self, events: Iterable[Event]) -> None:
+        self._begin_publish()
+        try:
+            for event in events:
+                self._enqueue(event)
+        finally:
+            self._end_publish()
+
+    def flush(self) -> None:
+        """
+        Block until every event enqueued so far has been delivered.
+        """
+        for shard in self._queues:
+            shard.join()
+
+    def close(self) -> None:
+        """
+        Stop accepting events, deliver what is queued and stop the workers.
+        """
+        with self._state:
+            if self._closed:
+                return
+            self._closed = True
+            # A publish that passed the closed check enqueues before _STOP.
+            self._state.wait_for(lambda: not self._publishing)
+        for shard in self._queues:
+            shard.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        # Nothing can follow _STOP now, but never leave an item un-done:
+        # flush() would wait for it forever.
+        for worker, shard in enumerate(self._queues):
+            while True:
+                try:
+                    item = shard.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    if item is not _STOP:
+                        self._deliver(worker, item)
+                finally:
+                    shard.task_done()
+
+    def metrics(self) -> EventBusMetrics:
+        return EventBusMetrics(
+            queue_depth=sum(shard.qsize() for shard in self._queues),
+            delivered=sum(self._delivered),
+            dropped=self._dropped,
+            observer_errors=sum(self._errors),
+            last_lag_s=self._last_lag,
+            max_lag_s=self._max_lag,
+        )
+
+    def __enter__(self) -> "QueuedEventBus":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _begin_publish(self) -> None:
+        with self._state:
+            if self._closed:
+                raise RuntimeError("EventBus is closed")
+            self._publishing += 1
+
+    def _end_publish(self) -> None:
+        with self._state:
+            self._publishing -= 1
+            if not self._publishing:
+                self._state.notify_all()
+
+    def _enqueue(self, event: Event) -> None:
+        if not self.has_subscribers(event.event_type):
+            return
+        shard = self._queues[hash(event.event_type) % len(self._queues)]
+        item = (time.monotonic(), event)
+        if self._overflow == OverflowPolicy.BLOCK:
+            shard.put(item)
+            return
+        try:
+            shard.put_nowait(item)
+        except queue.Full:
+            with self._dropped_lock:
+                self._dropped += 1
+
+    def _run(self, worker: int) -> None:
+        shard = self._queues[worker]
+        while True:
+            item = shard.get()
+            try:
+                if item is _STOP:
+                    return
+                self._deliver(worker, item)
+            finally:
+                shard.task_done()
+
+    def _deliver(self, worker: int, item: tuple[float, Event]) -> None:
+        enqueued_at, event = item
+        for observer in self._observers(event.event_type):
+            try:
+                observer.on_event(event)
+            except Exception:
+                self._errors[worker] += 1
+                self._logger.exception("observer failed event_type=%s", event.event_type)
+        self._delivered[worker] += 1
+        lag = time.monotonic() - enqueued_at
+        self._last_lag = lag
+        if lag > self._max_lag:
+            self._max_lag = lag
+
 
 class ConsoleObserver(Observer):
     def __init__(self, prefix: str = "EVENT") -> None:
@@ -1,12 +1,19 @@
 from __future__ import annotations
 
+import hashlib
+import os
+import pickle
+import threading
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from dataclasses import dataclass
-from decimal import Decimal
 from enum import Enum
-from typing import Any, Mapping
+from itertools import chain
+from typing import Any, Callable, Mapping
 
 from .models import PaymentReceipt, PaymentStatus, new_id
+from .money import Money
+from .wallet import WalletLedger
 
 
 class PaymentMethodType(str, Enum):
@@ -21,7 +28,7 @@ class PaymentMethod(ABC):
     """
 
     @abstractmethod
-    def pay(self, amount: Decimal) -> PaymentReceipt:
+    def pay(self, amount: Money) -> PaymentReceipt:
         raise NotImplementedError
 
     @property
@@ -38,7 +45,7 @@ class UpiPayment(PaymentMethod):
     def method_name(self) -> str:
         return PaymentMethodType.UPI.value
 
-    def pay(self, amount: Decimal) -> PaymentReceipt:
+    def pay(self, amount: Money) -> PaymentReceipt:
         if "@" not in self.upi_id:
             return PaymentReceipt(
                 receipt_id=new_id("rcpt"),
@@ -62,7 +69,7 @@ class CardPayment(PaymentMethod):
     def method_name(self) -> str:
         return PaymentMethodType.CARD.value
 
-    def pay(self, amount: Decimal) -> PaymentReceipt:
+    def pay(self, amount: Money) -> PaymentReceipt:
         if len(self.card_last4) != 4 or not self.card_last4.isdigit():
             return PaymentReceipt(
                 receipt_id=new_id("rcpt"),
@@ -80,25 +87,32 @@ class CardPayment(PaymentMethod):
 
 @dataclass(frozen=True, slots=True)
 class WalletPayment(PaymentMethod):
+    """
+    pay() debits the shared WalletLedger atomically: the receipt id is the
+    debit's reference, and a logged debit is durable before a SUCCESS
+    receipt is returned. Balances come from the ledger only, never from the
+    client.
+    """
+
     wallet_id: str
-    balance: Decimal
+    ledger: WalletLedger
 
     @property
     def method_name(self) -> str:
         return PaymentMethodType.WALLET.value
 
-    def pay(self, amount: Decimal) -> PaymentReceipt:
-        if self.balance < amount:
-            return PaymentReceipt(
-                receipt_id=new_id("rcpt"),
-                amount=amount,
-                status=PaymentStatus.FAILED,
-                method=self.method_name,
-            )
+    def pay(self, amount: Money) -> PaymentReceipt:
+        receipt_id = new_id("rcpt")
+        try:
+            self.ledger.debit(self.wallet_id, amount, reference=receipt_id)
+        except (LookupError, ValueError):  # unknown wallet, insufficient funds
+            status = PaymentStatus.FAILED
+        else:
+            status = PaymentStatus.SUCCESS
         return PaymentReceipt(
-            receipt_id=new_id("rcpt"),
+            receipt_id=receipt_id,
             amount=amount,
-            status=PaymentStatus.SUCCESS,
+            status=status,
             method=self.method_name,
         )
 
@@ -106,8 +120,14 @@ class WalletPayment(PaymentMethod):
 class PaymentFactory(ABC):
     """
     Abstract Factory: produces PaymentMethod objects.
+
+    create() dispatches through a table of payment type -> creator, so a new
+    method is added with register() instead of another branch. The table is
+    built on first use, so subclasses need not call super().__init__().
     """
 
+    _creators: dict[str, Callable[[Mapping[str, Any]], PaymentMethod]]
+
     @abstractmethod
     def create_upi(self, details: Mapping[str, Any]) -> PaymentMethod:
         raise NotImplementedError
@@ -120,21 +140,49 @@ class PaymentFactory(ABC):
     def create_wallet(self, details: Mapping[str, Any]) -> PaymentMethod:
         raise NotImplementedError
 
+    def register(
+        self, payment_type: str, creator: Callable[[Mapping[str, Any]], PaymentMethod]
+    ) -> None:
+        """
+        Add (or replace) the creator for a payment type.
+        """
+        self._creator_table()[payment_type.strip().upper()] = creator
+
     def create(self, payment_type: str, details: Mapping[str, Any]) -> PaymentMethod:
         """
         Factory Method: selects which concrete product to create.
         """
-        normalized = payment_type.strip().upper()
-        if normalized == PaymentMethodType.UPI.value:
-            return self.create_upi(details)
-        if normalized == PaymentMethodType.CARD.value:
-            return self.create_card(details)
-        if normalized == PaymentMethodType.WALLET.value:
-            return self.create_wallet(details)
-        raise ValueError(f"Unsupported payment type: {payment_type!r}")
+        creators = self._creator_table()
+        creator = creators.get(payment_type)
+        if creator is None:
+            # Canonical names hit above; only other spellings pay for this.
+            creator = creators.get(payment_type.strip().upper())
+            if creator is None:
+                raise ValueError(f"Unsupported payment type: {payment_type!r}")
+        return creator(details)
+
+    def _creator_table(self) -> dict[str, Callable[[Mapping[str, Any]], PaymentMethod]]:
+        try:
+            return self._creators
+        except AttributeError:
+            self._creators = {
+                PaymentMethodType.UPI.value: self.create_upi,
+                PaymentMethodType.CARD.value: self.create_card,
+                PaymentMethodType.WALLET.value: self.create_wallet,
+            }
+            return self._creators
 
 
 class DefaultPaymentFactory(PaymentFactory):
+    """
+    Wallet payments debit `ledger`; without one they are rejected with
+    ValueError. Any "balance" in the payment details is ignored.
+    """
+
+    def __init__(self, ledger: WalletLedger | None = None) -> None:
+        super().__init__()
+        self._ledger = ledger
+
     def create_upi(self, details: Mapping[str, Any]) -> PaymentMethod:
         return UpiPayment(upi_id=str(details.get("upi_id", "")))
 
@@ -144,7 +192,142 @@ class DefaultPaymentFactory(PaymentFactory):
         return CardPayment(card_last4=last4)
 
     def create_wallet(self, details: Mapping[str, Any]) -> PaymentMethod:
-        wallet_id = str(details.get("wallet_id", ""))
-        balance = Decimal(str(details.get("balance", "0")))
-        return WalletPayment(wallet_id=wallet_id, balance=balance)
+        if self._ledger is None:
+            raise ValueError("Wallet payments need a WalletLedger")
+        return WalletPayment(wallet_id=str(details.get("wallet_id", "")), ledger=self._ledger)
+
+
+@dataclass(frozen=True, slots=True)
+class PaymentCacheStats:
+    hits: int
+    misses: int
+    bypassed: int  # details that could not be hashed, never cached
+    evictions: int
+    size: int
+    maxsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
 
+
+class CachingPaymentFactory(PaymentFactory):
+    """
+    Flyweight cache in front of another PaymentFactory.
+
+    Payment methods are immutable, so a repeat rider with the same payment
+    details gets the instance built for their previous booking.
+
+    - The key is the payment type plus a keyed BLAKE2b digest (secret per
+      process) of the details, serialised canonically: items sorted, every
+      value tagged with its type. Reordered dicts share an entry, 1, 1.0
+      and True do not, and details that differ cannot collide short of
+      breaking the hash; raw details such as full card numbers are never
+      retained. Details with keys or values other than str, int, float,
+      bool, bytes or None bypass the cache. Computing the key costs a few
+      microseconds, so the cache pays off for methods that cost more than
+      that to build.
+    - At most `maxsize` methods are kept; eviction is CLOCK (second chance),
+      an LRU approximation where a hit only sets a reference bit. Hits take
+      no lock, misses and evictions take one.
+    """
+
+    def __init__(self, inner: PaymentFactory, maxsize: int = 10_000) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be > 0")
+        super().__init__()
+        self._inner = inner
+        self._maxsize = maxsize
+        # key -> [method, referenced since the hand last passed]
+        self._entries: OrderedDict[tuple[str, bytes], list[Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._bypassed = 0
+        self._evictions = 0
+
+    def create_upi(self, details: Mapping[str, Any]) -> PaymentMethod:
+        return self._inner.create_upi(details)
+
+    def create_card(self, details: Mapping[str, Any]) -> PaymentMethod:
+        return self._inner.create_card(details)
+
+    def create_wallet(self, details: Mapping[str, Any]) -> PaymentMethod:
+        return self._inner.create_wallet(details)
+
+    def register(
+        self, payment_type: str, creator: Callable[[Mapping[str, Any]], PaymentMethod]
+    ) -> None:
+        self._inner.register(payment_type, creator)
+        self.clear()
+
+    def create(self, payment_type: str, details: Mapping[str, Any]) -> PaymentMethod:
+        try:
+            key = (payment_type, _details_digest(details))
+        except TypeError:
+            self._bypassed += 1
+            return self._inner.create(payment_type, details)
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry[1] = True
+            self._hits += 1
+            return entry[0]
+        method = self._inner.create(payment_type, details)
+        with self._lock:
+            self._misses += 1
+            entry = self._entries.get(key)
+            if entry is not None:  # another thread cached it first
+                return entry[0]
+            if len(self._entries) >= self._maxsize:
+                self._evict_locked()
+            self._entries[key] = [method, False]
+        return method
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = OrderedDict()
+
+    def stats(self) -> PaymentCacheStats:
+        return PaymentCacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            bypassed=self._bypassed,
+            evictions=self._evictions,
+            size=len(self._entries),
+            maxsize=self._maxsize,
+        )
+
+    def _evict_locked(self) -> None:
+        # Insertion order is the clock: referenced entries get their bit
+        # cleared and go to the back, the first unreferenced one is evicted.
+        entries = self._entries
+        while True:
+            key, entry = entries.popitem(last=False)
+            if not entry[1]:
+                self._evictions += 1
+                return
+            entry[1] = False
+            entries[key] = entry
+
+
+# Keyed with a secret that never leaves the process; copied per digest,
+# which skips re-hashing the key block.
+_KEYED_DIGEST = hashlib.blake2b(digest_size=16, key=os.urandom(32))
+# Exact types only: a subclass could compare equal yet build a different
+# method. Pickle tags each value with its type, so 1, 1.0, True, "1" and
+# b"1" all serialise differently.
+_SCALARS = frozenset((str, int, float, bool, bytes, type(None)))
+
+
+def _details_digest(details: Mapping[str, Any]) -> bytes:
+    """
+    Keyed BLAKE2b-128 of the details' items, sorted. Raises TypeError for
+    anything but scalar keys and values (nested dicts/lists included).
+    """
+    items = sorted(details.items())
+    if not _SCALARS.issuperset(map(type, chain.from_iterable(items))):
+        raise TypeError("payment details must be flat scalars to be cached")
+    digest = _KEYED_DIGEST.copy()
+    digest.update(pickle.dumps(items, protocol=5))
+    return digest.digest()
@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import json
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from time import perf_counter_ns
+from typing import Any, Callable, Iterable, Iterator, TextIO, TypeVar
+
+from .facade import CabBookingFacade, RideBookingFacade
+from .metrics import HistogramSnapshot, LatencyHistogram
+from .models import Booking, BookingStatus, RideRequest, Rider
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# (line number, request or the error raised while parsing it)
+Parsed = tuple[int, "RideRequest | Exception"]
+# (line number, booking or the error raised while parsing/booking it)
+Outcome = tuple[int, "Booking | Exception"]
+
+_DONE = object()
+
+
+@dataclass(slots=True)
+class PipelineStats:
+    lines: int = 0
+    confirmed: int = 0
+    failed: int = 0
+    errors: int = 0
+    elapsed_s: float = 0.0
+    latency: HistogramSnapshot | None = None
+
+    @property
+    def throughput(self) -> float:
+        return self.lines / self.elapsed_s if self.elapsed_s else 0.0
+
+    def summary(self) -> str:
+        lines = [
+            f"lines={self.lines} confirmed={self.confirmed} failed={self.failed} "
+            f"errors={self.errors}",
+            f"elapsed={self.elapsed_s:.3f}s throughput={self.throughput:,.0f} req/s",
+        ]
+        latency = self.latency
+        if latency is not None and latency.count:
+            lines.append(
+                "book_ride latency "
+                + " ".join(
+                    f"{name}={latency.quantile(q) / 1000:.1f}us"
+                    for name, q in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0))
+                )
+            )
+        return "\n".join(lines)
+
+
+def read_chunks(lines: Iterable[str], chunk_size: int) -> Iterator[list[tuple[int, str]]]:
+    """
+    Numbered non-blank lines in lists of up to `chunk_size`; only one chunk
+    is held at a time, so the input can be larger than memory.
+    """
+    chunk: list[tuple[int, str]] = []
+    for number, line in enumerate(lines, 1):
+        if line.strip():
+            chunk.append((number, line))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_chunk(chunk: list[tuple[int, str]]) -> list[Parsed]:
+    """
+    Decode a chunk and build its requests with RideRequest.from_records()
+    (a line that is not a JSON object gets a ValueError); if any row is
+    invalid, rows are built one by one so each error stays attached to its
+    own line.
+    """
+    numbers: list[int] = []
+    rows: list[Any] = []
+    parsed: list[Parsed] = []
+    for number, line in chunk:
+        try:
+            row = json.loads(line)
+        except ValueError as exc:  # JSONDecodeError
+            parsed.append((number, exc))
+            continue
+        if type(row) is not dict:
+            parsed.append((number, ValueError("expected a JSON object")))
+            continue
+        rows.append(row)
+        numbers.append(number)
+    riders: dict[tuple[str, str], Rider] = {}
+    try:
+        parsed.extend(zip(numbers, RideRequest.from_records(rows, riders)))
+    except (ValueError, TypeError):
+        for number, row in zip(numbers, rows):
+            try:
+                parsed.append((number, RideRequest.from_mapping(row, riders)))
+            except (ValueError, TypeError) as exc:
+                parsed.append((number, exc))
+        parsed.sort(key=lambda item: item[0])
+        return parsed
+    if len(numbers) < len(chunk):  # undecodable lines went first
+        parsed.sort(key=lambda item: item[0])
+    return parsed
+
+
+def booking_to_record(booking: Booking) -> dict[str, Any]:
+    driver = booking.driver
+    receipt = booking.payment
+    return {
+        "booking_id": booking.booking_id,
+        "rider_id": booking.request.rider.rider_id,
+        "status": booking.status.value,
+        "fare_minor": booking.fare.minor,
+        "currency": booking.fare.currency,
+        "driver_id": driver.driver_id if driver else None,
+        "receipt_id": receipt.receipt_id if receipt else None,
+        "payment_status": receipt.status.value if receipt else None,
+        "created_at": booking.created_at,
+    }
+
+
+def format_chunk(chunk: list[Outcome]) -> str:
+    out: list[str] = []
+    for number, outcome in chunk:
+        if isinstance(outcome, Exception):
+            record = {"line": number, "error": f"{type(outcome).__name__}: {outcome}"}
+        else:
+            record = {"line": number, **booking_to_record(outcome)}
+        out.append(json.dumps(record, separators=(",", ":")))
+    out.append("")
+    return "\n".join(out)
+
+
+class BookingStage:
+    """
+    Books parsed requests one at a time, timing each book_ride() call.
+
+    With `finish_rides`, every confirmed ride is started and completed right
+    away (a zero-length trip) so a fixed fleet can serve an unbounded replay.
+    """
+
+    def __init__(self, facade: RideBookingFacade, *, finish_rides: bool = True) -> None:
+        if finish_rides and not isinstance(facade, CabBookingFacade):
+            raise ValueError("finish_rides needs a CabBookingFacade")
+        self._facade = facade
+        self._finish_rides = finish_rides
+        self.latency = LatencyHistogram()
+        self.stats = PipelineStats()
+
+    def __call__(self, chunk: list[Parsed]) -> list[Outcome]:
+        book = self._facade.book_ride
+        record = self.latency.record
+        stats = self.stats
+        outcomes: list[Outcome] = []
+        for number, request in chunk:
+            stats.lines += 1
+            if isinstance(request, Exception):
+                stats.errors += 1
+                outcomes.append((number, request))
+                continue
+            start = perf_counter_ns()
+            try:
+                booking = book(request)
+            except Exception as exc:
+                record(perf_counter_ns() - start)
+                stats.errors += 1
+                outcomes.append((number, exc))
+                continue
+            record(perf_counter_ns() - start)
+            if booking.status == BookingStatus.CONFIRMED:
+                stats.confirmed += 1
+                if self._finish_rides:
+                    facade = self._facade
+                    facade.complete_ride(facade.start_ride(booking))
+            else:
+                stats.failed += 1
+            outcomes.append((number, booking))
+        return outcomes
+
+
+def run_pipeline(
+    facade: RideBookingFacade,
+    lines: Iterable[str],
+    out: TextIO | None,
+    *,
+    chunk_size: int = 512,
+    parallel: bool = False,
+    queue_depth: int = 4,
+    finish_rides: bool = True,
+) -> PipelineStats:
+    """
+    Stream JSONL ride requests through `facade` and write one JSONL record
+    per input line (booking or error) to `out` (None: stats only).
+
+    Stages (read, parse, book, serialize) are generators over chunks of
+    `chunk_size` lines. With `parallel`, parse, book and serialize each run
+    on their own thread behind a queue of at most `queue_depth` chunks, so
+    memory stays bounded while reading and writing overlap with booking.
+    Threads share the GIL: this pays off when input/output block on I/O
+    (pipes, network filesystems), not for CPU-bound parsing.
+    """
+    if chunk_size <= 0 or queue_depth <= 0:
+        raise ValueError("chunk_size and queue_depth must be > 0")
+    stage = BookingStage(facade, finish_rides=finish_rides)
+    start = time.perf_counter()
+
+    chunks: Iterable[Any] = read_chunks(lines, chunk_size)
+    if parallel:
+        chunks = _threaded(parse_chunk, chunks, queue_depth)
+        chunks = _threaded(stage, chunks, queue_depth)
+        if out is not None:
+            chunks = _threaded(format_chunk, chunks, queue_depth)
+    else:
+        chunks = map(stage, map(parse_chunk, chunks))
+        if out is not None:
+            chunks = map(format_chunk, chunks)
+
+    for chunk in chunks:
+        if out is not None:
+            out.write(chunk)
+    if out is not None:
+        out.flush()
+
+    stats = stage.stats
+    stats.elapsed_s = time.perf_counter() - start
+    stats.latency = stage.latency.snapshot()
+    return stats
+
+
+def _threaded(fn: Callable[[T], R], items: Iterable[T], depth: int) -> Iterator[R]:
+    """
+    Apply `fn` to `items` on a worker thread, handing results over through a
+    bounded queue (order is preserved). Worker errors re-raise here.
+    """
+    results: queue.Queue = queue.Queue(depth)
+    stop = threading.Event()
+
+    def put(item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def work() -> None:
+        try:
+            for item in items:
+                if not put(fn(item)):
+                    return
+        except BaseException as exc:
+            put(_Failure(exc))
+            return
+        finally:
+            close = getattr(items, "close", None)
+            if close is not None:  # stops an upstream _threaded stage too
+                close()
+        put(_DONE)
+
+    name = getattr(fn, "__name__", type(fn).__name__)
+    thread = threading.Thread(target=work, name=f"pipeline-{name}", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = results.get()
+            if item is _DONE:
+                break
+            if isinstance(item, _Failure):
+                raise item.exc
+            yield item
+    finally:
+        # Consumer gone (done, error or closed early): let the worker exit.
+        stop.set()
+        thread.join()
+
+
+class _Failure:
+    __slots__ = ("exc",)
+
+    def __init__(self, exc: BaseException) -> None:
+        self.exc = exc
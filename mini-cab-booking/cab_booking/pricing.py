@@ -1,7 +1,29 @@
 from __future__ import annotations
 
+import math
 from abc import ABC, abstractmethod
+from array import array
 from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Iterable, Sequence
+
+from .models import RideRequest
+from .money import DEFAULT_CURRENCY, Money
+
+try:  # optional: only used to keep ndarray in / ndarray out
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is not a hard dependency
+    np = None
+
+# Products at or beyond 2**52 no longer have a fractional part in a float.
+_MAX_FAST = float(2**52)
+# Float products closer than this (relative) to a .5 paise boundary are
+# re-done exactly, so results stay identical to calculate_fare().
+_TIE_EPS = 1e-12
+# Distances that round-trip as k / 10**6 have that exact decimal as their
+# repr (below ~4e9 km no other <=6-decimal value maps to the same float),
+# so their ties can be settled in integers instead of Decimal.
+_SCALE = 1_000_000
+_MAX_SCALED = 4e9
 
 
 class PricingStrategy(ABC):
@@ -10,21 +32,114 @@ class PricingStrategy(ABC):
     """
 
     @abstractmethod
-    def calculate_fare(self, distance_km: float) -> Decimal:
+    def calculate_fare(self, distance_km: float) -> Money:
         raise NotImplementedError
 
+    def quote(self, request: RideRequest) -> Money:
+        """
+        Fare for a full request; the facades price through this hook.
+
+        Distance-only strategies need not override it. Location- or
+        rider-aware strategies (e.g. DynamicSurgePricing) do.
+        """
+        return self.calculate_fare(request.distance_km)
+
+    def calculate_fares(self, distances: Any) -> Sequence[int]:
+        """
+        Batch pricing: fares in integer minor units (paise), one per distance.
+
+        Accepts any iterable of floats, a float64 buffer (array("d"),
+        memoryview, bytes) or a NumPy array. Returns array("q"), or an int64
+        ndarray when given an ndarray.
+        """
+        fares = array("q", (self.calculate_fare(d).minor for d in _floats(distances)))
+        return _like_input(distances, fares)
+
 
 class PerKmPricing(PricingStrategy):
-    def __init__(self, rate_per_km: Decimal):
+    def __init__(self, rate_per_km: Decimal, currency: str = DEFAULT_CURRENCY):
         self._rate_per_km = rate_per_km
+        self._currency = currency
+        minor = rate_per_km * 100
+        # The integer fast path needs a whole number of paise per km.
+        self._rate_minor: int | None = (
+            int(minor) if minor == minor.to_integral_value() else None
+        )
 
-    def calculate_fare(self, distance_km: float) -> Decimal:
+    def calculate_fare(self, distance_km: float) -> Money:
         if distance_km <= 0:
             raise ValueError("distance_km must be > 0")
-        amount = (Decimal(str(distance_km)) * self._rate_per_km).quantize(
+        d = float(distance_km)
+        if self._rate_minor is None or not d < math.inf:  # also catches NaN
+            return Money(self._decimal_minor(d), self._currency)
+        x = d * self._rate_minor
+        r = int(x + 0.5)
+        rem = x + 0.5 - r
+        slack = _TIE_EPS * (x + 1.0)
+        if x >= _MAX_FAST or rem < slack or rem > 1.0 - slack:
+            r = self._exact_minor(d)
+        return Money(r, self._currency)
+
+    def calculate_fares(self, distances: Any) -> Sequence[int]:
+        """
+        Loop-inlined version of calculate_fare(), returning raw paise.
+
+        Each fare is distance * paise_per_km rounded half-up in float; the rare
+        products that land within float error of a half-paise tie are
+        recomputed exactly (in integers where the distance is a short decimal,
+        otherwise through the Decimal path).
+        """
+        if self._rate_minor is None:
+            return super().calculate_fares(distances)
+        if np is not None and isinstance(distances, np.ndarray):
+            return self._calculate_fares_np(distances)
+
+        rate = float(self._rate_minor)
+        out = array("q")
+        append = out.append
+        for d in _floats(distances):
+            if not d > 0 or d == math.inf:
+                append(self.calculate_fare(d).minor)
+                continue
+            x = d * rate
+            r = int(x + 0.5)
+            rem = x + 0.5 - r
+            slack = _TIE_EPS * (x + 1.0)
+            if x >= _MAX_FAST or rem < slack or rem > 1.0 - slack:
+                r = self._exact_minor(d)
+            append(r)
+        return out
+
+    def _calculate_fares_np(self, distances: Any) -> Any:
+        d = np.asarray(distances, dtype=np.float64).ravel()
+        bad = ~(d > 0) | np.isinf(d)
+        if bad.any():
+            # Raise exactly what calculate_fare() raises for the first bad value.
+            self.calculate_fare(float(d[np.argmax(bad)]))
+        x = d * float(self._rate_minor)
+        r = np.floor(x + 0.5)
+        rem = x + 0.5 - r
+        slack = _TIE_EPS * (x + 1.0)
+        out = r.astype(np.int64)
+        for i in np.flatnonzero((x >= _MAX_FAST) | (rem < slack) | (rem > 1.0 - slack)):
+            out[i] = self._exact_minor(float(d[i]))
+        return out.reshape(np.shape(distances))
+
+    def _exact_minor(self, d: float) -> int:
+        if 0 < d < _MAX_SCALED:
+            k = round(d * _SCALE)
+            if k / _SCALE == d:
+                # ROUND_HALF_UP of rate_minor * k / SCALE, for positive values.
+                return (2 * self._rate_minor * k + _SCALE) // (2 * _SCALE)
+        return self._decimal_minor(d)
+
+    def _decimal_minor(self, d: float) -> int:
+        # Reference semantics: the decimal shown by str(distance) times the
+        # rate, rounded half-up to paise.
+        amount = (Decimal(str(d)) * self._rate_per_km).quantize(
             Decimal("0.01"), rounding=ROUND_HALF_UP
         )
-        return amount
+        return int(amount * 100)
 
     @property
     def rate_per_km(self) -> Decimal:
@@ -48,3 +163,17 @@ class SurgePricing(PerKmPricing):
     def __init__(self):
         super().__init__(rate_per_km=Decimal("25"))
 
+
+def _floats(distances: Any) -> Iterable[float]:
+    if isinstance(distances, (bytes, bytearray, memoryview, array)):
+        view = memoryview(distances)
+        if view.format in ("B", "b", "c"):  # raw bytes: packed float64s
+            view = view.cast("B").cast("d")
+        return view
+    return distances
+
+
+def _like_input(distances: Any, fares: array) -> Any:
+    if np is not None and isinstance(distances, np.ndarray):
+        return np.asarray(fares, dtype=np.int64).reshape(np.shape(distances))
+    return fares
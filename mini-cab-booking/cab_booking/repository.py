@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left, insort
+from typing import Any
+
+from .models import (
+    Booking,
+    BookingStatus,
+    Driver,
+    Location,
+    PaymentReceipt,
+    PaymentStatus,
+    RideRequest,
+    Rider,
+)
+from .money import Money
+
+
+class BookingRepository(ABC):
+    """
+    Repository pattern: stores bookings and answers indexed lookups.
+
+    save() is an upsert; secondary indexes follow status/driver changes.
+    """
+
+    @abstractmethod
+    def save(self, booking: Booking) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get(self, booking_id: str) -> Booking | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def by_rider(self, rider_id: str) -> list[Booking]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def by_driver(self, driver_id: str) -> list[Booking]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def by_status(self, status: BookingStatus) -> list[Booking]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def between(self, start: float, end: float) -> list[Booking]:
+        """
+        Bookings with start <= created_at < end, oldest first.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class InMemoryBookingRepository(BookingRepository):
+    """
+    Dict-backed repository with hash indexes (rider, driver, status) and a
+    sorted created_at index.
+
+    Lookups by id/rider/driver/status are O(1) + result size; time ranges are
+    O(log n) + result size. Bookings usually arrive in time order, which makes
+    the sorted insert an append.
+    """
+
+    def __init__(self) -> None:
+        self._by_id: dict[str, Booking] = {}
+        # dict-as-ordered-set keeps insertion order for stable results.
+        self._rider: dict[str, dict[str, None]] = {}
+        self._driver: dict[str, dict[str, None]] = {}
+        self._status: dict[BookingStatus, dict[str, None]] = {}
+        self._times: list[tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def save(self, booking: Booking) -> None:
+        booking_id = booking.booking_id
+        with self._lock:
+            old = self._by_id.get(booking_id)
+            self._by_id[booking_id] = booking
+            if old is None:
+                _add(self._rider, booking.request.rider.rider_id, booking_id)
+                _add(self._status, booking.status, booking_id)
+                if booking.driver is not None:
+                    _add(self._driver, booking.driver.driver_id, booking_id)
+                insort(self._times, (booking.created_at, booking_id))
+                return
+            if old.status != booking.status:
+                _discard(self._status, old.status, booking_id)
+                _add(self._status, booking.status, booking_id)
+            old_driver = old.driver.driver_id if old.driver else None
+            new_driver = booking.driver.driver_id if booking.driver else None
+            if old_driver != new_driver:
+                if old_driver is not None:
+                    _discard(self._driver, old_driver, booking_id)
+                if new_driver is not None:
+                    _add(self._driver, new_driver, booking_id)
+            if old.created_at != booking.created_at:
+                times = self._times
+                del times[bisect_left(times, (old.created_at, booking_id))]
+                insort(times, (booking.created_at, booking_id))
+
+    def get(self, booking_id: str) -> Booking | None:
+        return self._by_id.get(booking_id)
+
+    def by_rider(self, rider_id: str) -> list[Booking]:
+        return self._resolve(self._rider.get(rider_id))
+
+    def by_driver(self, driver_id: str) -> list[Booking]:
+        return self._resolve(self._driver.get(driver_id))
+
+    def by_status(self, status: BookingStatus) -> list[Booking]:
+        return self._resolve(self._status.get(status))
+
+    def between(self, start: float, end: float) -> list[Booking]:
+        with self._lock:
+            lo = bisect_left(self._times, (start, ""))
+            hi = bisect_left(self._times, (end, ""))
+            return [self._by_id[booking_id] for _, booking_id in self._times[lo:hi]]
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def _resolve(self, ids: dict[str, None] | None) -> list[Booking]:
+        if not ids:
+            return []
+        with self._lock:
+            return [self._by_id[booking_id] for booking_id in ids]
+
+
+_COLUMNS = (
+    "booking_id",
+    "rider_id",
+    "rider_name",
+    "pickup_lat",
+    "pickup_lng",
+    "drop_lat",
+    "drop_lng",
+    "distance_km",
+    "payment_type",
+    "payment_details",
+    "fare_minor",
+    "currency",
+    "status",
+    "driver_id",
+    "driver_name",
+    "receipt_id",
+    "receipt_amount_minor",
+    "receipt_status",
+    "receipt_method",
+    "created_at",
+)
+
+# payment_details keys safe to store: never credentials such as UPI ids or
+# card numbers. Everything else is dropped on write.
+PERSISTED_PAYMENT_DETAILS = frozenset(("card_last4", "wallet_id"))
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS bookings (
+    booking_id TEXT PRIMARY KEY,
+    {', '.join(_COLUMNS[1:])}
+);
+CREATE INDEX IF NOT EXISTS ix_bookings_rider ON bookings (rider_id);
+CREATE INDEX IF NOT EXISTS ix_bookings_driver ON bookings (driver_id);
+CREATE INDEX IF NOT EXISTS ix_bookings_status ON bookings (status);
+CREATE INDEX IF NOT EXISTS ix_bookings_created ON bookings (created_at);
+"""
+
+_UPSERT = (
+    f"INSERT OR REPLACE INTO bookings ({', '.join(_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in _COLUMNS)})"
+)
+_SELECT = f"SELECT {', '.join(_COLUMNS)} FROM bookings"
+
+
+class SqliteBookingRepository(BookingRepository):
+    """
+    SQLite-backed repository.
+
+    Writes are buffered and flushed in one transaction per `batch_size`
+    bookings (repeated saves of one booking collapse to the latest). The
+    database runs in WAL mode with synchronous=NORMAL, and every statement
+    is a fixed SQL string, so sqlite3's statement cache reuses the prepared
+    statements. Reads flush pending writes first.
+
+    Auth tokens are never persisted, and of payment_details only the
+    non-secret keys in PERSISTED_PAYMENT_DETAILS are (read back bookings
+    carry just those).
+    """
+
+    def __init__(self, path: str = ":memory:", batch_size: int = 1000) -> None:
+        if batch_size <= 0:
+            raise ValueError("batch_size must be > 0")
+        self._conn = sqlite3.connect(path, check_same_thread=False, cached_statements=64)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._batch_size = batch_size
+        self._pending: dict[str, tuple[Any, ...]] = {}
+        self._lock = threading.RLock()
+
+    def save(self, booking: Booking) -> None:
+        row = booking_to_row(booking)
+        with self._lock:
+            self._pending[booking.booking_id] = row
+            if len(self._pending) >= self._batch_size:
+                self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            rows = list(self._pending.values())
+            self._pending.clear()
+            with self._conn:
+                self._conn.executemany(_UPSERT, rows)
+
+    def get(self, booking_id: str) -> Booking | None:
+        found = self._query(" WHERE booking_id = ?", (booking_id,))
+        return found[0] if found else None
+
+    def by_rider(self, rider_id: str) -> list[Booking]:
+        return self._query(" WHERE rider_id = ? ORDER BY created_at", (rider_id,))
+
+    def by_driver(self, driver_id: str) -> list[Booking]:
+        return self._query(" WHERE driver_id = ? ORDER BY created_at", (driver_id,))
+
+    def by_status(self, status: BookingStatus) -> list[Booking]:
+        return self._query(" WHERE status = ? ORDER BY created_at", (status.value,))
+
+    def between(self, start: float, end: float) -> list[Booking]:
+        return self._query(
+            " WHERE created_at >= ? AND created_at < ? ORDER BY created_at",
+            (start, end),
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            self.flush()
+            return self._conn.execute("SELECT COUNT(*) FROM bookings").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+    def __enter__(self) -> "SqliteBookingRepository":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _query(self, where: str, params: tuple[Any, ...]) -> list[Booking]:
+        with self._lock:
+            self.flush()
+            rows = self._conn.execute(_SELECT + where, params).fetchall()
+        return [booking_from_row(row) for row in rows]
+
+
+def _add(index: dict[Any, dict[str, None]], key: Any, booking_id: str) -> None:
+    bucket = index.get(key)
+    if bucket is None:
+        bucket = index[key] = {}
+    bucket[booking_id] = None
+
+
+def _discard(index: dict[Any, dict[str, None]], key: Any, booking_id: str) -> None:
+    bucket = index.get(key)
+    if bucket is not None:
+        bucket.pop(booking_id, None)
+        if not bucket:
+            del index[key]
+
+
+def booking_to_row(booking: Booking) -> tuple[Any, ...]:
+    """
+    Flatten a Booking into primitive values (column order of _COLUMNS).
+    """
+    request = booking.request
+    driver = booking.driver
+    receipt = booking.payment
+    return (
+        booking.booking_id,
+        request.rider.rider_id,
+        request.rider.name,
+        request.pickup.lat,
+        request.pickup.lng,
+        request.drop.lat,
+        request.drop.lng,
+        request.distance_km,
+        request.payment_type,
+        json.dumps(
+            {
+                k: v
+                for k, v in request.payment_details.items()
+                if k in PERSISTED_PAYMENT_DETAILS
+            },
+            default=str,
+        ),
+        booking.fare.minor,
+        booking.fare.currency,
+        booking.status.value,
+        driver.driver_id if driver else None,
+        driver.name if driver else None,
+        receipt.receipt_id if receipt else None,
+        receipt.amount.minor if receipt else None,
+        receipt.status.value if receipt else None,
+        receipt.method if receipt else None,
+        booking.created_at,
+    )
+
+
+def booking_from_row(row: tuple[Any, ...] | list[Any]) -> Booking:
+    (
+        booking_id,
+        rider_id,
+        rider_name,
+        pickup_lat,
+        pickup_lng,
+        drop_lat,
+        drop_lng,
+        distance_km,
+        payment_type,
+        payment_details,
+        fare_minor,
+        currency,
+        status,
+        driver_id,
+        driver_name,
+        receipt_id,
+        receipt_amount_minor,
+        receipt_status,
+        receipt_method,
+        created_at,
+    ) = row
+    request = RideRequest(
+        rider=Rider(rider_id=rider_id, name=rider_name),
+        pickup=Location(lat=pickup_lat, lng=pickup_lng),
+        drop=Location(lat=drop_lat, lng=drop_lng),
+        distance_km=distance_km,
+        payment_type=payment_type,
+        payment_details=json.loads(payment_details),
+    )
+    receipt = None
+    if receipt_id is not None:
+        receipt = PaymentReceipt(
+            receipt_id=receipt_id,
+            amount=Money(receipt_amount_minor, currency),
+            status=PaymentStatus(receipt_status),
+            method=receipt_method,
+        )
+    return Booking(
+        booking_id=booking_id,
+        request=request,
+        fare=Money(fare_minor, currency),
+        status=BookingStatus(status),
+        driver=Driver(driver_id=driver_id, name=driver_name) if driver_id else None,
+        payment=receipt,
+        created_at=created_at,
+    )
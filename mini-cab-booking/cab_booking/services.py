@@ -1,9 +1,24 @@
 from __future__ import annotations
 
+import math
+import threading
+from abc import ABC, abstractmethod
 from dataclasses import replace
-from typing import Iterable
+from typing import Iterable, Mapping
 
-from .models import Booking, BookingStatus, Driver, RideRequest, new_id
+from .dispatch import DispatchOrder, FreeDriverQueue
+from .geo import DEFAULT_CELL_DEG, KM_PER_DEG, GridIndex
+from .models import (
+    Booking,
+    BookingStatus,
+    Driver,
+    DriverStatus,
+    Location,
+    RideRequest,
+    new_id,
+)
+from .observer import EventBus
+from .repository import BookingRepository
 
 
 class AuthService:
@@ -23,43 +38,423 @@ class AuthService:
         return token.startswith("token-")
 
 
-class DriverAllocator:
+class BaseDriverAllocator(ABC):
     """
-    Very small driver assignment component (can be replaced later).
+    Strategy for choosing which driver serves a ride request.
+
+    Allocators that track availability move a driver AVAILABLE -> EN_ROUTE
+    in allocate(), EN_ROUTE -> ON_TRIP in start_trip() and back to
+    AVAILABLE in release(); the default hooks are no-ops.
+    """
+
+    @abstractmethod
+    def allocate(self, request: RideRequest) -> Driver:
+        raise NotImplementedError
+
+    def claim(self, driver_id: str) -> Driver:
+        """
+        Assign a specific free driver chosen by the caller (e.g. a batch
+        matcher) instead of letting allocate() pick one.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support claim()")
+
+    def start_trip(self, driver_id: str) -> None:
+        """
+        The assigned driver picked the rider up.
+        """
+
+    def release(self, driver_id: str, location: Location | None = None) -> None:
+        """
+        The driver is free again (ride completed or cancelled, payment failed),
+        optionally at a new location such as the drop point.
+        """
+
+    def restore(self, booking: Booking) -> None:
+        """
+        Re-apply a journaled booking transition when recovering state.
+        """
+
+
+class DriverAllocator(BaseDriverAllocator):
+    """
+    Availability-aware allocator over a known fleet.
+
+    Free drivers wait in a FreeDriverQueue ordered by idle time (default:
+    longest idle first, which rotates through the fleet like round-robin) or
+    by rating. allocate() takes the head and release() puts the driver back,
+    so a driver never serves two overlapping rides. Positions are not
+    tracked: release() ignores its `location`. Every operation is
+    O(log n) under one lock.
     """
 
-    def __init__(self, drivers: list[Driver]) -> None:
+    def __init__(
+        self,
+        drivers: list[Driver],
+        order: DispatchOrder = DispatchOrder.IDLE_TIME,
+        ratings: Mapping[str, float] | None = None,
+    ) -> None:
         if not drivers:
             raise ValueError("drivers list must not be empty")
-        self._drivers = drivers
-        self._idx = 0
+        self._drivers: dict[str, Driver] = {}
+        self._status: dict[str, DriverStatus] = {}
+        self._free = FreeDriverQueue(order)
+        self._lock = threading.Lock()
+        for driver in drivers:
+            rating = ratings.get(driver.driver_id) if ratings else None
+            self._add_locked(driver, rating)
+
+    def __len__(self) -> int:
+        return len(self._drivers)
+
+    def available(self) -> int:
+        return len(self._free)
+
+    def status(self, driver_id: str) -> DriverStatus:
+        return _expect(self._status, driver_id)
+
+    def add_driver(self, driver: Driver, rating: float | None = None) -> None:
+        with self._lock:
+            if driver.driver_id in self._drivers:
+                raise ValueError(f"Driver already registered: {driver.driver_id!r}")
+            self._add_locked(driver, rating)
+
+    def set_rating(self, driver_id: str, rating: float) -> None:
+        with self._lock:
+            _expect(self._status, driver_id)
+            self._free.set_rating(driver_id, rating)
+
+    def go_offline(self, driver_id: str) -> None:
+        with self._lock:
+            _expect(self._status, driver_id, DriverStatus.AVAILABLE)
+            self._free.remove(driver_id)
+            self._status[driver_id] = DriverStatus.OFFLINE
+
+    def go_online(self, driver_id: str) -> None:
+        with self._lock:
+            _expect(self._status, driver_id, DriverStatus.OFFLINE)
+            self._status[driver_id] = DriverStatus.AVAILABLE
+            self._free.push(driver_id)
 
     def allocate(self, _request: RideRequest) -> Driver:
-        driver = self._drivers[self._idx % len(self._drivers)]
-        self._idx += 1
-        return driver
+        with self._lock:
+            driver_id = self._free.pop()
+            if driver_id is None:
+                raise LookupError("No drivers available")
+            self._status[driver_id] = DriverStatus.EN_ROUTE
+        return self._drivers[driver_id]
+
+    def claim(self, driver_id: str) -> Driver:
+        with self._lock:
+            if driver_id not in self._free:
+                raise LookupError(f"Driver {driver_id!r} is not available")
+            self._free.remove(driver_id)
+            self._status[driver_id] = DriverStatus.EN_ROUTE
+        return self._drivers[driver_id]
+
+    def start_trip(self, driver_id: str) -> None:
+        with self._lock:
+            _expect(self._status, driver_id, DriverStatus.EN_ROUTE)
+            self._status[driver_id] = DriverStatus.ON_TRIP
+
+    def release(self, driver_id: str, location: Location | None = None) -> None:
+        with self._lock:
+            _expect(self._status, driver_id, DriverStatus.EN_ROUTE, DriverStatus.ON_TRIP)
+            self._status[driver_id] = DriverStatus.AVAILABLE
+            self._free.push(driver_id)
+
+    def restore(self, booking: Booking) -> None:
+        status = _DRIVER_STATUS_AFTER.get(booking.status)
+        if booking.driver is None or status is None:
+            return
+        driver_id = booking.driver.driver_id
+        with self._lock:
+            if driver_id not in self._status:
+                return
+            was = self._status[driver_id]
+            self._status[driver_id] = status
+            if status == DriverStatus.AVAILABLE:
+                if was != DriverStatus.AVAILABLE:
+                    self._free.push(driver_id)
+            else:
+                self._free.remove(driver_id)
+
+    def _add_locked(self, driver: Driver, rating: float | None) -> None:
+        self._drivers[driver.driver_id] = driver
+        self._status[driver.driver_id] = DriverStatus.AVAILABLE
+        if rating is not None:
+            self._free.set_rating(driver.driver_id, rating)
+        self._free.push(driver.driver_id)
+
+
+class NearestDriverAllocator(BaseDriverAllocator):
+    """
+    Location-aware allocator: picks the free driver closest to the pickup.
+
+    Backed by a GridIndex that holds only AVAILABLE drivers, so drivers can
+    come online, move, take rides and go offline incrementally without
+    rebuilding anything. Busy and offline drivers are parked at their last
+    known location; release() re-indexes them there or at a given location
+    (e.g. the drop point).
+
+    Thread-safe: one lock guards the index. A nearest query may scan many
+    cells, so per-cell lock sharding would need multi-lock ordering for
+    little gain at sub-millisecond hold times.
+
+    With an `event_bus`, fleet changes are published as DRIVER_AVAILABLE,
+    DRIVER_MOVED and DRIVER_OFFLINE (driver_id, lat, lng) for supply-aware
+    consumers such as DynamicSurgePricing. They are published under the
+    lock so they arrive in order; observers must not call back into the
+    allocator.
+    """
+
+    def __init__(
+        self, cell_deg: float = DEFAULT_CELL_DEG, event_bus: EventBus | None = None
+    ) -> None:
+        self._index: GridIndex[str] = GridIndex(cell_deg)
+        self._drivers: dict[str, Driver] = {}
+        self._status: dict[str, DriverStatus] = {}
+        self._parked: dict[str, Location] = {}
+        self._lock = threading.Lock()
+        self._event_bus = event_bus
+
+    def __len__(self) -> int:
+        return len(self._drivers)
+
+    def available(self) -> int:
+        return len(self._index)
+
+    def status(self, driver_id: str) -> DriverStatus:
+        return _expect(self._status, driver_id)
+
+    def add_driver(self, driver: Driver, location: Location) -> None:
+        with self._lock:
+            if driver.driver_id in self._drivers:
+                raise ValueError(f"Driver already registered: {driver.driver_id!r}")
+            self._index.insert(driver.driver_id, location)
+            self._drivers[driver.driver_id] = driver
+            self._status[driver.driver_id] = DriverStatus.AVAILABLE
+            self._publish("DRIVER_AVAILABLE", driver.driver_id, location)
+
+    def move_driver(self, driver_id: str, location: Location) -> None:
+        with self._lock:
+            if _expect(self._status, driver_id) == DriverStatus.AVAILABLE:
+                self._index.move(driver_id, location)
+            else:
+                self._parked[driver_id] = location
+            self._publish("DRIVER_MOVED", driver_id, location)
+
+    def remove_driver(self, driver_id: str) -> None:
+        with self._lock:
+            location = self._unindex(driver_id)
+            del self._drivers[driver_id]
+            del self._status[driver_id]
+            self._publish("DRIVER_OFFLINE", driver_id, location)
+
+    def go_offline(self, driver_id: str) -> None:
+        with self._lock:
+            _expect(self._status, driver_id, DriverStatus.AVAILABLE)
+            location = self._unindex(driver_id)
+            self._parked[driver_id] = location
+            self._status[driver_id] = DriverStatus.OFFLINE
+            self._publish("DRIVER_OFFLINE", driver_id, location)
+
+    def go_online(self, driver_id: str, location: Location | None = None) -> None:
+        with self._lock:
+            _expect(self._status, driver_id, DriverStatus.OFFLINE)
+            self._make_available(driver_id, location)
+
+    def allocate(self, request: RideRequest) -> Driver:
+        with self._lock:
+            driver_id = self._index.nearest(request.pickup)
+            if driver_id is None:
+                raise LookupError("No drivers available")
+            self._parked[driver_id] = self._unindex(driver_id)
+            self._status[driver_id] = DriverStatus.EN_ROUTE
+            return self._drivers[driver_id]
+
+    def claim(self, driver_id: str) -> Driver:
+        with self._lock:
+            if driver_id not in self._index:
+                raise LookupError(f"Driver {driver_id!r} is not available")
+            self._parked[driver_id] = self._unindex(driver_id)
+            self._status[driver_id] = DriverStatus.EN_ROUTE
+            return self._drivers[driver_id]
+
+    def candidates(
+        self, location: Location, k: int, max_km: float = math.inf
+    ) -> list[tuple[str, float]]:
+        """
+        Up to `k` free drivers nearest to `location` as (driver_id, km),
+        closest first. Read-only: the drivers stay free until claimed.
+        """
+        with self._lock:
+            found = self._index.nearest_k(location, k, max_km / KM_PER_DEG)
+        return [(driver_id, math.sqrt(d2) * KM_PER_DEG) for d2, driver_id in found]
+
+    def start_trip(self, driver_id: str) -> None:
+        with self._lock:
+            _expect(self._status, driver_id, DriverStatus.EN_ROUTE)
+            self._status[driver_id] = DriverStatus.ON_TRIP
+
+    def release(self, driver_id: str, location: Location | None = None) -> None:
+        with self._lock:
+            if driver_id not in self._status:
+                return  # removed from the fleet while busy
+            _expect(self._status, driver_id, DriverStatus.EN_ROUTE, DriverStatus.ON_TRIP)
+            self._make_available(driver_id, location)
+
+    def restore(self, booking: Booking) -> None:
+        status = _DRIVER_STATUS_AFTER.get(booking.status)
+        if booking.driver is None or status is None:
+            return
+        driver_id = booking.driver.driver_id
+        with self._lock:
+            if driver_id not in self._status:
+                return
+            if status == DriverStatus.AVAILABLE:
+                if self._status[driver_id] != DriverStatus.AVAILABLE:
+                    location = (
+                        booking.request.drop
+                        if booking.status == BookingStatus.COMPLETED
+                        else None
+                    )
+                    self._make_available(driver_id, location)
+            else:
+                if self._status[driver_id] == DriverStatus.AVAILABLE:
+                    self._parked[driver_id] = self._unindex(driver_id)
+                self._status[driver_id] = status
+
+    def _unindex(self, driver_id: str) -> Location:
+        # Current location of an indexed or parked driver; drops it from both.
+        if driver_id in self._index:
+            location = self._index.location(driver_id)
+            self._index.remove(driver_id)
+            return location
+        return self._parked.pop(driver_id)
+
+    def _make_available(self, driver_id: str, location: Location | None) -> None:
+        parked = self._parked.pop(driver_id)
+        location = location or parked
+        self._index.insert(driver_id, location)
+        self._status[driver_id] = DriverStatus.AVAILABLE
+        self._publish("DRIVER_AVAILABLE", driver_id, location)
+
+    def _publish(self, event_type: str, driver_id: str, location: Location) -> None:
+        if self._event_bus is not None:
+            self._event_bus.publish_lazy(
+                event_type,
+                lambda: {"driver_id": driver_id, "lat": location.lat, "lng": location.lng},
+            )
+
+
+# Driver state implied by each journaled booking state.
+_DRIVER_STATUS_AFTER = {
+    BookingStatus.PAYMENT_PENDING: DriverStatus.EN_ROUTE,
+    BookingStatus.CONFIRMED: DriverStatus.EN_ROUTE,
+    BookingStatus.IN_PROGRESS: DriverStatus.ON_TRIP,
+    BookingStatus.COMPLETED: DriverStatus.AVAILABLE,
+    BookingStatus.CANCELLED: DriverStatus.AVAILABLE,
+    BookingStatus.FAILED: DriverStatus.AVAILABLE,
+}
+
+
+def _expect(
+    statuses: dict[str, DriverStatus], driver_id: str, *allowed: DriverStatus
+) -> DriverStatus:
+    status = statuses.get(driver_id)
+    if status is None:
+        raise LookupError(f"Unknown driver: {driver_id!r}")
+    if allowed and status not in allowed:
+        expected = " or ".join(a.value for a in allowed)
+        raise ValueError(f"Driver {driver_id!r} is {status.value}, expected {expected}")
+    return status
 
 
 class BookingService:
     """
     Core booking creation/driver assignment.
     Intentionally does not include auth/logging to keep concerns separated.
+
+    Ride lifecycle: CONFIRMED -> start_ride() -> IN_PROGRESS ->
+    complete_ride() -> COMPLETED; PAYMENT_PENDING/CONFIRMED -> cancel_ride()
+    -> CANCELLED. Completion, cancellation and release_driver() (used when
+    payment fails) hand the driver back to the allocator.
     """
 
-    def __init__(self, allocator: DriverAllocator) -> None:
+    def __init__(
+        self,
+        allocator: BaseDriverAllocator,
+        repository: BookingRepository | None = None,
+    ) -> None:
         self._allocator = allocator
+        self._repository = repository
 
-    def create_booking(self, request: RideRequest, fare) -> Booking:
+    def create_booking(
+        self, request: RideRequest, fare, driver_id: str | None = None
+    ) -> Booking:
+        """
+        Book `request` with the allocator's pick, or with `driver_id` when
+        the driver was already chosen (see BatchMatcher).
+        """
+        booking_id = new_id("bk")
+        if driver_id is None:
+            driver = self._allocator.allocate(request)
+        else:
+            driver = self._allocator.claim(driver_id)
+        # CREATED -> DRIVER_ASSIGNED -> PAYMENT_PENDING happens in one step;
+        # building the final state directly avoids two intermediate copies.
         booking = Booking(
-            booking_id=new_id("bk"),
+            booking_id=booking_id,
             request=request,
             fare=fare,
-            status=BookingStatus.CREATED,
-            driver=None,
+            status=BookingStatus.PAYMENT_PENDING,
+            driver=driver,
             payment=None,
         )
-        driver = self._allocator.allocate(request)
-        booking = replace(booking, driver=driver, status=BookingStatus.DRIVER_ASSIGNED)
-        booking = replace(booking, status=BookingStatus.PAYMENT_PENDING)
+        if self._repository is not None:
+            self._repository.save(booking)
+        return booking
+
+    def update(self, booking: Booking) -> None:
+        """
+        Record a booking's new state (e.g. after payment) in the repository.
+        """
+        if self._repository is not None:
+            self._repository.save(booking)
+
+    def start_ride(self, booking: Booking) -> Booking:
+        _require(booking, "start", BookingStatus.CONFIRMED)
+        self._allocator.start_trip(booking.driver.driver_id)
+        return self._transition(booking, BookingStatus.IN_PROGRESS)
+
+    def complete_ride(self, booking: Booking) -> Booking:
+        _require(booking, "complete", BookingStatus.IN_PROGRESS)
+        self._allocator.release(booking.driver.driver_id, booking.request.drop)
+        return self._transition(booking, BookingStatus.COMPLETED)
+
+    def cancel_ride(self, booking: Booking) -> Booking:
+        _require(
+            booking, "cancel", BookingStatus.PAYMENT_PENDING, BookingStatus.CONFIRMED
+        )
+        self.release_driver(booking)
+        return self._transition(booking, BookingStatus.CANCELLED)
+
+    def release_driver(self, booking: Booking) -> None:
+        if booking.driver is not None:
+            self._allocator.release(booking.driver.driver_id)
+
+    @property
+    def repository(self) -> BookingRepository | None:
+        return self._repository
+
+    def _transition(self, booking: Booking, status: BookingStatus) -> Booking:
+        booking = replace(booking, status=status)
+        self.update(booking)
         return booking
 
+
+def _require(booking: Booking, action: str, *allowed: BookingStatus) -> None:
+    if booking.status not in allowed:
+        raise ValueError(
+            f"Cannot {action} booking {booking.booking_id} in status {booking.status.value}"
+        )
@@ -0,0 +1,353 @@
+from __future__ import annotations
+
+import threading
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor
+from enum import Enum
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Callable, Iterable
+
+from .facade import RideBookingFacade
+from .geo import DEFAULT_CELL_DEG, cell_of
+from .ids import MAX_WORKER, SnowflakeIdGenerator
+from .models import (
+    Booking,
+    BookingResult,
+    BookingStatus,
+    Driver,
+    Location,
+    PaymentReceipt,
+    PaymentStatus,
+    RideRequest,
+    Rider,
+    set_id_generator,
+)
+from .money import Money
+from .pricing import PricingStrategy
+
+
+class ShardKey(str, Enum):
+    PICKUP_CELL = "PICKUP_CELL"  # requests from one geo cell share a shard
+    RIDER = "RIDER"  # all requests of a rider share a shard
+
+
+class RideAction(str, Enum):
+    # Values are the CabBookingFacade methods a shard runs.
+    START = "start_ride"
+    COMPLETE = "complete_ride"
+    CANCEL = "cancel_ride"
+
+
+# Worker-process state: the facade built by the initializer for this shard.
+_worker_facade: RideBookingFacade | None = None
+
+
+def _init_worker(factory: Callable[[int], RideBookingFacade], shard: int) -> None:
+    global _worker_facade
+    # Shard number as snowflake worker id: ids stay unique across shards even
+    # when worker pids collide modulo 1024.
+    set_id_generator(SnowflakeIdGenerator(worker_id=shard % (MAX_WORKER + 1)))
+    _worker_facade = factory(shard)
+
+
+def _worker_run(
+    ops: list[tuple[str | None, tuple[Any, ...]]]
+) -> list[tuple[Any, ...] | BaseException]:
+    # ops are (None, request) bookings and (action, (booking, request))
+    # transitions, run in order; each run of bookings is one book_rides().
+    facade = _worker_facade
+    assert facade is not None
+    out: list[tuple[Any, ...] | BaseException] = []
+    for action, group in groupby(ops, key=itemgetter(0)):
+        rows = [row for _, row in group]
+        if action is None:
+            results = facade.book_rides([_request_from_wire(row) for row in rows])
+            out.extend(
+                r.error if r.error is not None else _booking_to_wire(r.booking)
+                for r in results
+            )
+            continue
+        transition = getattr(facade, action)
+        for booking_row, request_row in rows:
+            try:
+                booking = transition(
+                    _booking_from_wire(booking_row, _request_from_wire(request_row))
+                )
+            except Exception as exc:
+                out.append(exc)
+            else:
+                out.append(_booking_to_wire(booking))
+    return out
+
+
+def _worker_set_pricing(strategy: PricingStrategy) -> None:
+    assert _worker_facade is not None
+    _worker_facade.set_pricing_strategy(strategy)
+
+
+class ShardedBookingRouter(RideBookingFacade):
+    """
+    Partitions bookings across worker processes, one shard per process.
+
+    - Each worker builds its own facade, allocator and repository by calling
+      `factory(shard)` (a picklable, module-level callable) once at start-up;
+      shard state never crosses the process boundary.
+    - Requests are routed by pickup geo cell or by rider, so a shard only
+      needs the drivers of its own regions (or all bookings of its riders).
+    - submit() buffers requests per shard and ships them in batches of
+      `batch_size`, amortising IPC; each request gets its own Future.
+      flush() sends partially filled batches. Requests and bookings cross
+      the boundary as flat tuples (pickling nested frozen dataclasses costs
+      more than booking them), and a booking's request is never sent back.
+    - start_ride(), complete_ride() and cancel_ride() (or
+      submit_transition()) run on the shard that booked the ride, found
+      with shard_of(booking.request), so its driver is released there; the
+      shard facade must provide them, as CabBookingFacade does.
+    - A shard executes its batches in submission order, so a transition
+      runs after the booking it follows, and set_pricing_strategy()
+      (broadcast to every shard after a flush) takes effect between the
+      same requests on every shard.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[int], RideBookingFacade],
+        shards: int,
+        *,
+        shard_key: ShardKey = ShardKey.PICKUP_CELL,
+        cell_deg: float = DEFAULT_CELL_DEG,
+        batch_size: int = 256,
+        mp_context=None,
+    ) -> None:
+        if shards <= 0:
+            raise ValueError("shards must be > 0")
+        if batch_size <= 0:
+            raise ValueError("batch_size must be > 0")
+        self._shard_key = shard_key
+        self._cell_deg = cell_deg
+        self._batch_size = batch_size
+        self._lock = threading.Lock()
+        # Per shard: (action or None for a booking, wire row, request, future).
+        self._pending: list[list[tuple[str | None, Any, RideRequest, Future]]] = [
+            [] for _ in range(shards)
+        ]
+        self._closed = False
+        # One single-process pool per shard pins each shard to one worker.
+        self._executors = [
+            ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=mp_context,
+                initializer=_init_worker,
+                initargs=(factory, shard),
+            )
+            for shard in range(shards)
+        ]
+
+    @property
+    def shards(self) -> int:
+        return len(self._executors)
+
+    def shard_of(self, request: RideRequest) -> int:
+        if self._shard_key == ShardKey.RIDER:
+            key = zlib.crc32(request.rider.rider_id.encode())
+        else:
+            # Tuples of ints hash identically in every process and run.
+            key = hash(cell_of(request.pickup.lat, request.pickup.lng, self._cell_deg))
+        return key % len(self._executors)
+
+    def submit(self, request: RideRequest) -> "Future[Booking]":
+        return self._enqueue(None, _request_to_wire(request), request)
+
+    def submit_transition(self, booking: Booking, action: RideAction) -> "Future[Booking]":
+        """
+        Queue a ride transition on the booking's shard; the Future holds the
+        updated booking.
+        """
+        action = RideAction(action)
+        row = (_booking_to_wire(booking), _request_to_wire(booking.request))
+        return self._enqueue(action.value, row, booking.request)
+
+    def flush(self) -> None:
+        """
+        Ship every buffered request now instead of waiting for a full batch.
+        """
+        with self._lock:
+            for shard in range(len(self._pending)):
+                self._send_locked(shard)
+
+    def book_ride(self, request: RideRequest) -> Booking:
+        future = self.submit(request)
+        self.flush()
+        return future.result()
+
+    def book_rides(self, requests: Iterable[RideRequest]) -> list[BookingResult]:
+        submitted = [(request, self.submit(request)) for request in requests]
+        self.flush()
+        results: list[BookingResult] = []
+        for request, future in submitted:
+            try:
+                booking = future.result()
+            except Exception as exc:
+                results.append(BookingResult(request=request, error=exc))
+            else:
+                results.append(BookingResult(request=request, booking=booking))
+        return results
+
+    def start_ride(self, booking: Booking) -> Booking:
+        return self._transition(booking, RideAction.START)
+
+    def complete_ride(self, booking: Booking) -> Booking:
+        return self._transition(booking, RideAction.COMPLETE)
+
+    def cancel_ride(self, booking: Booking) -> Booking:
+        return self._transition(booking, RideAction.CANCEL)
+
+    def set_pricing_strategy(self, strategy: PricingStrategy) -> None:
+        with self._lock:
+            futures = []
+            for shard, executor in enumerate(self._executors):
+                self._send_locked(shard)
+                futures.append(executor.submit(_worker_set_pricing, strategy))
+        for future in futures:
+            future.result()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            for shard in range(len(self._pending)):
+                self._send_locked(shard)
+            self._closed = True
+        for executor in self._executors:
+            executor.shutdown(wait=True)
+
+    def __enter__(self) -> "ShardedBookingRouter":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _transition(self, booking: Booking, action: RideAction) -> Booking:
+        future = self.submit_transition(booking, action)
+        self.flush()
+        return future.result()
+
+    def _enqueue(
+        self, action: str | None, row: Any, request: RideRequest
+    ) -> "Future[Booking]":
+        future: Future[Booking] = Future()
+        shard = self.shard_of(request)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("ShardedBookingRouter is closed")
+            pending = self._pending[shard]
+            pending.append((action, row, request, future))
+            if len(pending) >= self._batch_size:
+                self._send_locked(shard)
+        return future
+
+    def _send_locked(self, shard: int) -> None:
+        pending = self._pending[shard]
+        if not pending:
+            return
+        self._pending[shard] = []
+        batch = self._executors[shard].submit(
+            _worker_run, [(action, row) for action, row, _, _ in pending]
+        )
+        batch.add_done_callback(lambda done: _resolve(done, pending))
+
+
+def _resolve(
+    batch: "Future[list[tuple[Any, ...] | BaseException]]",
+    pending: list[tuple[str | None, Any, RideRequest, "Future[Booking]"]],
+) -> None:
+    exc = batch.exception()
+    if exc is not None:
+        # The whole batch failed (worker crashed, unpicklable details, ...).
+        for _, _, _, future in pending:
+            future.set_exception(exc)
+        return
+    for (_, _, request, future), outcome in zip(pending, batch.result()):
+        if isinstance(outcome, BaseException):
+            future.set_exception(outcome)
+        else:
+            future.set_result(_booking_from_wire(outcome, request))
+
+
+def _request_to_wire(request: RideRequest) -> tuple[Any, ...]:
+    return (
+        request.rider.rider_id,
+        request.rider.name,
+        request.pickup.lat,
+        request.pickup.lng,
+        request.drop.lat,
+        request.drop.lng,
+        request.distance_km,
+        request.payment_type,
+        request.payment_details,
+        request.auth_token,
+    )
+
+
+def _request_from_wire(row: tuple[Any, ...]) -> RideRequest:
+    rider_id, name, plat, plng, dlat, dlng, distance_km, ptype, details, token = row
+    return RideRequest(
+        rider=Rider(rider_id=rider_id, name=name),
+        pickup=Location(lat=plat, lng=plng),
+        drop=Location(lat=dlat, lng=dlng),
+        distance_km=distance_km,
+        payment_type=ptype,
+        payment_details=details,
+        auth_token=token,
+    )
+
+
+def _booking_to_wire(booking: Booking) -> tuple[Any, ...]:
+    driver = booking.driver
+    receipt = booking.payment
+    return (
+        booking.booking_id,
+        booking.fare.minor,
+        booking.fare.currency,
+        booking.status.value,
+        driver.driver_id if driver else None,
+        driver.name if driver else None,
+        receipt.receipt_id if receipt else None,
+        receipt.amount.minor if receipt else 0,
+        receipt.status.value if receipt else None,
+        receipt.method if receipt else None,
+        booking.created_at,
+    )
+
+
+def _booking_from_wire(row: tuple[Any, ...], request: RideRequest) -> Booking:
+    (
+        booking_id,
+        fare_minor,
+        currency,
+        status,
+        driver_id,
+        driver_name,
+        receipt_id,
+        receipt_minor,
+        receipt_status,
+        receipt_method,
+        created_at,
+    ) = row
+    return Booking(
+        booking_id=booking_id,
+        request=request,
+        fare=Money(fare_minor, currency),
+        status=BookingStatus(status),
+        driver=None if driver_id is None else Driver(driver_id=driver_id, name=driver_name),
+        payment=None
+        if receipt_id is None
+        else PaymentReceipt(
+            receipt_id=receipt_id,
+            amount=Money(receipt_minor, currency),
+            status=PaymentStatus(receipt_status),
+            method=receipt_method,
+        ),
+        created_at=created_at,
+    )
@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+import random
+import time
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+from .config import AppConfig
+from .facade import CabBookingFacade
+from .geo import KM_PER_DEG, distance_km
+from .models import Booking, BookingStatus, Driver, DriverStatus, Location, RideRequest, Rider
+from .observer import EventBus
+from .payment import DefaultPaymentFactory
+from .pricing import NormalPricing, PricingStrategy
+from .services import BaseDriverAllocator, BookingService, DriverAllocator, NearestDriverAllocator
+from .wallet import WalletLedger
+
+# Relative demand per hour of day: overnight lull, morning and evening peaks.
+DEFAULT_DEMAND_CURVE = (
+    0.25, 0.15, 0.10, 0.10, 0.15, 0.30, 0.60, 1.00, 1.00, 0.80, 0.60, 0.55,
+    0.60, 0.55, 0.50, 0.55, 0.70, 0.90, 1.00, 0.90, 0.70, 0.55, 0.45, 0.35,
+)  # fmt: skip
+
+# Simulation event kinds.
+_ARRIVAL, _PICKUP, _DROPOFF, _REPOSITION = range(4)
+
+
+class EventQueue:
+    """
+    Time-ordered queue of (time, seq, kind, data) tuples on a heapq binary
+    heap: O(log n) push/pop, no per-event objects beyond the tuple, and a
+    sequence number so same-time events pop in scheduling order (which keeps
+    runs deterministic).
+    """
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, int, Any]] = []
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, at: float, kind: int, data: Any = None) -> None:
+        heapq.heappush(self._heap, (at, next(self._seq), kind, data))
+
+    def pop(self) -> tuple[float, int, int, Any]:
+        return heapq.heappop(self._heap)
+
+    def peek_time(self) -> float | None:
+        return self._heap[0][0] if self._heap else None
+
+
+@dataclass(frozen=True, slots=True)
+class SimulationConfig:
+    seed: int = 0
+    hours: float = 24.0
+    drivers: int = 2_000
+    peak_requests_per_hour: float = 2_000.0
+    demand_curve: Sequence[float] = DEFAULT_DEMAND_CURVE
+    center: Location = Location(12.9716, 77.5946)
+    radius_km: float = 12.0
+    speed_kmh: float = 25.0
+    road_factor: float = 1.3  # road distance / straight-line distance
+    patience_s: float = 300.0  # riders give up after waiting this long for a match
+    reposition_s: float = 600.0  # idle drivers drift towards the centre this often
+    reposition_km: float = 1.0
+    payment_failure_rate: float = 0.01
+    nearest_dispatch: bool = True  # NearestDriverAllocator, else DriverAllocator
+
+
+@dataclass(frozen=True, slots=True)
+class SimulationReport:
+    requests: int
+    completed: int
+    failed: int  # booked but payment failed
+    abandoned: int  # no driver matched within patience_s
+    events: int
+    sim_seconds: float
+    wall_seconds: float
+    matching_s: tuple[float, float, float]  # p50, p90, p99 request -> booking
+    pickup_eta_s: tuple[float, float, float]  # p50, p90, p99 booking -> pickup
+    fare_minor: tuple[int, int, int]  # p10, p50, p90 of completed rides
+    fare_mean_minor: float
+    utilization: float  # share of driver time en route or on trip
+
+    @property
+    def events_per_s(self) -> float:
+        return self.events / self.wall_seconds if self.wall_seconds else 0.0
+
+    @property
+    def speedup(self) -> float:
+        return self.sim_seconds / self.wall_seconds if self.wall_seconds else 0.0
+
+    def summary(self) -> str:
+        m, e, f = self.matching_s, self.pickup_eta_s, self.fare_minor
+        return "\n".join(
+            [
+                f"requests={self.requests} completed={self.completed} "
+                f"failed={self.failed} abandoned={self.abandoned}",
+                f"matching p50={m[0]:.0f}s p90={m[1]:.0f}s p99={m[2]:.0f}s  "
+                f"pickup eta p50={e[0]:.0f}s p90={e[1]:.0f}s p99={e[2]:.0f}s",
+                f"fare p10={f[0] / 100:.2f} p50={f[1] / 100:.2f} p90={f[2] / 100:.2f} "
+                f"mean={self.fare_mean_minor / 100:.2f}  utilization={self.utilization:.1%}",
+                f"{self.sim_seconds / 3600:.1f}h simulated in {self.wall_seconds:.2f}s "
+                f"({self.speedup:,.0f}x)  events={self.events:,} "
+                f"({self.events_per_s:,.0f}/s)  "
+                f"bookings={self.completed + self.failed:,} "
+                f"({(self.completed + self.failed) / max(self.wall_seconds, 1e-9):,.0f}/s)",
+            ]
+        )
+
+
+class CitySimulator:
+    """
+    Seedable discrete-event simulation of one city driving a real
+    CabBookingFacade at simulated time.
+
+    - Riders arrive as a Poisson process whose rate follows `demand_curve`
+      (thinning against the peak rate), from pickups clustered around the
+      centre to drops anywhere in the city.
+    - A rider who finds no free driver waits (FIFO) and is matched when a
+      driver is released, or gives up after `patience_s`.
+    - Drivers drive to the pickup and the drop at `speed_kmh`; start_ride() and
+      complete_ride() run at those simulated instants, releasing the driver at
+      the drop point. Idle drivers drift back towards the centre every
+      `reposition_s` (NearestDriverAllocator only).
+    - Wallet payments debit `wallets` (default: an empty WalletLedger).
+
+    Time only advances from event to event, so a day runs in seconds. now()
+    is the simulated clock: pass it to time-aware strategies, e.g.
+    `DynamicSurgePricing(clock=sim.now)` attached to `sim.event_bus`. The same
+    seed and config replay the same run.
+    """
+
+    def __init__(
+        self,
+        config: SimulationConfig | None = None,
+        *,
+        pricing_strategy: PricingStrategy | None = None,
+        event_bus: EventBus | None = None,
+        wallets: WalletLedger | None = None,
+    ) -> None:
+        self.config = config = config or SimulationConfig()
+        if config.drivers <= 0 or config.hours <= 0:
+            raise ValueError("drivers and hours must be > 0")
+        if not config.demand_curve or max(config.demand_curve) <= 0:
+            raise ValueError("demand_curve needs a positive entry")
+        # Separate streams: demand is identical whatever the fleet does, so
+        # runs that differ only in dispatch or pricing see the same riders.
+        self._rng = random.Random(f"{config.seed}:fleet")
+        self._demand = random.Random(f"{config.seed}:demand")
+        self._now = 0.0
+        self.event_bus = event_bus or EventBus()
+        self._where: dict[str, Location] = {}
+        fleet = [Driver(f"d{i}", f"Driver {i}") for i in range(config.drivers)]
+        for driver in fleet:
+            self._where[driver.driver_id] = self._random_point(self._rng, config.radius_km)
+        self.allocator: BaseDriverAllocator
+        if config.nearest_dispatch:
+            allocator = NearestDriverAllocator(event_bus=self.event_bus)
+            for driver in fleet:
+                allocator.add_driver(driver, self._where[driver.driver_id])
+            self.allocator = allocator
+        else:
+            self.allocator = DriverAllocator(fleet)
+        self.facade = CabBookingFacade(
+            config=AppConfig(),
+            pricing_strategy=pricing_strategy or NormalPricing(),
+            payment_factory=DefaultPaymentFactory(
+                wallets if wallets is not None else WalletLedger()
+            ),
+            booking_service=BookingService(self.allocator),
+            event_bus=self.event_bus,
+        )
+
+    def now(self) -> float:
+        return self._now
+
+    def run(self) -> SimulationReport:
+        config = self.config
+        horizon = config.hours * 3600.0
+        queue = EventQueue()
+        push, pop = queue.push, queue.pop
+        rng = self._demand
+        waiting: deque[tuple[RideRequest, float]] = deque()
+        matching = array("d")
+        pickup_eta = array("d")
+        fares = array("q")
+        requests = failed = abandoned = events = 0
+        busy_s = 0.0
+        speed = config.speed_kmh / 3600.0  # km/s
+
+        curve = config.demand_curve
+        peak = config.peak_requests_per_hour * max(curve) / 3600.0  # per second
+        bucket_s = 86_400.0 / len(curve)
+
+        def next_arrival(after: float) -> None:
+            # Thinning: candidates at the peak rate, kept with rate(t) / peak.
+            t = after
+            while True:
+                t += rng.expovariate(peak)
+                if t >= horizon:
+                    return
+                rate = config.peak_requests_per_hour * curve[int(t // bucket_s) % len(curve)]
+                if rng.random() * peak * 3600.0 < rate:
+                    push(t, _ARRIVAL)
+                    return
+
+        def try_book(request: RideRequest, requested_at: float, now: float) -> bool:
+            nonlocal failed, busy_s
+            try:
+                booking = self.facade.book_ride(request)
+            except LookupError:
+                return False
+            matching.append(now - requested_at)
+            driver_id = booking.driver.driver_id
+            if booking.status != BookingStatus.CONFIRMED:
+                failed += 1  # the facade already released the driver
+                return True
+            eta = distance_km(self._where[driver_id], request.pickup) * config.road_factor / speed
+            trip = request.distance_km / speed
+            pickup_eta.append(eta)
+            busy_s += max(0.0, min(now + eta + trip, horizon) - now)
+            push(now + eta, _PICKUP, booking)
+            return True
+
+        def drain_waiting(now: float) -> None:
+            nonlocal abandoned
+            while waiting:
+                request, requested_at = waiting[0]
+                if now - requested_at > config.patience_s:
+                    waiting.popleft()
+                    abandoned += 1
+                    continue
+                if not try_book(request, requested_at, now):
+                    return
+                waiting.popleft()
+
+        next_arrival(0.0)
+        if config.reposition_s > 0 and hasattr(self.allocator, "move_driver"):
+            for driver_id in self._where:
+                push(self._rng.uniform(0, config.reposition_s), _REPOSITION, driver_id)
+
+        wall_start = time.perf_counter()
+        while queue:
+            now, _, kind, data = pop()
+            self._now = now
+            events += 1
+            if kind == _ARRIVAL:
+                requests += 1
+                waiting.append((self._random_request(requests), now))
+                drain_waiting(now)  # FIFO: earlier riders are matched first
+                next_arrival(now)
+            elif kind == _PICKUP:
+                started = self.facade.start_ride(data)
+                push(now + started.request.distance_km / speed, _DROPOFF, started)
+            elif kind == _DROPOFF:
+                booking: Booking = data
+                self.facade.complete_ride(booking)
+                self._where[booking.driver.driver_id] = booking.request.drop
+                fares.append(booking.fare.minor)
+                drain_waiting(now)
+            else:  # _REPOSITION
+                if now < horizon:
+                    self._reposition(data)
+                    push(now + config.reposition_s, _REPOSITION, data)
+            if waiting and now - waiting[0][1] > config.patience_s:
+                drain_waiting(now)
+        wall_seconds = time.perf_counter() - wall_start
+        abandoned += len(waiting)
+
+        return SimulationReport(
+            requests=requests,
+            completed=len(fares),
+            failed=failed,
+            abandoned=abandoned,
+            events=events,
+            sim_seconds=self._now,
+            wall_seconds=wall_seconds,
+            matching_s=_quantiles(matching, (0.5, 0.9, 0.99)),
+            pickup_eta_s=_quantiles(pickup_eta, (0.5, 0.9, 0.99)),
+            fare_minor=_quantiles(fares, (0.1, 0.5, 0.9)),
+            fare_mean_minor=sum(fares) / len(fares) if fares else 0.0,
+            utilization=busy_s / (config.drivers * horizon),
+        )
+
+    def _random_request(self, n: int) -> RideRequest:
+        config, rng = self.config, self._demand
+        pickup = self._random_point(rng, config.radius_km / 2, gaussian=True)
+        drop = self._random_point(rng, config.radius_km)
+        distance = max(0.5, distance_km(pickup, drop) * config.road_factor)
+        upi_id = "rider" if rng.random() < config.payment_failure_rate else f"r{n}@upi"
+        return RideRequest(
+            rider=Rider(f"r{n}", "Rider"),
+            pickup=pickup,
+            drop=drop,
+            distance_km=round(distance, 2),
+            payment_type="UPI",
+            payment_details={"upi_id": upi_id},
+        )
+
+    def _reposition(self, driver_id: str) -> None:
+        allocator = self.allocator
+        if allocator.status(driver_id) != DriverStatus.AVAILABLE:  # type: ignore[attr-defined]
+            return
+        config, rng = self.config, self._rng
+        here = self._where[driver_id]
+        step = min(config.reposition_km, distance_km(here, config.center)) / KM_PER_DEG
+        # Head back towards the busy centre, give or take 45 degrees.
+        kx = math.cos(math.radians(here.lat))
+        angle = math.atan2(config.center.lat - here.lat, (config.center.lng - here.lng) * kx)
+        angle += rng.gauss(0, math.pi / 4)
+        there = Location(
+            here.lat + step * math.sin(angle),
+            here.lng + step * math.cos(angle) / kx,
+        )
+        self._where[driver_id] = there
+        allocator.move_driver(driver_id, there)  # type: ignore[attr-defined]
+
+    def _random_point(
+        self, rng: random.Random, radius_km: float, gaussian: bool = False
+    ) -> Location:
+        center = self.config.center
+        if gaussian:
+            r = min(abs(rng.gauss(0, radius_km / 2)), radius_km * 2)
+        else:
+            r = radius_km * math.sqrt(rng.random())  # uniform over the disc
+        angle = rng.uniform(0, 2 * math.pi)
+        dlat = r * math.sin(angle) / KM_PER_DEG
+        dlng = r * math.cos(angle) / (KM_PER_DEG * math.cos(math.radians(center.lat)))
+        return Location(center.lat + dlat, center.lng + dlng)
+
+
+def _quantiles(values: array, qs: tuple[float, ...]) -> Any:
+    if not values:
+        return tuple(0 for _ in qs)
+    ordered = sorted(values)
+    last = len(ordered) - 1
+    return tuple(ordered[min(last, int(q * len(ordered)))] for q in qs)
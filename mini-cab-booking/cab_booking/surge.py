@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from array import array
+from collections import deque
+from typing import Any, Callable, Sequence
+
+from .geo import DEFAULT_CELL_DEG, Cell, cell_of
+from .models import Location, RideRequest
+from .money import Money
+from .observer import Event, EventBus, Observer
+from .pricing import NormalPricing, PricingStrategy
+
+# Multipliers are kept as integer thousandths so fares stay exact integers.
+_MILLI = 1000
+# Cells the sweep re-checks per update: more than the one an update can
+# create, so the sweep keeps up.
+_SWEEP_PER_UPDATE = 2
+
+SURGE_EVENT_TYPES = (
+    "RIDE_REQUESTED",
+    "DRIVER_AVAILABLE",
+    "DRIVER_MOVED",
+    "DRIVER_ASSIGNED",
+    "DRIVER_OFFLINE",
+)
+
+
+class _CellState:
+    __slots__ = ("counts", "epoch", "demand", "supply", "multiplier")
+
+    def __init__(self, buckets: int, epoch: int) -> None:
+        self.counts = array("i", bytes(4 * buckets))
+        self.epoch = epoch  # bucket epoch of the newest slot
+        self.demand = 0  # sum(counts): requests inside the window
+        self.supply = 0  # free drivers currently in the cell
+        self.multiplier = _MILLI
+
+
+class DynamicSurgePricing(PricingStrategy, Observer):
+    """
+    Strategy + Observer: surge multiplier per geo cell from live demand and
+    supply, fed incrementally by EventBus events (see attach()).
+
+    - Demand: RIDE_REQUESTED events in a sliding window, kept per cell as a
+      ring buffer of `buckets` counters. Expired slots are zeroed when the
+      cell is next touched, and every update also re-checks the two least
+      recently checked cells, so cells that went quiet are dropped too;
+      there is no periodic scan.
+    - Supply: free drivers per cell. DRIVER_AVAILABLE / DRIVER_MOVED place a
+      free driver; DRIVER_ASSIGNED / DRIVER_OFFLINE take it out.
+    - A cell recomputes its cached multiplier only when its own counts change,
+      so quote() is one dict lookup and an integer multiply. Cells with no
+      demand and no supply are dropped, bounding memory to active cells
+      plus those that went quiet within the last few sweeps.
+
+    multiplier = 1 + sensitivity * (demand / (supply + 1) - 1), clamped to
+    [1, max_multiplier] and rounded down to `step`. calculate_fare() has no
+    location and returns the base fare.
+    """
+
+    def __init__(
+        self,
+        base: PricingStrategy | None = None,
+        *,
+        cell_deg: float = DEFAULT_CELL_DEG,
+        window_s: float = 300.0,
+        buckets: int = 30,
+        sensitivity: float = 0.5,
+        max_multiplier: float = 3.0,
+        step: float = 0.1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if window_s <= 0 or buckets <= 0:
+            raise ValueError("window_s and buckets must be > 0")
+        if max_multiplier < 1 or step <= 0:
+            raise ValueError("max_multiplier must be >= 1 and step > 0")
+        self._base = base or NormalPricing()
+        self._cell_deg = cell_deg
+        self._buckets = buckets
+        self._bucket_s = window_s / buckets
+        self._sensitivity = sensitivity
+        self._max_milli = round(max_multiplier * _MILLI)
+        self._step_milli = max(1, round(step * _MILLI))
+        self._clock = clock
+        self._cells: dict[Cell, _CellState] = {}
+        # Round-robin sweep order; entries whose state was dropped are
+        # discarded when they come up.
+        self._sweep: deque[tuple[Cell, _CellState]] = deque()
+        self._free: dict[str, Cell] = {}
+        self._lock = threading.Lock()
+        self._handlers: dict[str, Callable[[dict[str, Any]], None]] = {
+            "RIDE_REQUESTED": self._on_ride_requested,
+            "DRIVER_AVAILABLE": self._on_driver_available,
+            "DRIVER_MOVED": self._on_driver_moved,
+            "DRIVER_ASSIGNED": self._on_driver_busy,
+            "DRIVER_OFFLINE": self._on_driver_busy,
+        }
+
+    def attach(self, event_bus: EventBus) -> None:
+        for event_type in SURGE_EVENT_TYPES:
+            event_bus.subscribe(event_type, self)
+
+    # --- PricingStrategy ---
+
+    def calculate_fare(self, distance_km: float) -> Money:
+        return self._base.calculate_fare(distance_km)
+
+    def calculate_fares(self, distances: Any) -> Sequence[int]:
+        return self._base.calculate_fares(distances)
+
+    def quote(self, request: RideRequest) -> Money:
+        fare = self._base.quote(request)
+        milli = self.multiplier_milli(request.pickup)
+        if milli == _MILLI:
+            return fare
+        # ROUND_HALF_UP of fare * milli / 1000 (fares are positive).
+        return Money((fare.minor * milli + _MILLI // 2) // _MILLI, fare.currency)
+
+    def multiplier(self, location: Location) -> float:
+        return self.multiplier_milli(location) / _MILLI
+
+    def multiplier_milli(self, location: Location) -> int:
+        cell = cell_of(location.lat, location.lng, self._cell_deg)
+        state = self._cells.get(cell)
+        if state is None:
+            return _MILLI
+        epoch = self._epoch()
+        if state.epoch == epoch:
+            return state.multiplier
+        with self._lock:
+            state = self._cells.get(cell)
+            if state is None:
+                return _MILLI
+            self._advance(cell, state, epoch)
+            return state.multiplier
+
+    # --- incremental updates ---
+
+    def record_request(self, location: Location) -> None:
+        cell = cell_of(location.lat, location.lng, self._cell_deg)
+        epoch = self._epoch()
+        with self._lock:
+            state = self._state(cell, epoch)
+            self._advance(cell, state, epoch, evict=False)
+            state.counts[epoch % self._buckets] += 1
+            state.demand += 1
+            self._reprice(state)
+            self._sweep_some(epoch)
+
+    def driver_available(self, driver_id: str, location: Location) -> None:
+        cell = cell_of(location.lat, location.lng, self._cell_deg)
+        with self._lock:
+            old = self._free.get(driver_id)
+            if old == cell:
+                return
+            if old is not None:
+                self._add_supply(old, -1)
+            self._free[driver_id] = cell
+            self._add_supply(cell, 1)
+
+    def driver_moved(self, driver_id: str, location: Location) -> None:
+        # Only free drivers count as supply; a busy driver moving is ignored.
+        if driver_id in self._free:
+            self.driver_available(driver_id, location)
+
+    def driver_unavailable(self, driver_id: str) -> None:
+        with self._lock:
+            cell = self._free.pop(driver_id, None)
+            if cell is not None:
+                self._add_supply(cell, -1)
+
+    def snapshot(self, location: Location) -> tuple[int, int, float]:
+        """
+        (demand in window, free drivers, multiplier) for the cell of `location`.
+        """
+        milli = self.multiplier_milli(location)
+        state = self._cells.get(cell_of(location.lat, location.lng, self._cell_deg))
+        if state is None:
+            return 0, 0, milli / _MILLI
+        return state.demand, state.supply, milli / _MILLI
+
+    # --- Observer ---
+
+    def on_event(self, event: Event) -> None:
+        handler = self._handlers.get(event.event_type)
+        if handler is not None:
+            handler(event.payload)
+
+    def _on_ride_requested(self, payload: dict[str, Any]) -> None:
+        self.record_request(Location(lat=payload["lat"], lng=payload["lng"]))
+
+    def _on_driver_available(self, payload: dict[str, Any]) -> None:
+        self.driver_available(
+            payload["driver_id"], Location(lat=payload["lat"], lng=payload["lng"])
+        )
+
+    def _on_driver_moved(self, payload: dict[str, Any]) -> None:
+        self.driver_moved(
+            payload["driver_id"], Location(lat=payload["lat"], lng=payload["lng"])
+        )
+
+    def _on_driver_busy(self, payload: dict[str, Any]) -> None:
+        driver_id = payload.get("driver_id")
+        if driver_id is not None:
+            self.driver_unavailable(driver_id)
+
+    # --- internals (callers hold the lock) ---
+
+    def _epoch(self) -> int:
+        return math.floor(self._clock() / self._bucket_s)
+
+    def _state(self, cell: Cell, epoch: int) -> _CellState:
+        state = self._cells.get(cell)
+        if state is None:
+            state = self._cells[cell] = _CellState(self._buckets, epoch)
+            self._sweep.append((cell, state))
+        return state
+
+    def _add_supply(self, cell: Cell, delta: int) -> None:
+        epoch = self._epoch()
+        state = self._state(cell, epoch)
+        self._advance(cell, state, epoch, evict=False)
+        state.supply += delta
+        self._reprice(state)
+        if state.demand == 0 and state.supply == 0:
+            del self._cells[cell]
+        self._sweep_some(epoch)
+
+    def _sweep_some(self, epoch: int) -> None:
+        sweep, cells = self._sweep, self._cells
+        for _ in range(min(_SWEEP_PER_UPDATE, len(sweep))):
+            cell, state = sweep.popleft()
+            if cells.get(cell) is not state:
+                continue  # dropped (and maybe re-created) since it was queued
+            self._advance(cell, state, epoch)
+            if cell in cells:
+                sweep.append((cell, state))
+
+    def _advance(self, cell: Cell, state: _CellState, epoch: int, evict: bool = True) -> None:
+        gap = epoch - state.epoch
+        if gap <= 0:
+            return
+        counts, n = state.counts, self._buckets
+        if gap >= n:
+            for i in range(n):
+                counts[i] = 0
+            state.demand = 0
+        else:
+            for e in range(state.epoch + 1, epoch + 1):
+                i = e % n
+                state.demand -= counts[i]
+                counts[i] = 0
+        state.epoch = epoch
+        self._reprice(state)
+        if evict and state.demand == 0 and state.supply == 0:
+            del self._cells[cell]
+
+    def _reprice(self, state: _CellState) -> None:
+        pressure = state.demand / (state.supply + 1)
+        raw = round((1.0 + self._sensitivity * (pressure - 1.0)) * _MILLI)
+        milli = min(max(raw, _MILLI), self._max_milli)
+        step = self._step_milli
+        state.multiplier = _MILLI + (milli - _MILLI) // step * step
@@ -0,0 +1,619 @@
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Iterator, TypeVar
+
+from .models import new_id
+from .money import DEFAULT_CURRENCY, Money
+
+T = TypeVar("T")
+
+_SEGMENT_SUFFIX = ".wal"
+_SNAPSHOT = "snapshot.json"
+
+# One log entry: (seq, op, wallet_id, amount in minor units, reference).
+Entry = tuple[int, str, str, int, "str | None"]
+
+
+class LedgerOp(str, Enum):
+    OPEN = "OPEN"
+    CREDIT = "CREDIT"
+    DEBIT = "DEBIT"
+    HOLD = "HOLD"  # reference: hold id
+    CAPTURE = "CAPTURE"  # reference: hold id, amount: captured part
+    RELEASE = "RELEASE"  # reference: hold id
+
+
+@dataclass(frozen=True, slots=True)
+class Hold:
+    hold_id: str
+    wallet_id: str
+    amount: Money
+
+
+class WalletLog:
+    """
+    Append-only transaction log of a WalletLedger plus its snapshot file.
+
+    Entries are JSON lines in numbered segment files. Group commit, as in
+    BookingJournal: append() only buffers, and commit() writes everything
+    buffered with one write() + one fsync, returning once everything
+    appended before it is durable. Concurrent commit() calls share one
+    write, and appends never wait for an fsync, so they are safe under the
+    ledger's shard locks; commit() must be called without them.
+    Each snapshot starts a new segment, so recovery reads the snapshot and
+    replays only the segments from there on; older segments are kept as
+    history.
+    """
+
+    def __init__(self, directory: str, fsync: bool = True) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._fsync = fsync
+        self._buffer: list[Entry] = []
+        self._appended = 0  # entries appended so far
+        self._durable = 0  # entries written (and fsynced) so far
+        # _lock guards the buffer; _write_lock makes one thread at a time write.
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        existing = segment_paths(directory)
+        self._segment_no = _segment_no(existing[-1]) + 1 if existing else 0
+        self._file = self._open_segment()
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    def append(self, entries: list[Entry]) -> None:
+        with self._lock:
+            self._buffer.extend(entries)
+            self._appended += len(entries)
+
+    def commit(self) -> None:
+        """
+        Return once everything appended so far is durable.
+        """
+        with self._lock:
+            target = self._appended
+        if self._durable >= target:
+            return
+        with self._write_lock:
+            # Whoever held the lock may have written our entries already.
+            if self._durable < target:
+                self._write_pending()
+
+    def rotate(self) -> int:
+        """
+        Commit, then continue in a new segment; returns its number.
+        """
+        with self._write_lock:
+            self._write_pending()
+            self._file.close()
+            self._segment_no += 1
+            self._file = self._open_segment()
+            return self._segment_no
+
+    def write_snapshot(
+        self,
+        seq: int,
+        segment: int,
+        balances: dict[str, int],
+        holds: dict[str, tuple[str, int]],
+    ) -> None:
+        """
+        Atomically replace the snapshot: state as of `seq`, with every later
+        entry in segment `segment` or after.
+        """
+        path = os.path.join(self._directory, _SNAPSHOT)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {"seq": seq, "segment": segment, "balances": balances, "holds": holds},
+                f,
+                separators=(",", ":"),
+            )
+            f.flush()
+            if self._fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def close(self) -> None:
+        with self._write_lock:
+            if self._file.closed:
+                return
+            self._write_pending()
+            self._file.close()
+
+    def _write_pending(self) -> None:
+        # Caller holds _write_lock. Appends continue into a fresh buffer
+        # while this batch is written and fsynced.
+        with self._lock:
+            entries, self._buffer = self._buffer, []
+            upto = self._appended
+        if not entries:
+            return
+        dumps = json.dumps
+        lines = [dumps(entry, separators=(",", ":")) for entry in entries]
+        lines.append("")
+        try:
+            self._file.write("\n".join(lines))
+            self._file.flush()
+            if self._fsync:
+                os.fsync(self._file.fileno())
+        except BaseException:
+            with self._lock:
+                self._buffer[:0] = entries
+            raise
+        self._durable = upto
+
+    def _open_segment(self):
+        path = os.path.join(self._directory, f"{self._segment_no:08d}{_SEGMENT_SUFFIX}")
+        return open(path, "a", encoding="utf-8")
+
+
+def segment_paths(directory: str) -> list[str]:
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(n for n in os.listdir(directory) if n.endswith(_SEGMENT_SUFFIX))
+    return [os.path.join(directory, n) for n in names]
+
+
+def read_snapshot(directory: str) -> dict[str, Any] | None:
+    path = os.path.join(directory, _SNAPSHOT)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def iter_entries(directory: str, first_segment: int = 0) -> Iterator[Entry]:
+    """
+    Yield log entries in append order, from segment `first_segment` on.
+    A torn last line (crash mid-write) ends that segment.
+    """
+    for path in segment_paths(directory):
+        if _segment_no(path) < first_segment:
+            continue
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                seq, op, wallet_id, minor, reference = json.loads(line)
+                yield seq, op, wallet_id, minor, reference
+
+
+class _Shard:
+    __slots__ = ("lock", "balances", "held", "holds", "pending")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.balances: dict[str, int] = {}  # wallet -> balance (minor units)
+        self.held: dict[str, int] = {}  # wallet -> sum of its open holds
+        self.holds: dict[str, tuple[str, int]] = {}  # hold id -> (wallet, amount)
+        self.pending: deque[_PendingDebit] = deque()
+
+
+class _PendingDebit:
+    __slots__ = ("wallet_id", "minor", "reference", "seq", "error", "done")
+
+    def __init__(self, wallet_id: str, minor: int, reference: str | None) -> None:
+        self.wallet_id = wallet_id
+        self.minor = minor
+        self.reference = reference
+        self.seq = 0
+        self.error: Exception | None = None
+        # One-shot latch: acquired now, released by whoever applies the debit.
+        self.done = threading.Lock()
+        self.done.acquire()
+
+
+class WalletLedger:
+    """
+    Shared wallet balances with atomic debit, credit and hold operations.
+
+    - Wallets are spread over `shards` shards by id, each with its own lock,
+      so operations on different wallets rarely contend.
+    - Debits are batched for hot wallets (flat combining): a debit that
+      finds its shard locked queues itself, and whichever thread holds the
+      lock applies every queued debit before releasing it, in one critical
+      section with one log append. Uncontended debits just take the lock.
+    - Available funds are the balance minus open holds; a debit or hold
+      larger than that raises ValueError, so balances never go negative.
+    - With a WalletLog every change is logged (tagged with a global sequence
+      number) and a snapshot is written every `snapshot_every` entries;
+      WalletLedger.open() rebuilds the ledger from them. Operations return
+      only once their entry is durable (concurrent ones share a group
+      commit), so a debit that returned, e.g. behind a SUCCESS receipt,
+      survives a crash.
+
+    Amounts are Money in the ledger's currency; unknown wallets raise
+    LookupError. Operations return the sequence number of their entry.
+    """
+
+    def __init__(
+        self,
+        shards: int = 64,
+        *,
+        log: WalletLog | None = None,
+        snapshot_every: int = 100_000,
+        currency: str = DEFAULT_CURRENCY,
+    ) -> None:
+        if shards <= 0 or snapshot_every <= 0:
+            raise ValueError("shards and snapshot_every must be > 0")
+        self._shards = [_Shard() for _ in range(shards)]
+        self._log = log
+        self._snapshot_every = snapshot_every
+        self._since_snapshot = 0
+        self._snapshot_lock = threading.Lock()
+        self._currency = currency
+        self._seq = itertools.count(1)
+
+    @classmethod
+    def open(
+        cls,
+        directory: str,
+        shards: int = 64,
+        *,
+        snapshot_every: int = 100_000,
+        fsync: bool = True,
+        currency: str = DEFAULT_CURRENCY,
+    ) -> "WalletLedger":
+        """
+        Recover a ledger from the snapshot and log in `directory` (empty if
+        there are none) and keep logging there.
+        """
+        ledger = cls(shards, snapshot_every=snapshot_every, currency=currency)
+        snapshot = read_snapshot(directory)
+        last = 0
+        first_segment = 0
+        if snapshot is not None:
+            last = snapshot["seq"]
+            first_segment = snapshot["segment"]
+            for wallet_id, minor in snapshot["balances"].items():
+                ledger._shard(wallet_id).balances[wallet_id] = minor
+            for hold_id, (wallet_id, minor) in snapshot["holds"].items():
+                ledger._apply(LedgerOp.HOLD, wallet_id, minor, hold_id)
+        for seq, op, wallet_id, minor, reference in iter_entries(directory, first_segment):
+            ledger._apply(LedgerOp(op), wallet_id, minor, reference)
+            last = max(last, seq)
+        ledger._seq = itertools.count(last + 1)
+        ledger._log = WalletLog(directory, fsync=fsync)
+        return ledger
+
+    @property
+    def currency(self) -> str:
+        return self._currency
+
+    def __len__(self) -> int:
+        return sum(len(shard.balances) for shard in self._shards)
+
+    def __contains__(self, wallet_id: object) -> bool:
+        return isinstance(wallet_id, str) and wallet_id in self._shard(wallet_id).balances
+
+    def balance(self, wallet_id: str) -> Money:
+        shard = self._shard(wallet_id)
+        shard.lock.acquire()
+        try:
+            minor = self._balance_locked(shard, wallet_id)
+        finally:
+            self._unlock(shard, [])
+        return Money(minor, self._currency)
+
+    def available(self, wallet_id: str) -> Money:
+        shard = self._shard(wallet_id)
+        shard.lock.acquire()
+        try:
+            minor = self._balance_locked(shard, wallet_id) - shard.held.get(wallet_id, 0)
+        finally:
+            self._unlock(shard, [])
+        return Money(minor, self._currency)
+
+    def open_wallet(self, wallet_id: str, initial: Money | None = None) -> int:
+        minor = self._minor(initial) if initial is not None else 0
+        if minor < 0:
+            raise ValueError("initial balance must be >= 0")
+
+        def op(entries: list[Entry]) -> int:
+            shard = self._shard(wallet_id)
+            if wallet_id in shard.balances:
+                raise ValueError(f"Wallet already exists: {wallet_id!r}")
+            shard.balances[wallet_id] = minor
+            return self._entry(entries, LedgerOp.OPEN, wallet_id, minor, None)
+
+        return self._locked(wallet_id, op)
+
+    def credit(self, wallet_id: str, amount: Money, reference: str | None = None) -> int:
+        minor = self._positive(amount)
+
+        def op(entries: list[Entry]) -> int:
+            shard = self._shard(wallet_id)
+            shard.balances[wallet_id] = self._balance_locked(shard, wallet_id) + minor
+            return self._entry(entries, LedgerOp.CREDIT, wallet_id, minor, reference)
+
+        return self._locked(wallet_id, op)
+
+    def debit(self, wallet_id: str, amount: Money, reference: str | None = None) -> int:
+        minor = self._positive(amount)
+        shard = self._shard(wallet_id)
+        if shard.lock.acquire(blocking=False):
+            entries: list[Entry] = []
+            try:
+                seq = self._debit_locked(shard, wallet_id, minor, reference, entries)
+            finally:
+                self._unlock(shard, entries)
+        else:
+            # Contended: queue the debit for the current lock holder's batch.
+            pending = _PendingDebit(wallet_id, minor, reference)
+            shard.pending.append(pending)
+            self._combine(shard)
+            pending.done.acquire()
+            if pending.error is not None:
+                raise pending.error
+            seq = pending.seq
+        self._commit()
+        return seq
+
+    def hold(self, wallet_id: str, amount: Money, hold_id: str | None = None) -> Hold:
+        """
+        Reserve funds (e.g. an upfront fare estimate) until capture() or
+        release().
+        """
+        minor = self._positive(amount)
+        hold_id = hold_id or new_id("hold")
+
+        def op(entries: list[Entry]) -> Hold:
+            shard = self._shard(wallet_id)
+            if hold_id in shard.holds:
+                raise ValueError(f"Hold already exists: {hold_id!r}")
+            self._check_funds(shard, wallet_id, minor)
+            shard.holds[hold_id] = (wallet_id, minor)
+            shard.held[wallet_id] = shard.held.get(wallet_id, 0) + minor
+            self._entry(entries, LedgerOp.HOLD, wallet_id, minor, hold_id)
+            return Hold(hold_id, wallet_id, Money(minor, self._currency))
+
+        return self._locked(wallet_id, op)
+
+    def capture(self, hold: Hold, amount: Money | None = None) -> int:
+        """
+        Debit `amount` (default: all) of a hold and release the rest.
+        """
+        minor = self._minor(amount) if amount is not None else None
+
+        def op(entries: list[Entry]) -> int:
+            shard = self._shard(hold.wallet_id)
+            held = self._take_hold(shard, hold)
+            captured = held if minor is None else minor
+            if not 0 <= captured <= held:
+                shard.holds[hold.hold_id] = (hold.wallet_id, held)
+                raise ValueError(
+                    f"Cannot capture {Money(captured, self._currency)} of a "
+                    f"{Money(held, self._currency)} hold"
+                )
+            shard.held[hold.wallet_id] -= held
+            shard.balances[hold.wallet_id] -= captured
+            return self._entry(
+                entries, LedgerOp.CAPTURE, hold.wallet_id, captured, hold.hold_id
+            )
+
+        return self._locked(hold.wallet_id, op)
+
+    def release(self, hold: Hold) -> int:
+        def op(entries: list[Entry]) -> int:
+            shard = self._shard(hold.wallet_id)
+            held = self._take_hold(shard, hold)
+            shard.held[hold.wallet_id] -= held
+            return self._entry(
+                entries, LedgerOp.RELEASE, hold.wallet_id, held, hold.hold_id
+            )
+
+        return self._locked(hold.wallet_id, op)
+
+    def snapshot(self) -> int:
+        """
+        Write a consistent snapshot now (needs a log); returns its sequence
+        number. All shards are locked while the state is copied and the log
+        is rotated.
+        """
+        if self._log is None:
+            raise ValueError("snapshot() needs a WalletLog")
+        with self._snapshot_lock:
+            return self._snapshot_locked()
+
+    def close(self) -> None:
+        if self._log is not None:
+            self._log.close()
+
+    def __enter__(self) -> "WalletLedger":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _shard(self, wallet_id: str) -> _Shard:
+        return self._shards[hash(wallet_id) % len(self._shards)]
+
+    def _minor(self, amount: Money) -> int:
+        if amount.currency != self._currency:
+            raise ValueError(f"Ledger currency is {self._currency}, got {amount.currency}")
+        return amount.minor
+
+    def _positive(self, amount: Money) -> int:
+        minor = self._minor(amount)
+        if minor <= 0:
+            raise ValueError("amount must be > 0")
+        return minor
+
+    def _entry(
+        self,
+        entries: list[Entry],
+        op: LedgerOp,
+        wallet_id: str,
+        minor: int,
+        reference: str | None,
+    ) -> int:
+        seq = next(self._seq)
+        entries.append((seq, op.value, wallet_id, minor, reference))
+        return seq
+
+    def _balance_locked(self, shard: _Shard, wallet_id: str) -> int:
+        balance = shard.balances.get(wallet_id)
+        if balance is None:
+            raise LookupError(f"Unknown wallet: {wallet_id!r}")
+        return balance
+
+    def _check_funds(self, shard: _Shard, wallet_id: str, minor: int) -> None:
+        available = self._balance_locked(shard, wallet_id) - shard.held.get(wallet_id, 0)
+        if available < minor:
+            raise ValueError(f"Insufficient funds in wallet {wallet_id!r}")
+
+    def _take_hold(self, shard: _Shard, hold: Hold) -> int:
+        entry = shard.holds.pop(hold.hold_id, None)
+        if entry is None:
+            raise LookupError(f"Unknown or settled hold: {hold.hold_id!r}")
+        return entry[1]
+
+    def _debit_locked(
+        self,
+        shard: _Shard,
+        wallet_id: str,
+        minor: int,
+        reference: str | None,
+        entries: list[Entry],
+    ) -> int:
+        self._check_funds(shard, wallet_id, minor)
+        shard.balances[wallet_id] -= minor
+        return self._entry(entries, LedgerOp.DEBIT, wallet_id, minor, reference)
+
+    def _locked(self, wallet_id: str, op: Callable[[list[Entry]], T]) -> T:
+        shard = self._shard(wallet_id)
+        shard.lock.acquire()
+        entries: list[Entry] = []
+        try:
+            result = op(entries)
+        finally:
+            self._unlock(shard, entries)
+        self._commit()
+        return result
+
+    def _commit(self) -> None:
+        # After the shard lock is released, so others keep going while this
+        # thread waits for (or performs) the group's write.
+        if self._log is not None:
+            self._log.commit()
+
+    def _unlock(self, shard: _Shard, entries: list[Entry]) -> None:
+        # Every lock holder, readers included, leaves through here: apply the
+        # queued debits, log the whole batch, release, then re-check for
+        # debits queued meanwhile. A plain release would strand them.
+        self._release(shard, entries)
+        self._combine(shard)
+
+    def _release(self, shard: _Shard, entries: list[Entry]) -> None:
+        # Only buffers the entries: the write happens in _commit(), after the
+        # lock is released.
+        done = self._drain_locked(shard, entries)
+        try:
+            if entries and self._log is not None:
+                try:
+                    self._log.append(entries)
+                except Exception as exc:
+                    self._undo_drained_locked(shard, done, exc)
+                    raise
+        finally:
+            shard.lock.release()
+            for pending in done:
+                pending.done.release()
+        self._count(len(entries))
+
+    def _drain_locked(self, shard: _Shard, entries: list[Entry]) -> list[_PendingDebit]:
+        pending = shard.pending
+        done: list[_PendingDebit] = []
+        while pending:
+            debit = pending.popleft()
+            try:
+                debit.seq = self._debit_locked(
+                    shard, debit.wallet_id, debit.minor, debit.reference, entries
+                )
+            except Exception as exc:
+                debit.error = exc
+            done.append(debit)
+        return done
+
+    def _undo_drained_locked(
+        self, shard: _Shard, done: list[_PendingDebit], exc: Exception
+    ) -> None:
+        # Their entries were never logged: refund them and fail their callers
+        # rather than let them report a debit that would not survive a crash.
+        for debit in done:
+            if debit.error is None:
+                shard.balances[debit.wallet_id] += debit.minor
+                debit.error = exc
+
+    def _combine(self, shard: _Shard) -> None:
+        # A debit queued just before the holder released would otherwise be
+        # stranded: whoever sees a non-empty queue and gets the lock drains it.
+        while shard.pending and shard.lock.acquire(blocking=False):
+            self._release(shard, [])
+
+    def _count(self, n: int) -> None:
+        if self._log is None or not n:
+            return
+        self._since_snapshot += n
+        if self._since_snapshot < self._snapshot_every:
+            return
+        if self._snapshot_lock.acquire(blocking=False):
+            try:
+                if self._since_snapshot >= self._snapshot_every:
+                    self._snapshot_locked()
+            finally:
+                self._snapshot_lock.release()
+
+    def _snapshot_locked(self) -> int:
+        assert self._log is not None
+        for shard in self._shards:
+            shard.lock.acquire()
+        try:
+            # Everything numbered below `seq` has been applied and appended.
+            seq = next(self._seq)
+            balances: dict[str, int] = {}
+            holds: dict[str, tuple[str, int]] = {}
+            for shard in self._shards:
+                balances.update(shard.balances)
+                holds.update(shard.holds)
+            segment = self._log.rotate()
+            self._since_snapshot = 0
+        finally:
+            for shard in self._shards:
+                shard.lock.release()
+        for shard in self._shards:
+            self._combine(shard)
+        self._log.write_snapshot(seq, segment, balances, holds)
+        return seq
+
+    def _apply(self, op: LedgerOp, wallet_id: str, minor: int, reference: str | None) -> None:
+        # Replay one logged change during recovery (no checks, no logging).
+        shard = self._shard(wallet_id)
+        if op == LedgerOp.OPEN:
+            shard.balances[wallet_id] = minor
+        elif op == LedgerOp.CREDIT:
+            shard.balances[wallet_id] += minor
+        elif op == LedgerOp.DEBIT:
+            shard.balances[wallet_id] -= minor
+        elif op == LedgerOp.HOLD:
+            shard.holds[reference] = (wallet_id, minor)
+            shard.held[wallet_id] = shard.held.get(wallet_id, 0) + minor
+        else:  # CAPTURE / RELEASE settle the hold
+            _, held = shard.holds.pop(reference)
+            shard.held[wallet_id] -= held
+            if op == LedgerOp.CAPTURE:
+                shard.balances[wallet_id] -= minor
+
+
+def _segment_no(path: str) -> int:
+    return int(os.path.basename(path)[: -len(_SEGMENT_SUFFIX)])
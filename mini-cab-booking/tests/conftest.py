@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+import pytest
+
+from cab_booking.config import AppConfig
+from cab_booking.facade import CabBookingFacade
+from cab_booking.models import Driver, Location, RideRequest, Rider
+from cab_booking.observer import Event, Observer
+from cab_booking.payment import DefaultPaymentFactory
+from cab_booking.pricing import NormalPricing
+from cab_booking.services import BookingService, DriverAllocator
+
+
+class Recorder(Observer):
+    def __init__(self) -> None:
+        self.events: list[Event] = []
+
+    def on_event(self, event: Event) -> None:
+        self.events.append(event)
+
+    @property
+    def types(self) -> list[str]:
+        return [event.event_type for event in self.events]
+
+
+@pytest.fixture
+def recorder() -> Recorder:
+    return Recorder()
+
+
+@pytest.fixture
+def make_request() -> Callable[..., RideRequest]:
+    def make(
+        rider_id: str = "r1",
+        *,
+        distance_km: float = 5.0,
+        payment_type: str = "UPI",
+        auth_token: str | None = None,
+        **details: Any,
+    ) -> RideRequest:
+        return RideRequest(
+            rider=Rider(rider_id, f"Rider {rider_id}"),
+            pickup=Location(12.9716, 77.5946),
+            drop=Location(12.9352, 77.6245),
+            distance_km=distance_km,
+            payment_type=payment_type,
+            payment_details=details or {"upi_id": f"{rider_id}@upi"},
+            auth_token=auth_token,
+        )
+
+    return make
+
+
+@pytest.fixture
+def make_facade() -> Callable[..., CabBookingFacade]:
+    def make(drivers: int = 3, **kwargs: Any) -> CabBookingFacade:
+        allocator = DriverAllocator([Driver(f"d{i}", f"Driver {i}") for i in range(drivers)])
+        return CabBookingFacade(
+            config=AppConfig(),
+            pricing_strategy=NormalPricing(),
+            payment_factory=kwargs.pop("payment_factory", DefaultPaymentFactory()),
+            booking_service=BookingService(allocator, kwargs.pop("repository", None)),
+            **kwargs,
+        )
+
+    return make
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from cab_booking.aio import (
+    AsyncAuthenticatedFacade,
+    AsyncCabBookingFacade,
+    FakePaymentGateway,
+    GatewayPaymentFactory,
+    LocalAsyncAuthService,
+    StageTimeouts,
+)
+from cab_booking.config import AppConfig
+from cab_booking.models import BookingStatus, Driver, DriverStatus
+from cab_booking.payment import DefaultPaymentFactory
+from cab_booking.pricing import NormalPricing
+from cab_booking.services import AuthService, BookingService, DriverAllocator
+
+
+def _facade(gateway, drivers=20, **kwargs):
+    allocator = DriverAllocator([Driver(f"d{i}", f"Driver {i}") for i in range(drivers)])
+    facade = AsyncCabBookingFacade(
+        config=AppConfig(),
+        pricing_strategy=NormalPricing(),
+        payment_factory=GatewayPaymentFactory(DefaultPaymentFactory(), gateway),
+        booking_service=BookingService(allocator),
+        **kwargs,
+    )
+    return facade, allocator
+
+
+def test_bookings_overlap_on_the_gateway_up_to_max_concurrency(make_request):
+    gateway = FakePaymentGateway(latency=0.02)
+    facade, _ = _facade(gateway, max_concurrency=5)
+    requests = [make_request(f"r{i}") for i in range(20)]
+    results = asyncio.run(facade.book_rides(requests))
+    assert [r.request for r in results] == requests
+    assert all(r.booking.status == BookingStatus.CONFIRMED for r in results)
+    assert gateway.max_in_flight == 5
+
+
+def test_payment_timeout_fails_the_booking_and_frees_the_driver(make_request):
+    facade, allocator = _facade(
+        FakePaymentGateway(latency=1.0), drivers=1, timeouts=StageTimeouts(payment=0.01)
+    )
+    booking = asyncio.run(facade.book_ride(make_request()))
+    assert booking.status == BookingStatus.FAILED
+    assert allocator.status("d0") == DriverStatus.AVAILABLE
+
+
+def test_authenticated_facade_rejects_bad_tokens(make_request):
+    facade, _ = _facade(FakePaymentGateway(latency=0))
+    guarded = AsyncAuthenticatedFacade(facade, LocalAsyncAuthService(AuthService(["ok"])))
+    assert asyncio.run(guarded.book_ride(make_request(auth_token="ok"))).booking_id
+    with pytest.raises(PermissionError):
+        asyncio.run(guarded.book_ride(make_request(auth_token="nope")))
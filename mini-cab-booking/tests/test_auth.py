@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import pytest
+
+from cab_booking.auth import SignedTokenAuthService
+from cab_booking.facade import AuthenticatedFacade
+
+SECRET = b"0123456789abcdef-secret"
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_issued_token_verifies_and_is_cached():
+    auth = SignedTokenAuthService(SECRET, clock=Clock())
+    token = auth.issue("r1")
+    assert auth.subject(token) == "r1"
+    assert auth.is_authenticated(token) and auth.is_authenticated(token)
+    stats = auth.stats()
+    assert (stats.hits, stats.misses, stats.size) == (1, 1, 1)
+
+
+def test_tampered_and_foreign_tokens_are_rejected():
+    auth = SignedTokenAuthService(SECRET, clock=Clock())
+    version, payload, signature = auth.issue("r1").split(".")
+    other = SignedTokenAuthService(b"another-secret-of-16+", clock=Clock())
+    flipped = signature[:-1] + ("A" if signature[-1] != "A" else "B")
+    for token in (
+        f"{version}.{payload}.{flipped}",
+        f"{version}.{auth.issue('r2').split('.')[1]}.{signature}",
+        f"v2.{payload}.{signature}",
+        other.issue("r1"),
+        "v1.abc.é",
+        "v1.é.é",
+        "garbage",
+        "",
+    ):
+        assert not auth.is_authenticated(token), token
+        assert auth.subject(token) is None
+
+
+def test_expiry_and_cache_ttl():
+    clock = Clock()
+    auth = SignedTokenAuthService(SECRET, cache_ttl=10, clock=clock)
+    token = auth.issue("r1", ttl=30)
+    assert auth.is_authenticated(token)
+    clock.now += 29
+    assert auth.is_authenticated(token)
+    clock.now += 1
+    assert not auth.is_authenticated(token)
+
+
+def test_revoke_denies_cached_token():
+    auth = SignedTokenAuthService(SECRET, clock=Clock())
+    token = auth.issue("r1")
+    assert auth.is_authenticated(token)
+    auth.revoke(token)
+    assert not auth.is_authenticated(token)
+
+
+def test_revocations_are_forgotten_once_the_token_expires():
+    clock = Clock()
+    auth = SignedTokenAuthService(SECRET, cache_size=10, clock=clock)
+    for i in range(50):
+        auth.revoke(auth.issue(f"r{i}", ttl=10 + i))
+    assert len(auth._revoked) == 50  # still valid: all must stay denied
+    keep = auth.issue("keep", ttl=100)
+    auth.revoke(keep)
+    auth.revoke(keep)
+    clock.now += 35
+    auth.revoke(auth.issue("late", ttl=100))
+    assert len(auth._revoked) == len(auth._revoked_by_expiry) == 50 - 26 + 2
+    assert not auth.is_authenticated(keep)
+
+
+def test_authenticated_facade_denies_malformed_tokens(make_facade, make_request):
+    auth = SignedTokenAuthService(SECRET)
+    facade = AuthenticatedFacade(make_facade(), auth)
+    with pytest.raises(PermissionError):
+        facade.book_ride(make_request("r1", auth_token="v1.abc.é"))
+    results = facade.book_rides(
+        [
+            make_request("r1", auth_token="v1.abc.é"),
+            make_request("r2", auth_token=auth.issue("r2")),
+        ]
+    )
+    assert isinstance(results[0].error, PermissionError)
+    assert results[1].ok and results[1].booking.request.rider.rider_id == "r2"
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+import pytest
+
+from cab_booking import codec
+from cab_booking.models import (
+    Booking,
+    BookingStatus,
+    Driver,
+    PaymentReceipt,
+    PaymentStatus,
+)
+from cab_booking.money import Money
+from cab_booking.observer import Event
+
+
+def _records(make_request) -> list:
+    request = make_request("r1", upi_id="r1@upi", retries=-3, tip=1.5, ok=True, tags=["a", None])
+    receipt = PaymentReceipt("rcpt-1", Money(5000, "INR"), PaymentStatus.SUCCESS, "UPI")
+    return [
+        request,
+        make_request("r2", auth_token="tok\0en", note="é" * 200),
+        receipt,
+        Booking("b1", request, Money(5000, "INR"), BookingStatus.PAYMENT_PENDING, created_at=1.25),
+        Booking(
+            "b1",
+            request,
+            Money(5000, "INR"),
+            BookingStatus.CONFIRMED,
+            driver=Driver("d0", "Driver 0"),
+            payment=receipt,
+            created_at=1.25,
+        ),
+        Event("RIDE_REQUESTED", {"lat": 12.9, "n": 2**70, "fare": Money(-1, "INR"), "raw": b"\x00\xff"}),
+    ]
+
+
+def test_round_trip_single_and_batched(make_request):
+    records = _records(make_request)
+    for record in records:
+        assert codec.decode(codec.encode(record)) == record
+    frame = codec.encode_many(records)
+    assert codec.decode_many(memoryview(frame)) == records
+    assert codec.frame_count(frame) == len(records)
+    decoded = codec.decode_many(frame)
+    # Repeated riders in one frame decode to one shared object.
+    assert decoded[3].request.rider is decoded[4].request.rider
+
+
+def test_corrupt_frames_raise_value_error(make_request):
+    frame = codec.encode_many(_records(make_request))
+    for bad in (b"", bytes([codec.VERSION + 1]) + frame[1:], frame[:-3], frame + b"\0"):
+        with pytest.raises(ValueError):
+            codec.decode_many(bad)
+    with pytest.raises(TypeError):
+        codec.encode(object())
+
+
+def test_tokens_can_be_left_out(make_request):
+    request = make_request(auth_token="secret-bearer-token")
+    frame = codec.encode(request, include_tokens=False)
+    assert b"secret-bearer-token" not in frame
+    assert codec.decode(frame) == replace(request, auth_token=None)
+    assert codec.decode(codec.encode(request)) == request
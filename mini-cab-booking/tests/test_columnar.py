@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from cab_booking.columnar import BookingBatch
+from cab_booking.models import BookingStatus
+
+
+def test_round_trip_and_filters(make_facade, make_request):
+    facade = make_facade(drivers=3)
+    bookings = [facade.book_ride(make_request(f"r{i % 2}")) for i in range(3)]
+    bookings.append(facade.cancel_ride(bookings[0]))
+    batch = BookingBatch.from_bookings(bookings)
+    assert batch.to_bookings() == bookings
+    assert [b.booking_id for b in batch.where_rider("r1")] == [bookings[1].booking_id]
+    assert len(batch.where_status(BookingStatus.CANCELLED)) == 1
+    assert batch[1:3].to_bookings() == bookings[1:3]
+    assert list(batch.fares_minor) == [b.fare.minor for b in bookings]
+
+
+def test_payment_details_that_compare_equal_keep_their_types(make_facade, make_request):
+    facade = make_facade(drivers=4)
+    values = [1, True, 1.0, 1]
+    bookings = [
+        facade.book_ride(make_request(f"r{i}", upi_id="x@upi", flag=value))
+        for i, value in enumerate(values)
+    ]
+    restored = BookingBatch.from_bookings(bookings).to_bookings()
+    assert [type(b.request.payment_details["flag"]) for b in restored] == [int, bool, float, int]
+    assert restored == bookings
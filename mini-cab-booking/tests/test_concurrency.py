@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import sys
+import threading
+from collections import Counter
+
+import pytest
+
+from cab_booking.config import AppConfig
+from cab_booking.facade import CabBookingFacade
+from cab_booking.models import Booking, BookingStatus, Driver, Location, RideRequest, Rider
+from cab_booking.observer import Event, EventBus, Observer
+from cab_booking.payment import DefaultPaymentFactory
+from cab_booking.pricing import NormalPricing, SurgePricing
+from cab_booking.repository import InMemoryBookingRepository
+from cab_booking.services import BookingService, DriverAllocator
+
+THREADS = 8
+
+
+@pytest.fixture(autouse=True)
+def _frequent_switches():
+    # Switch threads far more often than the 5 ms default to shake out races.
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def _run(threads: int, target) -> None:
+    errors: list[BaseException] = []
+    barrier = threading.Barrier(threads)
+
+    def wrapped(n: int) -> None:
+        barrier.wait()
+        try:
+            target(n)
+        except BaseException as exc:
+            errors.append(exc)
+
+    pool = [threading.Thread(target=wrapped, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    if errors:
+        raise errors[0]
+
+
+def _facade(drivers: int) -> CabBookingFacade:
+    # Built by hand rather than with the conftest fixtures: only the API the
+    # thread-safety work shipped with is used here.
+    fleet = [Driver(f"d{i}", f"Driver {i}") for i in range(drivers)]
+    return CabBookingFacade(
+        config=AppConfig(),
+        pricing_strategy=NormalPricing(),
+        payment_factory=DefaultPaymentFactory(),
+        booking_service=BookingService(DriverAllocator(fleet)),
+    )
+
+
+def _request(rider_id: str, distance_km: float = 5.0) -> RideRequest:
+    return RideRequest(
+        rider=Rider(rider_id, f"Rider {rider_id}"),
+        pickup=Location(12.9716, 77.5946),
+        drop=Location(12.9352, 77.6245),
+        distance_km=distance_km,
+        payment_type="UPI",
+        payment_details={"upi_id": f"{rider_id}@upi"},
+    )
+
+
+def test_concurrent_bookings_never_share_a_driver_or_an_id():
+    per_thread = 200
+    # One driver per booking: each must be handed out exactly once.
+    facade = _facade(THREADS * per_thread)
+    bookings: list[Booking] = []
+
+    def worker(n: int) -> None:
+        request = _request(f"r{n}")
+        for _ in range(per_thread):
+            bookings.append(facade.book_ride(request))
+
+    _run(THREADS, worker)
+    assert len(bookings) == THREADS * per_thread
+    assert len({b.booking_id for b in bookings}) == len(bookings)
+    assert all(b.status == BookingStatus.CONFIRMED for b in bookings)
+    assert Counter(b.driver.driver_id for b in bookings) == {
+        f"d{i}": 1 for i in range(THREADS * per_thread)
+    }
+
+
+def test_every_fare_comes_from_one_strategy_while_swapping():
+    per_thread = 300
+    facade = _facade(THREADS * per_thread)
+    request = _request("r1", distance_km=7.0)
+    fares: list[int] = []
+    stop = threading.Event()
+
+    def swapper() -> None:
+        strategies = (NormalPricing(), SurgePricing())
+        i = 0
+        while not stop.is_set():
+            facade.set_pricing_strategy(strategies[i % 2])
+            i += 1
+
+    swap = threading.Thread(target=swapper)
+    swap.start()
+    try:
+
+        def worker(_: int) -> None:
+            for _ in range(per_thread):
+                fares.append(facade.book_ride(request).fare.minor)
+
+        _run(THREADS, worker)
+    finally:
+        stop.set()
+        swap.join()
+    assert set(fares) <= {7000, 17500}
+    assert len(fares) == THREADS * per_thread
+
+
+def test_released_drivers_are_never_shared_and_no_ride_is_lost(make_facade, make_request):
+    # A driver is marked busy right after booking and freed right before the
+    # ride completes, so finding it already busy is a real overlap.
+    busy: dict[str, str] = {}
+    lock = threading.Lock()
+    repository = InMemoryBookingRepository()
+    facade = make_facade(drivers=THREADS, repository=repository)
+    per_thread = 300
+
+    def worker(n: int) -> None:
+        request = make_request(f"r{n}")
+        for _ in range(per_thread):
+            booking = facade.book_ride(request)
+            driver_id = booking.driver.driver_id
+            with lock:
+                other = busy.setdefault(driver_id, booking.booking_id)
+            assert other == booking.booking_id, f"{driver_id} double-assigned"
+            booking = facade.start_ride(booking)
+            with lock:
+                del busy[driver_id]
+            facade.complete_ride(booking)
+
+    _run(THREADS, worker)
+    completed = repository.by_status(BookingStatus.COMPLETED)
+    assert len(completed) == THREADS * per_thread
+    assert len({booking.booking_id for booking in completed}) == len(completed)
+    assert Counter(b.driver.driver_id for b in completed).keys() == {
+        f"d{i}" for i in range(THREADS)
+    }
+
+
+def test_app_config_is_created_once():
+    saved = AppConfig._instance
+    AppConfig._instance = None
+    seen: list[AppConfig] = []
+    try:
+        _run(32, lambda _: seen.append(AppConfig()))
+    finally:
+        AppConfig._instance = saved
+    assert len({id(config) for config in seen}) == 1
+
+
+class _Counter(Observer):
+    def __init__(self) -> None:
+        self.events: list[Event] = []
+
+    def on_event(self, event: Event) -> None:
+        self.events.append(event)
+
+
+def test_subscribing_while_publishing_drops_nothing_for_existing_observers():
+    recorder = _Counter()
+    bus = EventBus()
+    bus.subscribe("PING", recorder)
+
+    def worker(n: int) -> None:
+        for i in range(500):
+            if n == 0 and i % 10 == 0:
+                bus.subscribe(f"OTHER_{i}", recorder)
+            bus.publish(Event("PING", {}))
+
+    _run(THREADS, worker)
+    assert len(recorder.events) == THREADS * 500
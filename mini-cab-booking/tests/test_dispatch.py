@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from cab_booking.dispatch import DispatchOrder, FreeDriverQueue
+from cab_booking.models import Driver, DriverStatus, Location
+from cab_booking.services import DriverAllocator
+
+
+def _drain(queue: FreeDriverQueue) -> list[str]:
+    out = []
+    while (driver_id := queue.pop()) is not None:
+        out.append(driver_id)
+    return out
+
+
+def test_idle_time_order_is_fifo_and_repush_moves_to_back():
+    queue = FreeDriverQueue()
+    for driver_id in ("a", "b", "c"):
+        queue.push(driver_id)
+    queue.push("a")
+    assert queue.remove("b") and not queue.remove("b")
+    assert len(queue) == 2 and "b" not in queue
+    assert _drain(queue) == ["c", "a"]
+
+
+def test_rating_order_breaks_ties_by_idle_time():
+    queue = FreeDriverQueue(DispatchOrder.RATING)
+    for driver_id in ("a", "b", "c", "d"):
+        queue.push(driver_id)
+    queue.set_rating("c", 4.9)
+    queue.set_rating("a", 4.5)
+    queue.set_rating("d", 4.5)
+    assert _drain(queue) == ["c", "a", "d", "b"]
+
+
+def test_churn_matches_model_and_compacts():
+    rng = random.Random(5)
+    queue = FreeDriverQueue(DispatchOrder.RATING)
+    model: dict[str, tuple[float, int]] = {}
+    ratings: dict[str, float] = {}
+    clock = 0
+    for _ in range(5000):
+        driver_id = f"d{rng.randrange(50)}"
+        op = rng.random()
+        if op < 0.4:
+            clock += 1
+            queue.push(driver_id)
+            model[driver_id] = (ratings.get(driver_id, 0.0), clock)
+        elif op < 0.6:
+            assert queue.remove(driver_id) == (model.pop(driver_id, None) is not None)
+        elif op < 0.8:
+            rating = rng.choice([3.0, 4.0, 5.0])
+            ratings[driver_id] = rating
+            queue.set_rating(driver_id, rating)
+            if driver_id in model:
+                model[driver_id] = (rating, model[driver_id][1])
+        else:
+            expected = min(model, key=lambda d: (-model[d][0], model[d][1]), default=None)
+            assert queue.pop() == expected
+            model.pop(expected, None)
+        # Stale entries are compacted away: memory tracks the fleet, not the churn.
+        assert len(queue._heap) <= 2 * 50 + 65
+    assert len(queue) == len(model)
+
+
+def test_allocator_rotates_and_rejects_double_release():
+    drivers = [Driver(f"d{i}", f"Driver {i}") for i in range(2)]
+    allocator = DriverAllocator(drivers)
+    first = allocator.allocate(None).driver_id
+    second = allocator.allocate(None).driver_id
+    assert {first, second} == {"d0", "d1"}
+    with pytest.raises(LookupError):
+        allocator.allocate(None)
+    allocator.release(first, Location(0.0, 0.0))
+    assert allocator.status(first) == DriverStatus.AVAILABLE
+    with pytest.raises(ValueError):
+        allocator.release(first)
+    assert allocator.allocate(None).driver_id == first
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from cab_booking.models import BookingStatus
+from cab_booking.observer import EventBus
+from cab_booking.payment import DefaultPaymentFactory
+from cab_booking.wallet import WalletLedger
+
+
+def test_book_rides_isolates_failures_and_keeps_order(make_facade, make_request):
+    facade = make_facade(drivers=2, payment_factory=DefaultPaymentFactory(WalletLedger()))
+    requests = [
+        make_request("r1"),
+        make_request("r2", payment_type="CASH"),
+        make_request("r3", payment_type="WALLET", wallet_id="w", balance="1000.00"),
+        make_request("r4"),
+        make_request("r5"),
+    ]
+    results = facade.book_rides(requests)
+    assert [r.request for r in results] == requests
+    assert results[0].booking.status == BookingStatus.CONFIRMED
+    assert isinstance(results[1].error, ValueError)
+    assert results[2].booking.status == BookingStatus.FAILED  # driver released
+    assert results[3].booking.status == BookingStatus.CONFIRMED
+    assert isinstance(results[4].error, LookupError)  # both drivers busy
+
+
+def test_book_rides_publishes_per_request_events_in_order(
+    make_facade, make_request, recorder
+):
+    bus = EventBus()
+    bus.subscribe("*", recorder)
+    facade = make_facade(event_bus=bus)
+    facade.book_rides([make_request("r1"), make_request("r2")])
+    per_booking = [
+        "RIDE_REQUESTED",
+        "FARE_CALCULATED",
+        "DRIVER_ASSIGNED",
+        "PAYMENT_PROCESSED",
+        "BOOKING_CONFIRMED",
+    ]
+    assert recorder.types == per_booking * 2
+
+
+def test_book_rides_does_not_share_payment_methods_across_value_types(
+    make_facade, make_request
+):
+    created = []
+
+    class Recording(DefaultPaymentFactory):
+        def create(self, payment_type, details):
+            created.append(dict(details))
+            return super().create(payment_type, details)
+
+    facade = make_facade(payment_factory=Recording())
+    facade.book_rides(
+        [
+            make_request("r1", upi_id="x@upi", n=1),
+            make_request("r2", upi_id="x@upi", n=True),
+            make_request("r3", upi_id="x@upi", n=1),
+        ]
+    )
+    assert [type(d["n"]) for d in created] == [int, bool]
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import math
+import random
+
+import pytest
+
+from cab_booking.geo import GridIndex
+from cab_booking.models import Driver, Location, RideRequest, Rider
+from cab_booking.services import NearestDriverAllocator
+
+
+def _d2(a: Location, b: Location) -> float:
+    kx = math.cos(math.radians(a.lat))
+    return (b.lat - a.lat) ** 2 + ((b.lng - a.lng) * kx) ** 2
+
+
+def _points(n: int, seed: int = 7) -> dict[int, Location]:
+    rng = random.Random(seed)
+    return {i: Location(12.9 + rng.random() * 0.2, 77.5 + rng.random() * 0.2) for i in range(n)}
+
+
+def test_nearest_matches_brute_force_after_moves_and_removals():
+    points = _points(500)
+    index: GridIndex[int] = GridIndex()
+    for key, location in points.items():
+        index.insert(key, location)
+    rng = random.Random(1)
+    for key in rng.sample(sorted(points), 100):
+        points[key] = Location(12.9 + rng.random() * 0.2, 77.5 + rng.random() * 0.2)
+        index.move(key, points[key])
+    for key in rng.sample(sorted(points), 100):
+        index.remove(key)
+        del points[key]
+    for _ in range(200):
+        query = Location(12.85 + rng.random() * 0.3, 77.45 + rng.random() * 0.3)
+        found = index.nearest(query)
+        assert _d2(query, points[found]) == min(_d2(query, p) for p in points.values())
+
+
+def test_nearest_k_matches_brute_force():
+    points = _points(400)
+    index: GridIndex[int] = GridIndex()
+    for key, location in points.items():
+        index.insert(key, location)
+    rng = random.Random(2)
+    for _ in range(100):
+        query = Location(12.9 + rng.random() * 0.2, 77.5 + rng.random() * 0.2)
+        k = rng.randint(1, 12)
+        max_deg = rng.choice([0.005, 0.02, float("inf")])
+        found = index.nearest_k(query, k, max_deg)
+        expected = sorted(
+            d2 for d2 in (_d2(query, p) for p in points.values()) if d2 <= max_deg**2
+        )[:k]
+        assert [d2 for d2, _ in found] == pytest.approx(expected)
+
+
+def test_empty_index_and_duplicate_insert():
+    index: GridIndex[str] = GridIndex()
+    assert index.nearest(Location(0, 0)) is None
+    assert index.nearest_k(Location(0, 0), 3) == []
+    index.insert("a", Location(0, 0))
+    with pytest.raises(KeyError):
+        index.insert("a", Location(1, 1))
+
+
+def test_allocator_picks_nearest_free_driver_and_reindexes_on_release():
+    allocator = NearestDriverAllocator()
+    allocator.add_driver(Driver("near", "Near"), Location(12.971, 77.594))
+    allocator.add_driver(Driver("far", "Far"), Location(13.05, 77.70))
+    request = RideRequest(
+        Rider("r1", "Rider"), Location(12.97, 77.59), Location(13.0, 77.6), 5.0, "UPI", {}
+    )
+    assert allocator.allocate(request).driver_id == "near"
+    assert allocator.allocate(request).driver_id == "far"
+    with pytest.raises(LookupError):
+        allocator.allocate(request)
+    allocator.release("far", Location(12.9701, 77.5901))
+    assert allocator.candidates(request.pickup, 5)[0][0] == "far"
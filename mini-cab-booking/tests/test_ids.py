@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+
+import pytest
+
+from cab_booking.ids import SnowflakeIdGenerator, parse_snowflake
+
+
+def test_ids_are_unique_and_sortable_across_sequence_overflow():
+    generator = SnowflakeIdGenerator(worker_id=7)
+    ids = generator.bulk("bk", 10_000) + [generator.new("bk") for _ in range(5000)]
+    ids += generator.bulk("bk", 3)
+    assert len(set(ids)) == len(ids)
+    assert ids == sorted(ids)
+    assert {parse_snowflake(int(i[3:], 16))[1] for i in ids} == {7}
+
+
+def test_worker_id_is_range_checked():
+    with pytest.raises(ValueError):
+        SnowflakeIdGenerator(worker_id=1024)
+
+
+def _child_worker_ids(generators, conn) -> None:
+    explicit, derived = generators
+    try:
+        explicit.new("bk")
+    except RuntimeError:
+        refused = True
+    else:
+        refused = False
+    derived.new("bk")
+    conn.send((refused, derived.worker_id))
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_fork_refuses_explicit_worker_ids_and_rederives_the_rest():
+    explicit = SnowflakeIdGenerator(worker_id=5)
+    derived = SnowflakeIdGenerator()
+    assert derived.worker_id == os.getpid() & 1023
+    context = multiprocessing.get_context("fork")
+    parent, child = context.Pipe()
+    process = context.Process(target=_child_worker_ids, args=((explicit, derived), child))
+    process.start()
+    refused, derived_id = parent.recv()
+    process.join()
+    assert refused  # the child would repeat the parent's (ms, worker, seq)
+    assert derived_id == process.pid & 1023
+    explicit.new("bk")  # the parent is unaffected
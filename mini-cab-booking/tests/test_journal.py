@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from cab_booking import codec
+from cab_booking.journal import BookingJournal, iter_records, recover, segment_paths
+from cab_booking.models import Booking, BookingStatus, Driver, DriverStatus
+from cab_booking.money import Money
+from cab_booking.repository import InMemoryBookingRepository
+from cab_booking.services import DriverAllocator
+
+
+def test_book_ride_is_durable_before_it_returns(tmp_path, make_facade, make_request):
+    directory = str(tmp_path / "journal")
+    journal = BookingJournal(directory, fsync=False)
+    facade = make_facade(journal=journal)
+    booking = facade.book_ride(make_request())
+    facade.start_ride(booking)
+    # Not closed or committed by hand: a crash now must not lose these.
+    repository = InMemoryBookingRepository()
+    stats = recover(directory, repository)
+    journal.close()
+    assert stats.bookings == 3  # PAYMENT_PENDING, CONFIRMED, IN_PROGRESS
+    assert repository.get(booking.booking_id).status == BookingStatus.IN_PROGRESS
+
+
+def test_recover_rebuilds_repository_and_driver_state(
+    tmp_path, make_facade, make_request
+):
+    directory = str(tmp_path / "journal")
+    with BookingJournal(directory, fsync=False) as journal:
+        facade = make_facade(drivers=2, journal=journal)
+        done = facade.complete_ride(facade.start_ride(facade.book_ride(make_request("r1"))))
+        open_ride = facade.book_ride(make_request("r2"))
+
+    repository = InMemoryBookingRepository()
+    allocator = DriverAllocator([Driver("d0", "Driver 0"), Driver("d1", "Driver 1")])
+    events = []
+    stats = recover(directory, repository, allocator, on_event=events.append)
+    assert repository.get(done.booking_id).status == BookingStatus.COMPLETED
+    assert repository.get(open_ride.booking_id).status == BookingStatus.CONFIRMED
+    assert allocator.status(done.driver.driver_id) == DriverStatus.AVAILABLE
+    assert allocator.status(open_ride.driver.driver_id) == DriverStatus.EN_ROUTE
+    assert stats.events == len(events) > 0
+
+
+@pytest.mark.parametrize("damage", ["truncate", "corrupt"])
+def test_torn_or_corrupt_tail_ends_the_segment(
+    tmp_path, make_facade, make_request, damage, caplog
+):
+    directory = str(tmp_path / "journal")
+    with BookingJournal(directory, fsync=False) as journal:
+        facade = make_facade(journal=journal)
+        first = facade.book_ride(make_request("r1"))
+        facade.book_ride(make_request("r2"))
+    (path,) = segment_paths(directory)
+    frames = [len(payload) for _, payload in iter_records(directory)]
+    with open(path, "r+b") as f:
+        data = bytearray(f.read())
+        if damage == "truncate":
+            del data[-5:]
+        else:
+            data[-5] ^= 0xFF  # inside the last frame's payload
+        f.seek(0)
+        f.write(data)
+        f.truncate()
+
+    repository = InMemoryBookingRepository()
+    recover(directory, repository)
+    assert len(list(iter_records(directory))) == len(frames) - 1
+    assert [b.request.rider.rider_id for b in repository.by_status(BookingStatus.CONFIRMED)] == [
+        first.request.rider.rider_id
+    ]
+    assert "ignoring tail" in caplog.text
+
+
+def test_concurrent_commits_share_writes(tmp_path, monkeypatch, make_facade, make_request):
+    monkeypatch.setattr("cab_booking.journal.os.fsync", lambda fd: time.sleep(0.002))
+    directory = str(tmp_path / "journal")
+    barrier = threading.Barrier(8)
+    with BookingJournal(directory) as journal:
+        facade = make_facade(drivers=8, journal=journal)
+
+        def worker(n: int) -> None:
+            barrier.wait()
+            for _ in range(25):
+                facade.cancel_ride(facade.book_ride(make_request(f"r{n}")))
+
+        pool = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+    assert recover(directory).bookings == 8 * 25 * 3
+    # One frame per commit would be 8 * 25 * 2; threads waiting on an fsync
+    # are covered by the next one.
+    assert len(list(iter_records(directory))) < 8 * 25 * 2 * 3 // 4
+
+
+def test_recover_skips_event_bodies_without_a_consumer(
+    tmp_path, monkeypatch, make_facade, make_request
+):
+    directory = str(tmp_path / "journal")
+    with BookingJournal(directory, fsync=False) as journal:
+        facade = make_facade(journal=journal)
+        facade.cancel_ride(facade.book_ride(make_request()))
+    events = []
+    full = recover(directory, on_event=events.append)
+
+    decoded = []
+    real = codec.decode_many
+
+    def spy(data):
+        records = real(data)
+        decoded.extend(type(r).__name__ for r in records)
+        return records
+
+    monkeypatch.setattr(codec, "decode_many", spy)
+    counted = recover(directory, InMemoryBookingRepository())
+    assert counted == full and full.events == len(events) > 0
+    assert set(decoded) == {"Booking"}
+
+
+def test_auth_tokens_are_not_persisted(tmp_path, make_request):
+    directory = str(tmp_path / "journal")
+    request = make_request(auth_token="secret-bearer-token")
+    booking = Booking("b1", request, Money(5000, "INR"), BookingStatus.PAYMENT_PENDING)
+    with BookingJournal(directory, fsync=False) as journal:
+        journal.append_booking(booking)
+    for path in segment_paths(directory):
+        with open(path, "rb") as f:
+            assert b"secret-bearer-token" not in f.read()
+    repository = InMemoryBookingRepository()
+    recover(directory, repository)
+    replayed = repository.get("b1")
+    assert replayed.request.auth_token is None
+    assert replayed.request.payment_details == request.payment_details
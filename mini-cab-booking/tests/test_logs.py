@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+
+import pytest
+
+from cab_booking.logs import (
+    DroppingQueueHandler,
+    JsonFormatter,
+    KeyValueFormatter,
+    LogSampler,
+)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_limits_and_refills():
+    clock = Clock()
+    sampler = LogSampler(rate_limit=2, burst=3, clock=clock)
+    assert [sampler.allow("e") for _ in range(4)] == [True, True, True, False]
+    clock.now += 1.0
+    assert [sampler.allow("e") for _ in range(3)] == [True, True, False]
+    assert sampler.rate_limited == 2
+
+
+def test_sampled_out_count_is_exact_under_threads(monkeypatch):
+    old = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        monkeypatch.setattr(random, "random", lambda: 0.99)
+        sampler = LogSampler({"noisy": 0.5})
+        barrier = threading.Barrier(8)
+
+        def work() -> None:
+            barrier.wait()
+            for _ in range(5000):
+                sampler.allow("noisy")
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(old)
+    assert sampler.sampled_out == 8 * 5000
+
+
+def test_dropping_handler_counts_and_reports_drops():
+    q: queue.Queue = queue.Queue(maxsize=1)
+    handler = DroppingQueueHandler(q)
+    record = logging.makeLogRecord({"msg": "hello"})
+    handler.enqueue(record)
+    handler.enqueue(record)
+    handler.enqueue(record)
+    assert handler.dropped == 2
+    q.get_nowait()
+    handler.enqueue(record)  # the summary takes the only slot, so this one drops
+    summary = q.get_nowait()
+    assert summary.event == "log_records_dropped" and summary.fields == {"count": 2}
+    assert handler.dropped == 3
+
+
+@pytest.mark.parametrize("formatter", [KeyValueFormatter(), JsonFormatter()])
+def test_formatters_render_structured_fields(formatter):
+    record = logging.makeLogRecord(
+        {"msg": "x", "levelname": "INFO", "event": "ride_booked", "fields": {"fare": "50.00 INR", "rider": "r 1"}}
+    )
+    text = formatter.format(record)
+    if isinstance(formatter, JsonFormatter):
+        body = json.loads(text)
+        assert body["event"] == "ride_booked" and body["rider"] == "r 1"
+    else:
+        assert "event=ride_booked" in text and 'rider="r 1"' in text and "fare=" in text
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import dataclasses
+import itertools
+import random
+
+import pytest
+
+from cab_booking.config import AppConfig
+from cab_booking.facade import CabBookingFacade
+from cab_booking.matching import UNMATCHED, BatchMatcher, auction
+from cab_booking.models import BookingStatus, Driver, Location
+from cab_booking.payment import DefaultPaymentFactory
+from cab_booking.pricing import NormalPricing
+from cab_booking.services import BookingService, NearestDriverAllocator
+
+
+def _cost(candidates, assigned, unmatched_cost):
+    total = 0
+    for edges, j in zip(candidates, assigned):
+        total += unmatched_cost if j == UNMATCHED else dict(edges)[j]
+    return total
+
+
+def _brute_force(candidates, drivers, unmatched_cost):
+    best = None
+    options = [[UNMATCHED] + [j for j, _ in edges] for edges in candidates]
+    for choice in itertools.product(*options):
+        taken = [j for j in choice if j != UNMATCHED]
+        if len(taken) == len(set(taken)):
+            cost = _cost(candidates, choice, unmatched_cost)
+            best = cost if best is None else min(best, cost)
+    return best
+
+
+def _instance(rng, requests, drivers):
+    return [
+        [(j, rng.randint(1, 60)) for j in rng.sample(range(drivers), rng.randint(0, min(3, drivers)))]
+        for _ in range(requests)
+    ]
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_auction_is_optimal_with_small_epsilon(seed):
+    rng = random.Random(seed)
+    requests, drivers = rng.randint(1, 6), rng.randint(1, 5)
+    candidates = _instance(rng, requests, drivers)
+    epsilon = 0.9 / (requests + drivers)
+    assigned = auction(candidates, 50, epsilon)
+    taken = [j for j in assigned if j != UNMATCHED]
+    assert len(taken) == len(set(taken))
+    for edges, j in zip(candidates, assigned):
+        assert j == UNMATCHED or j in dict(edges)
+    assert _cost(candidates, assigned, 50) == _brute_force(candidates, drivers, 50)
+
+
+def test_expired_deadline_still_returns_a_valid_assignment():
+    rng = random.Random(1)
+    candidates = _instance(rng, 300, 200)
+    exact = auction(candidates, 70)
+    early = auction(candidates, 70, deadline=0.0)
+    taken = [j for j in early if j != UNMATCHED]
+    assert len(taken) == len(set(taken))
+    bound = (300 + 200) * max(1.0, sum(c for e in candidates for _, c in e) / 5.0)
+    assert _cost(candidates, exact, 70) <= _cost(candidates, early, 70) <= (
+        _cost(candidates, exact, 70) + bound
+    )
+
+
+def _city(drivers: dict[str, float]) -> tuple[CabBookingFacade, NearestDriverAllocator]:
+    allocator = NearestDriverAllocator()
+    for driver_id, lat in drivers.items():
+        allocator.add_driver(Driver(driver_id, driver_id), Location(lat, 77.59))
+    facade = CabBookingFacade(
+        config=AppConfig(),
+        pricing_strategy=NormalPricing(),
+        payment_factory=DefaultPaymentFactory(),
+        booking_service=BookingService(allocator),
+    )
+    return facade, allocator
+
+
+def _at(make_request, rider_id, lat):
+    return dataclasses.replace(make_request(rider_id), pickup=Location(lat, 77.59))
+
+
+def test_batch_beats_arrival_order_and_carries_the_unmatched(make_request):
+    # Greedy would give r1 its nearest driver (a) and leave r2 a long way
+    # from b; the batch gives r1 b instead, which is nearly as close.
+    facade, allocator = _city({"a": 12.970, "b": 12.975})
+    matcher = BatchMatcher(facade, allocator, max_pickup_km=2.0, max_windows=2)
+    r1 = matcher.submit(_at(make_request, "r1", 12.9720))
+    r2 = matcher.submit(_at(make_request, "r2", 12.9690))
+    far = matcher.submit(_at(make_request, "r3", 13.5))
+    result = matcher.match([_at(make_request, "r1", 12.9720), _at(make_request, "r2", 12.9690)])
+    assert result.drivers == ["b", "a"] and result.matched == 2
+    assert result.pickup_km == pytest.approx(0.445, abs=0.01)
+
+    results = matcher.flush()
+    assert [r.booking.driver.driver_id for r in results] == ["b", "a"]
+    assert r1.result().status == BookingStatus.CONFIRMED
+    assert r2.result().driver.driver_id == "a"
+    assert not far.done() and len(matcher) == 1  # carried into the next window
+    matcher.flush()
+    with pytest.raises(LookupError):
+        far.result(timeout=0)
+
+
+def test_match_budget_is_validated_and_close_settles_pending(make_request):
+    facade, allocator = _city({"a": 12.97})
+    with pytest.raises(ValueError):
+        BatchMatcher(facade, allocator, match_budget_s=0)
+    matcher = BatchMatcher(facade, allocator, match_budget_s=0.001)
+    booked = matcher.submit(_at(make_request, "r1", 12.97))
+    unserved = matcher.submit(_at(make_request, "r2", 12.97))
+    matcher.close()
+    assert booked.result().driver.driver_id == "a"
+    with pytest.raises(LookupError):
+        unserved.result()
+    with pytest.raises(RuntimeError):
+        matcher.submit(_at(make_request, "r3", 12.97))
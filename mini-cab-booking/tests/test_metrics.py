@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import random
+import re
+import threading
+
+from cab_booking.facade import InstrumentedFacade
+from cab_booking.metrics import BookingMetrics, LatencyHistogram, bucket_index, bucket_upper_ns
+
+_BUCKET = re.compile(r'^(\w+)_bucket\{(.*)le="([^"]+)"\} (\d+)$')
+
+
+def _buckets(text: str) -> dict[str, list[tuple[str, int]]]:
+    series: dict[str, list[tuple[str, int]]] = {}
+    for line in text.splitlines():
+        match = _BUCKET.match(line)
+        if match:
+            name, labels, le, n = match.groups()
+            series.setdefault(f"{name}{{{labels}", []).append((le, int(n)))
+    return series
+
+
+def test_bucket_bounds_hold_every_value_within_a_sixteenth():
+    rng = random.Random(5)
+    for value in [0, 1, 15, 16, 17, 1023, 1024] + [rng.randrange(1, 2**62) for _ in range(2000)]:
+        index = bucket_index(value)
+        assert value <= bucket_upper_ns(index)
+        assert index == 0 or value > bucket_upper_ns(index - 1)
+        assert bucket_upper_ns(index) - value <= value // 16
+
+
+def test_histogram_merges_per_thread_shards():
+    histogram = LatencyHistogram()
+
+    def record() -> None:
+        for value in range(1, 1001):
+            histogram.record(value * 1000)
+
+    pool = [threading.Thread(target=record) for _ in range(4)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    snap = histogram.snapshot()
+    assert snap.count == 4000
+    assert snap.total_ns == 4 * 1000 * sum(range(1, 1001))
+    assert 500_000 <= snap.quantile(0.5) <= 500_000 * 17 // 16
+
+
+def test_prometheus_emits_the_same_bucket_ladder_every_scrape(make_facade, make_request):
+    metrics = BookingMetrics()
+    empty = _buckets(metrics.to_prometheus())
+    facade = InstrumentedFacade(make_facade(metrics=metrics), metrics)
+    facade.book_ride(make_request())
+    metrics.observe("pricing", 3 * 10**9)
+    busy = _buckets(metrics.to_prometheus())
+
+    assert {k: [le for le, _ in v] for k, v in empty.items()} == {
+        k: [le for le, _ in v] for k, v in busy.items()
+    }
+    for series in busy.values():
+        counts = [n for _, n in series]
+        assert counts == sorted(counts) and series[-1][0] == "+Inf"
+    pricing = dict(busy['cab_booking_stage_latency_seconds{stage="pricing",'])
+    assert pricing["2"] == 1 and pricing["5"] == pricing["+Inf"] == 2
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import pytest
+
+from cab_booking.builder import RideRequestBuilder
+from cab_booking.models import RideRequest
+
+
+def _row(rider_id: str = "r1", **overrides):
+    row = {
+        "rider_id": rider_id,
+        "rider_name": "Asha",
+        "pickup_lat": 12.97,
+        "pickup_lng": 77.59,
+        "drop_lat": 12.93,
+        "drop_lng": 77.62,
+        "distance_km": "8.5",
+        "payment_type": "UPI",
+        "payment_details": {"upi_id": "asha@upi"},
+    }
+    row.update(overrides)
+    return row
+
+
+def test_from_records_matches_from_mapping_and_shares_riders():
+    rows = [_row("r1"), _row("r2", payment_details=None), _row("r1", auth_token="t")]
+    built = RideRequest.from_records(rows)
+    assert built == [RideRequest.from_mapping(row) for row in rows]
+    assert built[0].rider is built[2].rider
+    assert built[0].distance_km == 8.5 and built[1].payment_details == {}
+
+
+def test_from_records_names_the_invalid_record():
+    rows = [_row("r1"), {k: v for k, v in _row("r2").items() if not k.startswith("drop")}]
+    with pytest.raises(ValueError, match="drop") as info:
+        RideRequest.from_records(rows)
+    assert "record 1" in info.value.__notes__
+    with pytest.raises(ValueError) as builder:
+        RideRequestBuilder().build()
+    assert str(builder.value).startswith("RideRequestBuilder missing fields")
+
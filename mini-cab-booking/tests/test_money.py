@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+import pytest
+
+from cab_booking.models import BookingStatus
+from cab_booking.money import Money
+from cab_booking.payment import DefaultPaymentFactory
+from cab_booking.wallet import WalletLedger
+
+
+def test_parse_rounds_half_up_and_formats_two_places():
+    assert Money.parse("120.5").minor == 12050
+    assert Money.parse("0.005").minor == 1
+    assert Money.parse("-0.005").minor == -1
+    assert str(Money(-5)) == "-0.05"
+    assert Money(12345).to_decimal() == Decimal("123.45")
+
+
+def test_arithmetic_is_exact_and_currency_checked():
+    total = sum((Money(1) for _ in range(10)), Money(0))
+    assert total == Money(10) and Money(10) * 3 == 3 * Money(10) == Money(30)
+    assert Money(5) - Money(7) == -Money(2)
+    with pytest.raises(ValueError):
+        Money(1, "INR") + Money(1, "USD")
+    with pytest.raises(TypeError):
+        Money(1) < 1
+    assert Money(1, "INR") != Money(1, "USD")
+
+
+def test_wallet_balance_comparison_uses_paise(make_facade, make_request):
+    ledger = WalletLedger()
+    ledger.open_wallet("exact", Money.parse("50.00"))
+    ledger.open_wallet("short", Money.parse("49.99"))
+    facade = make_facade(payment_factory=DefaultPaymentFactory(ledger))
+    exact = make_request(payment_type="WALLET", wallet_id="exact")
+    short = make_request(payment_type="WALLET", wallet_id="short")
+    assert facade.book_ride(exact).status == BookingStatus.CONFIRMED
+    assert facade.book_ride(short).status == BookingStatus.FAILED
+    assert ledger.balance("exact") == Money(0)
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from cab_booking.observer import Event, EventBus, Observer, OverflowPolicy, QueuedEventBus
+
+
+class _Failing(Observer):
+    def on_event(self, event: Event) -> None:
+        raise RuntimeError("boom")
+
+
+class _Gate(Observer):
+    def __init__(self) -> None:
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def on_event(self, event: Event) -> None:
+        self.entered.set()
+        self.release.wait(5)
+
+
+def test_queued_bus_delivers_each_type_in_publish_order(recorder):
+    with QueuedEventBus(workers=3) as bus:
+        bus.subscribe("A", recorder)
+        bus.subscribe("B", recorder)
+        for i in range(200):
+            bus.publish(Event("A" if i % 2 else "B", {"i": i}))
+        bus.flush()
+        metrics = bus.metrics()
+    assert metrics.delivered == 200 and metrics.queue_depth == 0
+    for kind in "AB":
+        seen = [e.payload["i"] for e in recorder.events if e.event_type == kind]
+        assert seen == sorted(seen) and len(seen) == 100
+
+
+def test_queued_bus_counts_drops_and_observer_errors(recorder):
+    gate = _Gate()
+    bus = QueuedEventBus(workers=1, maxsize=2, overflow=OverflowPolicy.DROP)
+    bus.subscribe("SLOW", gate)
+    bus.subscribe("FAIL", _Failing())
+    bus.subscribe("FAIL", recorder)
+    bus.publish(Event("SLOW", {}))
+    assert gate.entered.wait(5)
+    for _ in range(5):  # two fit in the queue, three are dropped
+        bus.publish(Event("FAIL", {}))
+    gate.release.set()
+    bus.close()
+    metrics = bus.metrics()
+    assert metrics.dropped == 3
+    assert metrics.observer_errors == 2
+    assert len(recorder.events) == 2  # a failing observer does not stop the next one
+    with pytest.raises(RuntimeError):
+        bus.publish(Event("FAIL", {}))
+
+
+def test_publish_in_progress_when_close_starts_is_delivered(recorder):
+    bus = QueuedEventBus()
+    bus.subscribe("A", recorder)
+    entered, proceed = threading.Event(), threading.Event()
+    real = bus.has_subscribers
+
+    def slow(event_type: str) -> bool:
+        entered.set()
+        proceed.wait(5)
+        return real(event_type)
+
+    bus.has_subscribers = slow  # holds the publish between its checks
+    publisher = threading.Thread(target=bus.publish, args=(Event("A", {}),), daemon=True)
+    publisher.start()
+    assert entered.wait(5)
+    closer = threading.Thread(target=bus.close, daemon=True)
+    closer.start()
+    closer.join(0.2)
+    proceed.set()
+    publisher.join(5)
+    closer.join(5)
+    flushed = threading.Thread(target=bus.flush, daemon=True)
+    flushed.start()
+    flushed.join(5)
+    assert not flushed.is_alive(), "flush() hung on an event queued after close"
+    assert recorder.types == ["A"]
+    with pytest.raises(RuntimeError):
+        bus.publish(Event("A", {}))
+
+
+def test_queued_bus_skips_events_without_subscribers():
+    with QueuedEventBus() as bus:
+        bus.publish(Event("NOBODY", {}))
+        bus.flush()
+        assert bus.metrics().delivered == 0
+
+
+def test_wildcards_match_prefixes_including_types_seen_before_subscribing(recorder):
+    bus = EventBus()
+    bus.publish(Event("BOOKING_CONFIRMED", {}))  # resolved with no observers
+    bus.subscribe("BOOKING_*", recorder)
+    for event_type in ("BOOKING_CONFIRMED", "BOOKING_FAILED", "RIDE_STARTED"):
+        bus.publish(Event(event_type, {}))
+    assert recorder.types == ["BOOKING_CONFIRMED", "BOOKING_FAILED"]
+    with pytest.raises(ValueError):
+        bus.subscribe("BOOK*ING", recorder)
+
+
+def test_new_event_types_replace_the_dispatch_table(recorder):
+    bus = EventBus()
+    bus.subscribe("A*", recorder)
+    held = bus._dispatch  # what a concurrent publish may be reading
+    bus.publish(Event("AB", {}))
+    assert "AB" not in held and bus._dispatch["AB"] == (recorder,)
+    assert recorder.types == ["AB"]
+
+
+def test_unobserved_events_are_never_built(monkeypatch, make_facade, make_request, recorder):
+    built: list[str] = []
+
+    def counting_event(event_type, payload):
+        built.append(event_type)
+        return Event(event_type, payload)
+
+    monkeypatch.setattr("cab_booking.facade.Event", counting_event)
+    bus = EventBus()
+    bus.publish_lazy("NOBODY", lambda: built.append("NOBODY") or {})
+    facade = make_facade(event_bus=bus)
+    facade.book_ride(make_request())
+    assert built == []
+    bus.subscribe("BOOKING_CONFIRMED", recorder)
+    facade.book_ride(make_request())
+    assert built == ["BOOKING_CONFIRMED"] == recorder.types
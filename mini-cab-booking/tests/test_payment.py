@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import pytest
+
+from cab_booking.payment import CachingPaymentFactory, DefaultPaymentFactory
+from cab_booking.wallet import WalletLedger
+
+
+class Recorded:
+    def __init__(self, details) -> None:
+        self.details = dict(details)
+
+
+def _factory(**kwargs) -> CachingPaymentFactory:
+    factory = CachingPaymentFactory(DefaultPaymentFactory(WalletLedger()), **kwargs)
+    factory.register("CUSTOM", Recorded)
+    return factory
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ({"balance": -1}, {"balance": -2}),  # hash(-1) == hash(-2)
+        ({"n": 5}, {"n": 5 + 2**61 - 1}),  # equal hashes modulo 2**61 - 1
+        ({"n": 1}, {"n": 1.0}),
+        ({"n": 1}, {"n": True}),
+        ({"n": "1"}, {"n": b"1"}),
+        ({"a": "b,c"}, {"a,b": "c"}),
+    ],
+)
+def test_different_details_never_share_a_method(a, b):
+    factory = _factory()
+    first, second = factory.create("CUSTOM", a), factory.create("CUSTOM", b)
+    assert first is not second
+    assert first.details == a and second.details == b
+    assert factory.stats().misses == 2
+
+
+def test_reordered_details_hit_and_types_are_part_of_the_key():
+    factory = _factory()
+    method = factory.create("WALLET", {"wallet_id": "w1", "balance": "10.00"})
+    assert factory.create("WALLET", {"balance": "10.00", "wallet_id": "w1"}) is method
+    assert factory.create("UPI", {"wallet_id": "w1", "balance": "10.00"}) is not method
+    stats = factory.stats()
+    assert (stats.hits, stats.misses, stats.bypassed) == (1, 2, 0)
+
+
+def test_nested_or_foreign_values_bypass_the_cache():
+    factory = _factory()
+    for details in ({"tags": ["a"]}, {"meta": {"k": 1}}, {"when": object()}, {1: "x", "a": "y"}):
+        assert factory.create("CUSTOM", details) is not factory.create("CUSTOM", details)
+    assert factory.stats().bypassed == 8 and factory.stats().size == 0
+
+
+def test_clock_eviction_keeps_referenced_entries():
+    factory = _factory(maxsize=2)
+    hot = factory.create("UPI", {"upi_id": "hot@upi"})
+    factory.create("UPI", {"upi_id": "a@upi"})
+    assert factory.create("UPI", {"upi_id": "hot@upi"}) is hot  # sets its bit
+    factory.create("UPI", {"upi_id": "b@upi"})  # evicts a@upi, not hot
+    assert factory.create("UPI", {"upi_id": "hot@upi"}) is hot
+    assert factory.stats().evictions == 1 and factory.stats().size == 2
+
+
+def test_subclasses_need_not_call_super_init():
+    class Legacy(DefaultPaymentFactory):
+        def __init__(self) -> None:  # no super().__init__(), as before the registry
+            self._ledger = None
+
+    factory = Legacy()
+    assert factory.create("upi", {"upi_id": "a@upi"}).method_name == "UPI"
+    factory.register("custom", Recorded)
+    assert isinstance(factory.create("CUSTOM", {}), Recorded)
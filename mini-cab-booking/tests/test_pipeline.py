@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import io
+import json
+
+import pytest
+
+from cab_booking.__main__ import build_facade, main
+from cab_booking.pipeline import run_pipeline
+
+
+def _row(rider_id: str, **overrides) -> str:
+    row = {
+        "rider_id": rider_id,
+        "rider_name": f"Rider {rider_id}",
+        "pickup_lat": 12.97,
+        "pickup_lng": 77.59,
+        "drop_lat": 12.93,
+        "drop_lng": 77.62,
+        "distance_km": 8.5,
+        "payment_type": "UPI",
+        "payment_details": {"upi_id": f"{rider_id}@upi"},
+    }
+    row.update(overrides)
+    return json.dumps(row)
+
+
+def _lines() -> list[str]:
+    return [
+        _row("r1"),
+        "{not json",
+        "",  # blank lines are skipped but still numbered
+        _row("r2", distance_km=-1),
+        _row("r3", payment_type="BITCOIN"),
+        _row("r4"),
+        "[1, 2]",
+        "null",
+    ]
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+@pytest.mark.parametrize("chunk_size", [1, 2, 512])
+def test_every_line_yields_a_record_in_order(parallel, chunk_size):
+    out = io.StringIO()
+    stats = run_pipeline(
+        build_facade(2), _lines(), out, chunk_size=chunk_size, parallel=parallel
+    )
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r["line"] for r in records] == [1, 2, 4, 5, 6, 7, 8]
+    ok = {r["line"]: r for r in records if "error" not in r}
+    errors = {r["line"]: r["error"] for r in records if "error" in r}
+    assert sorted(ok) == [1, 6]
+    assert all(r["status"] == "CONFIRMED" and r["fare_minor"] == 8500 for r in ok.values())
+    assert errors[2].startswith("JSONDecodeError")
+    assert errors[7] == errors[8] == "ValueError: expected a JSON object"
+    assert set(errors) == {2, 4, 5, 7, 8}
+    assert (stats.lines, stats.confirmed, stats.errors) == (7, 2, 5)
+
+
+def test_worker_error_propagates_from_parallel_stage():
+    class Boom(Exception):
+        pass
+
+    def lines():
+        yield _row("r1")
+        raise Boom
+
+    with pytest.raises(Boom):
+        run_pipeline(build_facade(1), lines(), io.StringIO(), chunk_size=1, parallel=True)
+
+
+def test_cli_writes_bookings_and_stats(tmp_path, capsys):
+    source = tmp_path / "requests.jsonl"
+    source.write_text("\n".join(_lines()) + "\n", encoding="utf-8")
+    target = tmp_path / "bookings.jsonl"
+    assert main([str(source), "-o", str(target), "--drivers", "1"]) == 0
+    records = [json.loads(line) for line in target.read_text().splitlines()]
+    assert len(records) == 7 and sum("error" in r for r in records) == 5
+    assert "lines=7 confirmed=2" in capsys.readouterr().err
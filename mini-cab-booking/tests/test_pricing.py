@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import random
+from array import array
+from decimal import ROUND_HALF_UP, Decimal
+
+import pytest
+
+from cab_booking.pricing import NormalPricing, PerKmPricing
+
+
+def _reference(rate: str, d: float) -> int:
+    fare = (Decimal(str(d)) * Decimal(rate)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    return int(fare * 100)
+
+
+def _distances() -> list[float]:
+    rng = random.Random(3)
+    distances = [round(rng.uniform(0.1, 80), rng.randint(0, 6)) for _ in range(5000)]
+    # Products that land exactly on (or a float ulp away from) half a paisa.
+    distances += [0.005, 0.015, 1.005, 2.675, 0.125, 10.0045, 1e-6, 123456.785]
+    return [d for d in distances if d > 0]
+
+
+@pytest.mark.parametrize("rate", ["10", "12.35", "7.333"])
+def test_calculate_fares_matches_decimal_half_up(rate):
+    pricing = PerKmPricing(Decimal(rate))
+    distances = _distances()
+    expected = [_reference(rate, d) for d in distances]
+    assert list(pricing.calculate_fares(distances)) == expected
+    assert list(pricing.calculate_fares(array("d", distances))) == expected
+    assert [pricing.calculate_fare(d).minor for d in distances] == expected
+
+
+def test_calculate_fares_keeps_ndarray_shape():
+    np = pytest.importorskip("numpy")
+    distances = np.array([[1.005, 2.5], [0.125, 40.0]])
+    fares = NormalPricing().calculate_fares(distances)
+    assert fares.dtype == np.int64 and fares.shape == (2, 2)
+    assert fares.tolist() == [[1005, 2500], [125, 40000]]
+
+
+@pytest.mark.parametrize("bad", [0.0, -1.0, float("nan"), float("inf")])
+def test_calculate_fares_rejects_what_calculate_fare_rejects(bad):
+    with pytest.raises((ValueError, ArithmeticError)):
+        NormalPricing().calculate_fares([1.0, bad])
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+import pytest
+
+from cab_booking.models import BookingStatus
+from cab_booking.repository import InMemoryBookingRepository, SqliteBookingRepository
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def repository(request):
+    if request.param == "memory":
+        yield InMemoryBookingRepository()
+    else:
+        with SqliteBookingRepository(batch_size=2) as repo:
+            yield repo
+
+
+def test_indexes_follow_status_transitions(repository, make_facade, make_request):
+    facade = make_facade(drivers=2, repository=repository)
+    first = facade.book_ride(make_request("r1"))
+    second = facade.book_ride(make_request("r2"))
+    facade.complete_ride(facade.start_ride(first))
+    facade.cancel_ride(second)
+
+    assert len(repository) == 2
+    assert repository.get(first.booking_id).status == BookingStatus.COMPLETED
+    assert [b.booking_id for b in repository.by_rider("r2")] == [second.booking_id]
+    assert [b.booking_id for b in repository.by_driver(first.driver.driver_id)] == [
+        first.booking_id
+    ]
+    assert repository.by_status(BookingStatus.CONFIRMED) == []
+    assert [b.booking_id for b in repository.by_status(BookingStatus.CANCELLED)] == [
+        second.booking_id
+    ]
+    stored = repository.get(second.booking_id)
+    assert stored.fare == second.fare and stored.payment == second.payment
+    assert replace(stored.request, payment_details={}) == replace(
+        second.request, payment_details={}
+    )
+
+
+def test_sqlite_never_persists_payment_credentials(tmp_path, make_facade, make_request):
+    path = str(tmp_path / "bookings.db")
+    with SqliteBookingRepository(path) as repository:
+        facade = make_facade(repository=repository)
+        upi = facade.book_ride(make_request("r1", upi_id="secret@upi"))
+        card = facade.book_ride(
+            make_request("r2", payment_type="CARD", card_last4="4242", card_number="4111111111114242")
+        )
+        assert repository.get(upi.booking_id).request.payment_details == {}
+        assert repository.get(card.booking_id).request.payment_details == {"card_last4": "4242"}
+        assert repository.get(card.booking_id).payment == card.payment
+    raw = b"".join(p.read_bytes() for p in tmp_path.glob("bookings.db*"))  # WAL too
+    assert b"secret@upi" not in raw and b"4111111111114242" not in raw
+
+
+def test_between_is_half_open_and_ordered(repository, make_facade, make_request):
+    facade = make_facade(drivers=3, repository=repository)
+    bookings = [facade.book_ride(make_request(f"r{i}")) for i in range(3)]
+    for i, booking in enumerate(bookings):
+        repository.save(replace(booking, created_at=100.0 + i))
+    found = repository.between(100.0, 102.0)
+    assert [b.booking_id for b in found] == [b.booking_id for b in bookings[:2]]
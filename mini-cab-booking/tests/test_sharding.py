@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import pytest
+
+from cab_booking.config import AppConfig
+from cab_booking.facade import CabBookingFacade
+from cab_booking.models import BookingStatus, Driver, Location, RideRequest, Rider
+from cab_booking.payment import DefaultPaymentFactory
+from cab_booking.pricing import NormalPricing
+from cab_booking.services import BookingService, DriverAllocator
+from cab_booking.sharding import RideAction, ShardedBookingRouter, ShardKey
+
+
+def build_shard(shard: int) -> CabBookingFacade:
+    # Module level so worker processes can unpickle it.
+    return CabBookingFacade(
+        config=AppConfig(),
+        pricing_strategy=NormalPricing(),
+        payment_factory=DefaultPaymentFactory(),
+        booking_service=BookingService(
+            DriverAllocator([Driver(f"s{shard}d{i}", "Driver") for i in range(2)])
+        ),
+    )
+
+
+def _request(rider_id: str) -> RideRequest:
+    return RideRequest(
+        Rider(rider_id, "Rider"),
+        Location(12.97, 77.59),
+        Location(12.93, 77.62),
+        5.0,
+        "UPI",
+        {"upi_id": f"{rider_id}@upi"},
+    )
+
+
+@pytest.fixture(scope="module")
+def router():
+    with ShardedBookingRouter(build_shard, 2, shard_key=ShardKey.RIDER) as router:
+        yield router
+
+
+def test_finished_rides_free_the_shards_drivers(router):
+    request = _request("rider-a")
+    shard = router.shard_of(request)
+    booked = set()
+    for _ in range(10):  # five times the shard's fleet
+        booking = router.book_ride(request)
+        assert booking.driver.driver_id.startswith(f"s{shard}d")
+        booked.add(booking.booking_id)
+        booking = router.complete_ride(router.start_ride(booking))
+        assert booking.status == BookingStatus.COMPLETED
+    assert len(booked) == 10
+
+
+def test_transitions_are_queued_after_their_bookings(router):
+    # Two riders per shard: each shard has two drivers.
+    requests: list[RideRequest] = []
+    for shard in range(router.shards):
+        candidates = (_request(f"rider-{i}") for i in range(1000))
+        requests += [r for r in candidates if router.shard_of(r) == shard][:2]
+    bookings = [router.submit(request) for request in requests]
+    router.flush()
+    cancels = [router.submit_transition(f.result(), RideAction.CANCEL) for f in bookings]
+    router.flush()
+    assert [f.result().status for f in cancels] == [BookingStatus.CANCELLED] * 4
+    with pytest.raises(ValueError):
+        router.start_ride(cancels[0].result())
+    # Cancelling released every driver again.
+    again = router.book_rides(requests)
+    assert all(r.booking is not None for r in again)
+    for result in again:
+        router.cancel_ride(result.booking)
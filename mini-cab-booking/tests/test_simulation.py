@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import dataclasses
+import random
+
+import pytest
+
+from cab_booking.geo import distance_km
+from cab_booking.models import Location
+from cab_booking.simulation import CitySimulator, EventQueue, SimulationConfig
+
+SMALL = SimulationConfig(seed=3, hours=2, drivers=50, peak_requests_per_hour=400)
+
+
+def test_event_queue_pops_in_time_then_scheduling_order():
+    queue = EventQueue()
+    rng = random.Random(1)
+    times = [rng.choice([1.0, 2.0, 3.0]) for _ in range(200)]
+    for n, at in enumerate(times):
+        queue.push(at, 0, n)
+    popped = [queue.pop() for _ in range(len(times))]
+    assert [(at, data) for at, _, _, data in popped] == sorted(
+        (at, n) for n, at in enumerate(times)
+    )
+    assert queue.peek_time() is None
+
+
+@pytest.mark.parametrize("nearest", [True, False])
+def test_same_seed_replays_the_same_run(nearest):
+    config = dataclasses.replace(SMALL, nearest_dispatch=nearest)
+    first, second = CitySimulator(config).run(), CitySimulator(config).run()
+    assert dataclasses.replace(first, wall_seconds=0) == dataclasses.replace(
+        second, wall_seconds=0
+    )
+    assert first.requests == first.completed + first.failed + first.abandoned
+    assert 0 < first.utilization <= 1
+
+
+def test_demand_does_not_depend_on_dispatch():
+    nearest = CitySimulator(SMALL).run()
+    rotation = CitySimulator(dataclasses.replace(SMALL, nearest_dispatch=False)).run()
+    assert nearest.requests == rotation.requests
+    # Sending the closest driver wastes less time driving to pickups.
+    assert nearest.pickup_eta_s[0] < rotation.pickup_eta_s[0]
+
+
+def test_distance_km_is_equirectangular():
+    a = Location(12.9716, 77.5946)
+    assert distance_km(a, a) == 0
+    assert distance_km(a, Location(13.9716, 77.5946)) == pytest.approx(111.32)
+    b = Location(12.9352, 77.6245)
+    assert distance_km(a, b) == pytest.approx(distance_km(b, a))
+    assert distance_km(a, b) == pytest.approx(5.15, abs=0.05)
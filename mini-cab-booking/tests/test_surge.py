@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from cab_booking.geo import cell_of
+from cab_booking.models import Location
+from cab_booking.observer import Event
+from cab_booking.surge import DynamicSurgePricing
+
+HERE = Location(lat=12.9716, lng=77.5946)
+DRIVER = Location(lat=-20.0, lng=77.0)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_multiplier_follows_demand_and_supply():
+    clock = Clock()
+    surge = DynamicSurgePricing(window_s=60, buckets=6, sensitivity=0.5, clock=clock)
+    assert surge.multiplier(HERE) == 1.0
+    for _ in range(9):
+        surge.record_request(HERE)
+    # pressure 9 / (0 + 1) -> 1 + 0.5 * 8 = 5, clamped to the default 3.0
+    assert surge.snapshot(HERE) == (9, 0, 3.0)
+    for i in range(2):
+        surge.driver_available(f"d{i}", HERE)
+    # pressure 9 / 3 = 3 -> 2.0
+    assert surge.snapshot(HERE) == (9, 2, 2.0)
+    surge.driver_unavailable("d0")
+    surge.driver_unavailable("d1")
+    surge.driver_unavailable("d1")  # already gone: no double count
+    assert surge.snapshot(HERE)[1] == 0
+
+
+def test_demand_expires_and_idle_cells_are_dropped():
+    clock = Clock()
+    surge = DynamicSurgePricing(window_s=60, buckets=6, clock=clock)
+    for _ in range(5):
+        surge.record_request(HERE)
+    clock.now += 30
+    surge.record_request(HERE)
+    assert surge.snapshot(HERE)[0] == 6
+    clock.now += 40  # the first five fall out of the window
+    assert surge.snapshot(HERE)[0] == 1
+    clock.now += 60
+    assert surge.multiplier(HERE) == 1.0
+    assert surge._cells == {}
+
+
+def test_cells_that_go_quiet_are_swept_by_other_updates():
+    clock = Clock()
+    surge = DynamicSurgePricing(window_s=60, buckets=6, clock=clock)
+    for i in range(100):
+        surge.record_request(Location(lat=20.0 + i / 10, lng=77.0))
+    surge.driver_available("d1", DRIVER)
+    assert len(surge._cells) == 101
+    clock.now += 120  # every window has expired; only one cell stays busy
+    for _ in range(60):
+        surge.record_request(HERE)
+    assert set(surge._cells) == {
+        cell_of(HERE.lat, HERE.lng, surge._cell_deg),
+        cell_of(DRIVER.lat, DRIVER.lng, surge._cell_deg),  # its free driver keeps it
+    }
+    assert len(surge._sweep) <= len(surge._cells) + 2
+
+
+def test_quote_scales_base_fare_and_events_feed_state(make_request):
+    surge = DynamicSurgePricing(clock=Clock())
+    request = make_request(distance_km=5.0)
+    assert surge.quote(request).minor == 5000
+    for _ in range(3):
+        surge.on_event(Event("RIDE_REQUESTED", {"lat": request.pickup.lat, "lng": request.pickup.lng}))
+    # pressure 3 -> 1 + 0.5 * 2 = 2.0
+    assert surge.quote(request).minor == 10000
+    surge.on_event(
+        Event("DRIVER_AVAILABLE", {"driver_id": "d1", "lat": request.pickup.lat, "lng": request.pickup.lng})
+    )
+    # pressure 3 / 2 = 1.5 -> 1.25, floored to the 0.1 step
+    assert surge.quote(request).minor == 6000
+    surge.on_event(Event("DRIVER_ASSIGNED", {"driver_id": "d1"}))
+    assert surge.quote(request).minor == 10000
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from cab_booking.models import BookingStatus, PaymentStatus
+from cab_booking.money import Money
+from cab_booking.payment import DefaultPaymentFactory, WalletPayment
+from cab_booking import wallet
+from cab_booking.wallet import WalletLedger, iter_entries
+
+
+@pytest.fixture(autouse=True)
+def _switch_often():
+    old = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(old)
+
+
+def _start(threads):
+    for t in threads:
+        t.daemon = True
+        t.start()
+
+
+def test_contended_debits_complete_while_readers_hold_the_lock():
+    ledger = WalletLedger(shards=1)
+    ledger.open_wallet("w", Money(10**9))
+    stop = threading.Event()
+    debited = []
+
+    def read() -> None:
+        while not stop.is_set():
+            ledger.balance("w")
+            ledger.available("w")
+
+    def debit(n: int) -> None:
+        for _ in range(300):
+            ledger.debit("w", Money(1))
+        debited.append(n)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    debiters = [threading.Thread(target=debit, args=(n,)) for n in range(4)]
+    _start(readers + debiters)
+    deadline = time.monotonic() + 20
+    for t in debiters:
+        t.join(timeout=max(0.0, deadline - time.monotonic()))
+    stop.set()
+    for t in readers:
+        t.join(timeout=5)
+    assert sorted(debited) == [0, 1, 2, 3], "a queued debit was stranded"
+    assert ledger.balance("w") == Money(10**9 - 4 * 300)
+
+
+def test_concurrent_debits_never_overdraw():
+    ledger = WalletLedger(shards=1)
+    ledger.open_wallet("w", Money(1000))
+    ok = []
+    barrier = threading.Barrier(8)
+
+    def debit() -> None:
+        barrier.wait()
+        for _ in range(50):
+            try:
+                ledger.debit("w", Money(7))
+            except ValueError:
+                continue
+            ok.append(7)
+
+    threads = [threading.Thread(target=debit) for _ in range(8)]
+    _start(threads)
+    for t in threads:
+        t.join(timeout=20)
+    assert sum(ok) == 1000 - 1000 % 7
+    assert ledger.balance("w") == Money(1000 % 7)
+    hold = ledger.hold("w", Money(1000 % 7))
+    assert ledger.available("w") == Money(0)
+    with pytest.raises(ValueError):
+        ledger.debit("w", Money(1))
+    ledger.release(hold)
+    with pytest.raises(LookupError):
+        ledger.debit("nope", Money(1))
+
+
+def test_paid_debit_is_durable_before_the_receipt(tmp_path):
+    directory = str(tmp_path / "wallet")
+    ledger = WalletLedger.open(directory, fsync=False)
+    ledger.open_wallet("w", Money(500))
+    receipt = WalletPayment("w", ledger=ledger).pay(Money(120))
+    assert receipt.status == PaymentStatus.SUCCESS
+    # Not closed: the entry must already be on disk.
+    debits = [e for e in iter_entries(directory) if e[1] == "DEBIT"]
+    assert [(e[3], e[4]) for e in debits] == [(120, receipt.receipt_id)]
+    assert WalletPayment("w", ledger=ledger).pay(Money(10_000)).status == PaymentStatus.FAILED
+    ledger.close()
+
+
+def test_wallet_payments_never_trust_the_client_balance(make_facade, make_request):
+    request = make_request(payment_type="WALLET", wallet_id="w", balance="1000.00")
+    with pytest.raises(ValueError):
+        make_facade().book_ride(request)  # no ledger: rejected, not trusted
+    ledger = WalletLedger()
+    ledger.open_wallet("w", Money(100))
+    facade = make_facade(payment_factory=DefaultPaymentFactory(ledger))
+    assert facade.book_ride(request).status == BookingStatus.FAILED
+    assert ledger.balance("w") == Money(100)
+
+
+def test_log_writes_happen_outside_the_shard_locks(tmp_path, monkeypatch):
+    ledger = WalletLedger.open(str(tmp_path / "wallet"), shards=4)
+    held = []
+    real = os.fsync
+
+    def fsync(fd: int) -> None:
+        held.append(any(shard.lock.locked() for shard in ledger._shards))
+        real(fd)
+
+    monkeypatch.setattr(wallet.os, "fsync", fsync)
+    ledger.open_wallet("w", Money(100))
+    ledger.debit("w", Money(10))
+    ledger.credit("w", Money(5))
+    ledger.close()
+    assert held and not any(held)
+
+
+def test_queued_debits_fail_if_their_entries_cannot_be_logged(tmp_path, monkeypatch):
+    ledger = WalletLedger.open(str(tmp_path / "wallet"), shards=1, fsync=False)
+    ledger.open_wallet("w", Money(100))
+    shard = ledger._shards[0]
+    errors = []
+
+    def debit() -> None:
+        try:
+            ledger.debit("w", Money(30))
+        except OSError as exc:
+            errors.append(exc)
+
+    shard.lock.acquire()  # the queued debit waits for this "holder"
+    t = threading.Thread(target=debit, daemon=True)
+    t.start()
+    while not shard.pending:
+        time.sleep(0.001)
+
+    def fail(entries) -> None:
+        raise OSError("disk full")
+
+    monkeypatch.setattr(ledger._log, "append", fail)
+    with pytest.raises(OSError):
+        ledger._unlock(shard, [])
+    t.join(timeout=5)
+    assert len(errors) == 1  # not a SUCCESS for an unlogged debit
+    monkeypatch.undo()
+    assert ledger.balance("w") == Money(100)
+    ledger.close()
+
+
+def test_recovery_from_snapshot_and_log(tmp_path):
+    directory = str(tmp_path / "wallet")
+    with WalletLedger.open(directory, snapshot_every=5, fsync=False) as ledger:
+        for n in range(3):
+            ledger.open_wallet(f"w{n}", Money(1000))
+        for n in range(12):
+            ledger.debit(f"w{n % 3}", Money(10 + n))
+            ledger.credit(f"w{(n + 1) % 3}", Money(5))
+        kept = ledger.hold("w0", Money(100))
+        settled = ledger.hold("w1", Money(50))
+        ledger.capture(settled, Money(30))
+        expected = {w: (ledger.balance(w), ledger.available(w)) for w in ("w0", "w1", "w2")}
+        seq = ledger.snapshot()
+        ledger.debit("w2", Money(1))
+        expected["w2"] = (expected["w2"][0] - Money(1), expected["w2"][1] - Money(1))
+
+    recovered = WalletLedger.open(directory, fsync=False)
+    assert {w: (recovered.balance(w), recovered.available(w)) for w in expected} == expected
+    recovered.release(kept)  # the open hold survived
+    assert recovered.available("w0") == recovered.balance("w0")
+    assert recovered.debit("w0", Money(1)) > seq
+    recovered.close()